@@ -0,0 +1,36 @@
+# admin_service/archive_service.py
+# -*- coding: utf-8 -*-
+"""
+Archive closed bookings (see db/archive.py for the tiering itself)
+"""
+
+from datetime import date, timedelta
+from typing import Optional
+
+from db.archive import ArchiveResult, archive_closed_bookings, archive_counts
+from admin_service.audit_service import AuditService
+from common.exceptions import DatabaseError, ValidationError
+
+DEFAULT_RETENTION_DAYS = 365  # closed bookings stay hot for a year after they end
+
+
+class ArchiveService:
+    def __init__(self, audit: Optional[AuditService] = None):
+        self.audit = audit or AuditService()
+
+    def archive(self, *, actor_user_id: int = 0, cutoff: Optional[date] = None) -> ArchiveResult:
+        """Move closed bookings that ended before `cutoff` (default: a year ago) to the archive"""
+        cutoff = cutoff or date.today() - timedelta(days=DEFAULT_RETENTION_DAYS)
+        if cutoff > date.today():
+            raise ValidationError("Cutoff cannot be in the future")
+        try:
+            result = archive_closed_bookings(cutoff)
+        except Exception as e:
+            raise DatabaseError(f"Archiving failed: {e}") from e
+        self.audit.write(actor_user_id=actor_user_id, action="archive_bookings", target_type="booking",
+                         detail=f"bookings={result.bookings} payments={result.payments} "
+                                f"before={cutoff.isoformat()}")
+        return result
+
+    def counts(self) -> dict:
+        return archive_counts()
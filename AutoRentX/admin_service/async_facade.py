@@ -0,0 +1,113 @@
+# admin_service/async_facade.py
+# -*- coding: utf-8 -*-
+"""
+Async counterparts of PricingService, BookingReviewService and AuditService
+
+Same methods, same arguments, same exceptions; each call runs the blocking
+service method on the database executor (db/executor.py) and is awaited:
+
+    review = AsyncBookingReviewService()
+    await review.approve_many(actor_user_id=1, booking_ids=ids)
+
+Results are the usual model instances / rows. Related objects that were not
+loaded with them (e.g. booking.car on a plain select) still load lazily, on
+the calling thread; read what you need inside the service call instead.
+"""
+
+from datetime import date
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from db.executor import DbExecutor
+from db.models import AuditLog, Booking, Car, PricingRule
+from admin_service.audit_service import AuditService
+from admin_service.booking_review_service import BookingReviewService
+from admin_service.pricing_service import PricingService
+from common.pagination import DEFAULT_PAGE_SIZE, Page
+from common.rows import AuditRow, RuleRow
+
+
+class AsyncPricingService:
+    def __init__(self, sync: Optional[PricingService] = None, executor: Optional[DbExecutor] = None):
+        self.sync = sync or PricingService()
+        self.executor = executor or DbExecutor()
+
+    async def create_rule(self, *, actor_user_id: int, name: str, rule_type: str, amount_type: str,
+                          amount_value: float, scope: str = "global", car_id: Optional[int] = None,
+                          min_days: int = 1, start_date_str: Optional[str] = None,
+                          end_date_str: Optional[str] = None) -> PricingRule:
+        return await self.executor.run(self.sync.create_rule, actor_user_id=actor_user_id, name=name,
+                                       rule_type=rule_type, amount_type=amount_type, amount_value=amount_value,
+                                       scope=scope, car_id=car_id, min_days=min_days,
+                                       start_date_str=start_date_str, end_date_str=end_date_str)
+
+    async def list_rules(self, *, readonly: bool = False) -> List[PricingRule] | List[RuleRow]:
+        return await self.executor.run(self.sync.list_rules, readonly=readonly)
+
+    async def page_rules(self, *, after: Optional[int] = None, before: Optional[int] = None,
+                         limit: int = DEFAULT_PAGE_SIZE, readonly: bool = False) -> Page[PricingRule] | Page[RuleRow]:
+        return await self.executor.run(self.sync.page_rules, after=after, before=before, limit=limit,
+                                       readonly=readonly)
+
+    async def set_active(self, *, actor_user_id: int, rule_id: int, active: bool) -> PricingRule:
+        return await self.executor.run(self.sync.set_active, actor_user_id=actor_user_id, rule_id=rule_id,
+                                       active=active)
+
+    async def quote(self, *, car: Car, start_date: date, end_date: date) -> Tuple[float, List[Tuple[int, float]], float, float]:
+        return await self.executor.run(self.sync.quote, car=car, start_date=start_date, end_date=end_date)
+
+    async def quote_many(self, cars: Sequence[Car], start_date: date, end_date: date) -> List[Tuple[float, List[Tuple[int, float]], float, float]]:
+        return await self.executor.run(self.sync.quote_many, cars, start_date, end_date)
+
+
+class AsyncBookingReviewService:
+    def __init__(self, sync: Optional[BookingReviewService] = None, executor: Optional[DbExecutor] = None):
+        self.sync = sync or BookingReviewService()
+        self.executor = executor or DbExecutor()
+
+    async def list_pending(self) -> List[Booking]:
+        return await self.executor.run(self.sync.list_pending)
+
+    async def pending_ids(self, *, car_id: Optional[int] = None) -> List[int]:
+        return await self.executor.run(self.sync.pending_ids, car_id=car_id)
+
+    async def approve(self, *, actor_user_id: int, booking_id: int) -> Booking:
+        return await self.executor.run(self.sync.approve, actor_user_id=actor_user_id, booking_id=booking_id)
+
+    async def reject(self, *, actor_user_id: int, booking_id: int) -> Booking:
+        return await self.executor.run(self.sync.reject, actor_user_id=actor_user_id, booking_id=booking_id)
+
+    async def approve_many(self, *, actor_user_id: int, booking_ids: Iterable[int]) -> List[Booking]:
+        return await self.executor.run(self.sync.approve_many, actor_user_id=actor_user_id,
+                                       booking_ids=list(booking_ids))
+
+    async def reject_many(self, *, actor_user_id: int, booking_ids: Iterable[int]) -> List[Booking]:
+        return await self.executor.run(self.sync.reject_many, actor_user_id=actor_user_id,
+                                       booking_ids=list(booking_ids))
+
+    async def availability_grid(self, year: int, month: int, car_ids: Iterable[int]) -> dict[int, str]:
+        return await self.executor.run(self.sync.availability_grid, year, month, list(car_ids))
+
+
+class AsyncAuditService:
+    def __init__(self, sync: Optional[AuditService] = None, executor: Optional[DbExecutor] = None):
+        self.sync = sync or AuditService()
+        self.executor = executor or DbExecutor()
+
+    async def write(self, *, actor_user_id: int, action: str, target_type: str, target_id: Optional[int] = None,
+                    detail: Optional[str] = None) -> AuditLog:
+        return await self.executor.run(self.sync.write, actor_user_id=actor_user_id, action=action,
+                                       target_type=target_type, target_id=target_id, detail=detail)
+
+    async def write_many(self, rows: List[dict]) -> int:
+        return await self.executor.run(self.sync.write_many, rows)
+
+    async def flush(self) -> None:
+        await self.executor.run(self.sync.flush)
+
+    async def list_logs(self, limit: int = 100, *, readonly: bool = False) -> List[AuditLog] | List[AuditRow]:
+        return await self.executor.run(self.sync.list_logs, limit, readonly=readonly)
+
+    async def page_logs(self, *, after: Optional[int] = None, before: Optional[int] = None,
+                        limit: int = DEFAULT_PAGE_SIZE, readonly: bool = False) -> Page[AuditLog] | Page[AuditRow]:
+        return await self.executor.run(self.sync.page_logs, after=after, before=before, limit=limit,
+                                       readonly=readonly)
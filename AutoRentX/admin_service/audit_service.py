@@ -1,22 +1,191 @@
 # admin_service/audit_service.py
 # -*- coding: utf-8 -*-
+"""
+Audit service
+
+Two write modes:
+- sync (default, used by tests): every write is a single-row INSERT, committed
+  before write() returns (group-committed under the balanced durability profile)
+- buffered: writes go to an in-memory queue; a background thread flushes
+  them with insert_many in batches (by size or by time), and on exit. A batch
+  that fails to insert is kept and retried with backoff, never dropped.
+  A write made inside a database transaction is not queued: it is written in
+  that transaction, so a rollback takes it back with the rest.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
 from typing import Optional, List
 from db.db_manager import DatabaseManager
 from db.models import AuditLog
+from db.group_commit import run_grouped
+from common.pagination import Page, keyset_page, DEFAULT_PAGE_SIZE
+from common.rows import AuditRow, select_rows
+
+AUDIT_SYNC = "sync"
+AUDIT_BUFFERED = "buffered"
+MAX_RETRY_DELAY = 30.0  # seconds between flush attempts while the database keeps failing
+
+log = logging.getLogger(__name__)
+
+
+class AuditBuffer:
+    """
+    Process-wide background audit writer (Singleton)
+    Rows are flushed when `batch_size` are queued or `flush_interval` seconds have passed.
+    """
+    _instance = None
+
+    def __new__(cls, batch_size: int = 200, flush_interval: float = 0.5):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._setup(batch_size, flush_interval)
+        return cls._instance
+
+    def _setup(self, batch_size: int, flush_interval: float) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[dict]" = queue.Queue()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._retry: List[dict] = []  # rows of failed batches, written before anything newer
+        self.failures = 0             # consecutive failed flushes
+        self.rows_written = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, row: dict) -> None:
+        self._queue.put(row)
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._retry)
+
+    def flush(self) -> int:
+        """
+        Write everything queued so far (callable from any thread); returns rows written.
+        Stops at the first failing batch, which is kept for the next flush.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                rows, self._retry = self._retry[:self.batch_size], self._retry[self.batch_size:]
+                while len(rows) < self.batch_size:
+                    try:
+                        rows.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not rows:
+                    return written
+                try:
+                    with DatabaseManager().connection() as db, db.atomic():
+                        AuditLog.insert_many(rows).execute()
+                except Exception as e:
+                    self._retry = rows + self._retry
+                    self.failures += 1
+                    log.warning("Audit flush failed (attempt %d), %d row(s) kept for retry: %s",
+                                self.failures, len(self._retry), e)
+                    return written
+                if self.failures:
+                    log.info("Audit flush recovered after %d failed attempt(s)", self.failures)
+                    self.failures = 0
+                written += len(rows)
+                self.rows_written += len(rows)
+                self.batches += 1
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            # back off while the database keeps failing
+            self._wakeup.wait(min(self.flush_interval * 2 ** self.failures, MAX_RETRY_DELAY))
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the writer thread and flush what is left (registered with atexit)"""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        if self._retry or not self._queue.empty():
+            lost = self._retry + [self._queue.get_nowait() for _ in range(self._queue.qsize())]
+            log.error("Audit buffer closed with %d unwritten row(s): %r", len(lost), lost)
+
 
 class AuditService:
-    def __init__(self):
-        db = DatabaseManager().db
-        db.create_tables([AuditLog])
+    # AUTORENTX_AUDIT_MODE=buffered|sync; main.py switches the CLI to buffered
+    default_mode = os.environ.get("AUTORENTX_AUDIT_MODE", AUDIT_SYNC)
+
+    def __init__(self, mode: Optional[str] = None):
+        self.mode = mode or self.default_mode
+        if self.mode not in (AUDIT_SYNC, AUDIT_BUFFERED):
+            raise ValueError(f"Unknown audit mode: {self.mode}")
+        self._buffer = AuditBuffer() if self.mode == AUDIT_BUFFERED else None
+
+    def _buffering(self) -> bool:
+        """Queue the write? Not inside a transaction: the row must commit or roll back with it"""
+        return self._buffer is not None and not DatabaseManager().db.in_transaction()
 
     def write(self, *, actor_user_id: int, action: str, target_type: str, target_id: Optional[int]=None, detail: Optional[str]=None) -> AuditLog:
-        return AuditLog.create(
-            actor_user_id=actor_user_id,
-            action=action,
-            target_type=target_type,
-            target_id=target_id,
-            detail=detail
-        )
-
-    def list_logs(self, limit: int = 100) -> List[AuditLog]:
+        if not self._buffering():
+            return run_grouped(lambda: AuditLog.create(
+                actor_user_id=actor_user_id,
+                action=action,
+                target_type=target_type,
+                target_id=target_id,
+                detail=detail
+            ))
+        row = dict(actor_user_id=actor_user_id, action=action, target_type=target_type,
+                   target_id=target_id, detail=detail, created_at=datetime.now())
+        self._buffer.put(row)
+        return AuditLog(**row)  # not saved yet: id is None until the buffer is flushed
+
+    def write_many(self, rows: List[dict]) -> int:
+        """
+        Several audit rows at once (dicts with write()'s keyword names).
+        sync: one multi-row INSERT; buffered: queued like write().
+        """
+        now = datetime.now()
+        rows = [{"target_id": None, "detail": None, "created_at": now, **r} for r in rows]
+        if not rows:
+            return 0
+        if not self._buffering():
+            run_grouped(lambda: AuditLog.insert_many(rows).execute())
+        else:
+            for row in rows:
+                self._buffer.put(row)
+        return len(rows)
+
+    def flush(self) -> None:
+        if self._buffer is not None:
+            self._buffer.flush()
+
+    def list_logs(self, limit: int = 100, *, readonly: bool = False) -> List[AuditLog] | List[AuditRow]:
+        """newest first; readonly=True returns AuditRow tuples"""
+        self.flush()  # read your own writes
+        if readonly:
+            return [AuditRow._make(r) for r in select_rows(AuditLog, AuditRow).order_by(AuditLog.id.desc()).limit(limit)]
         return list(AuditLog.select().order_by(AuditLog.id.desc()).limit(limit))
+
+    def page_logs(self, *, after: Optional[int] = None, before: Optional[int] = None,
+                  limit: int = DEFAULT_PAGE_SIZE, readonly: bool = False) -> Page[AuditLog] | Page[AuditRow]:
+        """newest first, one page at a time (see common.pagination)"""
+        self.flush()
+        if readonly:
+            return keyset_page(select_rows(AuditLog, AuditRow), AuditLog.id, after=after, before=before,
+                               limit=limit, row=AuditRow._make)
+        return keyset_page(AuditLog.select(), AuditLog.id, after=after, before=before, limit=limit)
+
+
+def flush_audit_buffer() -> None:
+    """Stop and drain the background writer if one was started"""
+    if AuditBuffer._instance is not None:
+        AuditBuffer._instance.close()
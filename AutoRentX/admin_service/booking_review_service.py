@@ -1,36 +1,46 @@
 # admin_service/booking_review_service.py
 # -*- coding: utf-8 -*-
-from typing import Any, List, Optional
-
-from pyparsing import cast
+from typing import Any, Iterable, List, Optional, cast
+from peewee import IntegrityError, fn
 from db.db_manager import DatabaseManager
-from db.models import Booking, Car, BOOKING_PENDING, BOOKING_CONFIRMED, BOOKING_CANCELLED, STATUS_AVAILABLE, STATUS_RESERVED
+from db.models import (Booking, Car, User, BOOKING_PENDING, BOOKING_CONFIRMED, BOOKING_CANCELLED,
+                       refresh_car_status, refresh_car_statuses, is_booking_overlap)
 from admin_service.audit_service import AuditService
+from common.availability_index import AvailabilityIndex
+from common.availability_calendar import AvailabilityCalendar
 from common.exceptions import NotFoundError, ConflictError
 
 class BookingReviewService:
     def __init__(self, audit: Optional[AuditService] = None):
-        DatabaseManager().db.create_tables([Booking])
         self.audit = audit or AuditService()
+        self.availability = AvailabilityIndex()
+        self.calendar = AvailabilityCalendar()
 
     def list_pending(self) -> List[Booking]:
-        return list(Booking.select(Booking).where(Booking.status == BOOKING_PENDING).order_by(Booking.id.desc()))
+        """Pending bookings with b.car (id/make/model) and b.user (id) pre-joined: one query"""
+        return list(Booking
+            .select(Booking, Car.id, Car.make, Car.model, User.id)
+            .join(Car).switch(Booking).join(User)
+            .where(Booking.status == BOOKING_PENDING)
+            .order_by(Booking.id.desc()))
 
     def _recompute_car_status(self, car: Car) -> None:
-        active_exists = (Booking
-            .select()
-            .where((Booking.car == car) &
-                   (Booking.status.in_([BOOKING_PENDING, BOOKING_CONFIRMED])))
-            .exists())
-        cast(Any, car).status = STATUS_RESERVED if active_exists else STATUS_AVAILABLE
-        car.save()
+        cast(Any, car).status = refresh_car_status(car.id)
+        self.calendar.set_car_status(car.id, car.status)
 
     def approve(self, *, actor_user_id: int, booking_id: int) -> Booking:
         b = Booking.get_or_none(Booking.id == booking_id)
         if not b: raise NotFoundError("Not found")
         if b.status != BOOKING_PENDING: raise ConflictError("Invalid status")
         b.status = BOOKING_CONFIRMED
-        b.save()
+        try:
+            b.save()
+        except IntegrityError as e:
+            if is_booking_overlap(e):
+                raise ConflictError("Overlaps a confirmed booking of this car") from e
+            raise
+        self.availability.record(b)
+        self.calendar.record(b)
         self._recompute_car_status(b.car)
         self.audit.write(actor_user_id=actor_user_id, action="approve_booking",
                          target_type="booking", target_id=b.id, detail=f"car#{b.car.id}")
@@ -42,7 +52,89 @@ class BookingReviewService:
         if b.status != BOOKING_PENDING: raise ConflictError("Invalid status")
         b.status = BOOKING_CANCELLED
         b.save()
+        self.availability.record(b)
+        self.calendar.record(b)
         self._recompute_car_status(b.car)
         self.audit.write(actor_user_id=actor_user_id, action="reject_booking",
                          target_type="booking", target_id=b.id, detail=f"car#{b.car.id}")
         return b
+
+    # ---------- batch review ----------
+    def pending_ids(self, *, car_id: Optional[int] = None) -> List[int]:
+        """ids of all pending bookings (optionally of one car), oldest first"""
+        q = Booking.select(Booking.id).where(Booking.status == BOOKING_PENDING)
+        if car_id is not None:
+            q = q.where(Booking.car == car_id)
+        return [bid for (bid,) in q.order_by(Booking.id).tuples()]
+
+    def approve_many(self, *, actor_user_id: int, booking_ids: Iterable[int]) -> List[Booking]:
+        """
+        Approve a batch, all or nothing: one SELECT validates every id, one UPDATE
+        confirms them, each affected car is recomputed once, one INSERT audits.
+        Raises ConflictError naming the ids that overlap a confirmed booking or
+        an earlier booking of the same batch.
+        """
+        return self._review_many(actor_user_id, booking_ids, BOOKING_CONFIRMED, "approve_booking")
+
+    def reject_many(self, *, actor_user_id: int, booking_ids: Iterable[int]) -> List[Booking]:
+        """Reject a batch, all or nothing (see approve_many)"""
+        return self._review_many(actor_user_id, booking_ids, BOOKING_CANCELLED, "reject_booking")
+
+    def _load_pending(self, ids: List[int]) -> List[Booking]:
+        rows = list(Booking.select().where(Booking.id.in_(ids)).order_by(Booking.id))
+        missing = sorted(set(ids) - {b.id for b in rows})
+        if missing:
+            raise NotFoundError("Not found: " + _fmt_ids(missing))
+        not_pending = [b.id for b in rows if b.status != BOOKING_PENDING]
+        if not_pending:
+            raise ConflictError("Invalid status: " + _fmt_ids(not_pending))
+        return rows
+
+    @staticmethod
+    def _overlapping(ids: List[int]) -> List[int]:
+        """Batch members that would trip the overlap trigger once the batch is confirmed"""
+        Other = Booking.alias()
+        clash = (Other.select(Other.id)
+                 .where((Other.car == Booking.car) & (Other.id != Booking.id) &
+                        (Other.start_date <= Booking.end_date) & (Other.end_date >= Booking.start_date) &
+                        ((Other.status == BOOKING_CONFIRMED) | (Other.id.in_(ids) & (Other.id < Booking.id)))))
+        return [bid for (bid,) in (Booking.select(Booking.id)
+                                   .where(Booking.id.in_(ids) & fn.EXISTS(clash))
+                                   .order_by(Booking.id).tuples())]
+
+    def _review_many(self, actor_user_id: int, booking_ids: Iterable[int], status: str, action: str) -> List[Booking]:
+        ids = sorted(set(booking_ids))
+        if not ids:
+            return []
+        with DatabaseManager().db.atomic():
+            rows = self._load_pending(ids)
+            if status == BOOKING_CONFIRMED:
+                clashes = self._overlapping(ids)
+                if clashes:
+                    raise ConflictError("Overlaps a confirmed booking of the same car: " + _fmt_ids(clashes))
+            try:
+                (Booking.update(status=status)
+                 .where(Booking.id.in_(ids) & (Booking.status == BOOKING_PENDING))
+                 .execute())
+            except IntegrityError as e:
+                if is_booking_overlap(e):  # a live hold, or another admin got there first
+                    raise ConflictError("Overlaps a confirmed booking or a live hold") from e
+                raise
+            statuses = refresh_car_statuses({b.car_id for b in rows})
+        for b in rows:
+            b.status = status
+            self.availability.record(b)
+            self.calendar.record(b)
+        for car_id, car_status in statuses.items():
+            self.calendar.set_car_status(car_id, car_status)
+        self.audit.write_many([dict(actor_user_id=actor_user_id, action=action, target_type="booking",
+                                    target_id=b.id, detail=f"car#{b.car_id}") for b in rows])
+        return rows
+
+    def availability_grid(self, year: int, month: int, car_ids: Iterable[int]) -> dict[int, str]:
+        """car_id -> one mark per day of the month (see AvailabilityCalendar.month_grid)"""
+        return self.calendar.month_grid(year, month, car_ids)
+
+
+def _fmt_ids(ids: Iterable[int]) -> str:
+    return ", ".join(f"#{i}" for i in ids)
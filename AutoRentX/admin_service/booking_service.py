@@ -5,13 +5,16 @@ Service layer for bookings (strict validation & conflict check)
 """
 
 from datetime import datetime
-from typing import List
-from db.db_manager import DatabaseManager
+from typing import List, Optional
+from peewee import IntegrityError
 from db.models import (
     Booking, Car, User,
-    BOOKING_CONFIRMED
+    BOOKING_CONFIRMED, is_booking_overlap
 )
 from common.validators import Validator
+from common.availability_index import AvailabilityIndex
+from common.availability_calendar import AvailabilityCalendar
+from common.pagination import Page, keyset_page, DEFAULT_PAGE_SIZE
 from common.exceptions import (
     ValidationError, NotFoundError, ConflictError, DatabaseError
 )
@@ -23,9 +26,8 @@ class BookingService:
     """Booking service"""
 
     def __init__(self) -> None:
-        # 幂等建表 / create table if not exists
-        db = DatabaseManager().db
-        db.create_tables([Booking])
+        self.availability = AvailabilityIndex()
+        self.calendar = AvailabilityCalendar()
 
     # ---------- helpers ----------
     @staticmethod
@@ -70,13 +72,7 @@ class BookingService:
 
         # Conflict check: interval [S, E] overlaps with existing confirmed booking
         # (start1 <= end2) and (end1 >= start2) means overlap between [start1, end1] and [start2, end2]
-        conflict_exists = Booking.select().where(
-            (Booking.car == car) &
-            (Booking.status == BOOKING_CONFIRMED) &
-            (Booking.start_date <= end_date) &
-            (Booking.end_date >= start_date)
-        ).exists()
-        if conflict_exists:
+        if self.availability.has_overlap(car.id, start_date, end_date, (BOOKING_CONFIRMED,)):
             raise ConflictError("The car is already booked for this period")
 
         # create
@@ -87,13 +83,33 @@ class BookingService:
                 start_date=start_date,
                 end_date=end_date
             )
+            self.availability.record(booking)
+            self.calendar.record(booking)
             return booking
+        except IntegrityError as e:
+            if is_booking_overlap(e):
+                # booked by another process since our cached check
+                self.availability.invalidate()
+                self.calendar.invalidate()
+                raise ConflictError("The car is already booked for this period") from e
+            raise DatabaseError(f"Create booking failed: {e}") from e
         except Exception as e:
             raise DatabaseError(f"Create booking failed: {e}") from e
 
+    @staticmethod
+    def _listing_query():
+        return (Booking
+            .select(Booking, Car.id, Car.make, Car.model, User.id, User.name)
+            .join(Car).switch(Booking).join(User))
+
     def list_bookings(self) -> List[Booking]:
-        """latest first"""
-        return list(Booking.select().order_by(Booking.id.desc()))
+        """latest first; b.car and b.user are pre-joined (one query)"""
+        return list(self._listing_query().order_by(Booking.id.desc()))
+
+    def page_bookings(self, *, after: Optional[int] = None, before: Optional[int] = None,
+                      limit: int = DEFAULT_PAGE_SIZE) -> Page[Booking]:
+        """like list_bookings, one page at a time (see common.pagination)"""
+        return keyset_page(self._listing_query(), Booking.id, after=after, before=before, limit=limit)
 
     def cancel_booking(self, booking_id: int) -> Booking:
         """Only confirmed bookings can be cancelled"""
@@ -105,6 +121,8 @@ class BookingService:
         try:
             booking.status = "cancelled"
             booking.save()
+            self.availability.record(booking)
+            self.calendar.record(booking)
             return booking
         except Exception as e:
             raise DatabaseError(f"Cancel booking failed: {e}") from e
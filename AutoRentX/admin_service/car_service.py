@@ -4,19 +4,18 @@
 Car service (admin)
 Strict validation + unified exceptions
 """
-from turtle import st
 from typing import Optional
 from peewee import IntegrityError, DoesNotExist
-from db.db_manager import DatabaseManager
 from admin_service.audit_service import AuditService
-from db.models import Car, Payment
+from db.models import Car
 from common.validators import Validator
 from common.exceptions import NotFoundError, ConflictError, DatabaseError
+from common.pagination import Page, keyset_page, DEFAULT_PAGE_SIZE
+from common.rows import CarRow, select_rows
 
 class PeeweeCarService:
     """Car service"""
     def __init__(self, audit: AuditService | None = None):
-        DatabaseManager().db.create_tables([Payment])
         self.audit = audit or AuditService()
 
     def create_car(self, *, make: str, model: str, year: int, kilometre: int,
@@ -41,6 +40,7 @@ class PeeweeCarService:
                 max_days=max_days,
                 status=status,
             )
+            self._sync_calendar(car)
             # No print in service layer; return entity or ID
             return car
         except IntegrityError as ie:
@@ -49,15 +49,32 @@ class PeeweeCarService:
         except Exception as e:
             raise DatabaseError(f"Create car failed: {e}") from e
 
+    @staticmethod
+    def _sync_calendar(car: Car) -> None:
+        # imported here: the calendar pulls in NumPy, which the startup path does not need
+        from common.availability_calendar import AvailabilityCalendar
+        AvailabilityCalendar().set_car_status(car.id, car.status)
+
     def get_car(self, car_id: int) -> Optional[Car]:
         try:
             return Car.get(Car.id == car_id)
         except DoesNotExist:
             return None
 
-    def list_cars(self) -> list[Car]:
+    def list_cars(self, *, readonly: bool = False) -> list[Car] | list[CarRow]:
+        """newest first; readonly=True returns CarRow tuples (display columns only)"""
+        if readonly:
+            return [CarRow._make(r) for r in select_rows(Car, CarRow).order_by(Car.id.desc())]
         return list(Car.select().order_by(Car.id.desc()))
 
+    def page_cars(self, *, after: Optional[int] = None, before: Optional[int] = None,
+                  limit: int = DEFAULT_PAGE_SIZE, readonly: bool = False) -> Page[Car] | Page[CarRow]:
+        """newest first, one page at a time (see common.pagination)"""
+        if readonly:
+            return keyset_page(select_rows(Car, CarRow), Car.id, after=after, before=before, limit=limit,
+                               row=CarRow._make)
+        return keyset_page(Car.select(), Car.id, after=after, before=before, limit=limit)
+
     def update_car(self, car_id: int,*, actor_user_id: int, **fields) -> Car:
         # get the object first
         car = self.get_car(car_id)
@@ -86,9 +103,24 @@ class PeeweeCarService:
 
         try:
             car.save()
-            self.audit.write(actor_user_id=actor_user_id, action="update_car", target_type="car", target_id=car_id, detail=f"status={st}")
+            self._sync_calendar(car)
+            self.audit.write(actor_user_id=actor_user_id, action="update_car", target_type="car", target_id=car_id, detail=f"status={car.status}")
             return car
         except IntegrityError as ie:
             raise ConflictError(f"Update car failed: {ie}") from ie
         except Exception as e:
             raise DatabaseError(f"Update car failed: {e}") from e
+
+    # ---------- consistency ----------
+    def check_booking_counters(self) -> list:
+        """Cars whose trigger-maintained active_bookings drifted (see db.consistency)"""
+        from db.consistency import active_booking_drift
+        return active_booking_drift()
+
+    def repair_booking_counters(self, *, actor_user_id: int) -> int:
+        from db.consistency import repair_active_bookings
+        fixed = repair_active_bookings()
+        if fixed:
+            self.audit.write(actor_user_id=actor_user_id, action="repair_car_counters",
+                             target_type="car", detail=f"{fixed} car(s) recounted")
+        return fixed
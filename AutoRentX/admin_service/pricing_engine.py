@@ -0,0 +1,112 @@
+# admin_service/pricing_engine.py
+# -*- coding: utf-8 -*-
+"""
+In-memory pricing rule engine
+
+Active PricingRules are loaded once and compiled into plain tuples, indexed
+by scope (global / per car id) and sorted by min_days, so finding the rules
+that apply to a quote is a bisect plus a validity-window check, with no SQL.
+
+The cache is tagged with the DataVersion counter, which the pricingrule
+triggers bump on every rule write from any process: each lookup reads it (one
+prepared statement, no ORM) and reloads the rules when it has moved.
+`invalidate()` forces the next lookup to reload.
+"""
+
+from bisect import bisect_right
+from datetime import date
+from threading import Lock
+from typing import NamedTuple, Optional
+
+from db.hot_queries import HotQueries
+from db.models import PricingRule
+
+
+class CompiledRule(NamedTuple):
+    id: int
+    rule_type: str
+    amount_type: str
+    amount_value: float
+    min_days: int
+    start: Optional[int]   # date ordinal or None (open)
+    end: Optional[int]
+
+
+class _RuleBucket:
+    """Rules of one scope, sorted by min_days"""
+    __slots__ = ("min_days", "rules")
+
+    def __init__(self, rules: list[CompiledRule]):
+        self.rules = sorted(rules, key=lambda r: (r.min_days, r.id))
+        self.min_days = [r.min_days for r in self.rules]
+
+    def applicable(self, start: int, end: int, days: int):
+        for r in self.rules[:bisect_right(self.min_days, days)]:
+            if (r.start is None or r.start <= start) and (r.end is None or r.end >= end):
+                yield r
+
+
+class PricingRuleEngine:
+    """Singleton rule cache shared by every PricingService in the process"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = Lock()
+            cls._instance._loaded_version = -1  # DataVersion the rules were loaded at
+            cls._instance._global = _RuleBucket([])
+            cls._instance._by_car: dict[int, _RuleBucket] = {}
+        return cls._instance
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_version = -1
+
+    def _reload(self) -> None:
+        rows = (PricingRule
+                .select(PricingRule.id, PricingRule.rule_type, PricingRule.amount_type, PricingRule.amount_value,
+                        PricingRule.min_days, PricingRule.start_date, PricingRule.end_date,
+                        PricingRule.scope, PricingRule.car)
+                .where(PricingRule.is_active == True)
+                .tuples())
+        global_rules: list[CompiledRule] = []
+        car_rules: dict[int, list[CompiledRule]] = {}
+        for rid, rtype, atype, value, min_days, s, e, scope, car_id in rows:
+            rule = CompiledRule(rid, rtype, atype, float(value), min_days,
+                                s.toordinal() if s else None, e.toordinal() if e else None)
+            if scope == "global":
+                global_rules.append(rule)
+            elif scope == "car" and car_id is not None:
+                car_rules.setdefault(car_id, []).append(rule)
+        self._global = _RuleBucket(global_rules)
+        self._by_car = {cid: _RuleBucket(rules) for cid, rules in car_rules.items()}
+
+    def _ensure_current(self) -> None:
+        version = HotQueries().data_version()  # before the rules: a change landing in between reloads again
+        if self._loaded_version != version:
+            self._reload()
+            self._loaded_version = version
+
+    def applicable_rules(self, car_id: int, start_date: date, end_date: date, days: int) -> list[CompiledRule]:
+        with self._lock:
+            self._ensure_current()
+            s, e = start_date.toordinal(), end_date.toordinal()
+            rules = list(self._global.applicable(s, e, days))
+            bucket = self._by_car.get(car_id)
+            if bucket:
+                rules.extend(bucket.applicable(s, e, days))
+            return rules
+
+    def applicable_by_scope(self, start_date: date, end_date: date,
+                            days: int) -> tuple[list[CompiledRule], dict[int, list[CompiledRule]]]:
+        """(global rules, {car_id: car rules}) applicable to a period, for batch quoting"""
+        with self._lock:
+            self._ensure_current()
+            s, e = start_date.toordinal(), end_date.toordinal()
+            per_car = {}
+            for car_id, bucket in self._by_car.items():
+                rules = list(bucket.applicable(s, e, days))
+                if rules:
+                    per_car[car_id] = rules
+            return list(self._global.applicable(s, e, days)), per_car
@@ -1,20 +1,26 @@
 # admin_service/pricing_service.py
 # -*- coding: utf-8 -*-
 from datetime import datetime
-from typing import List, Optional, Tuple, cast
-from db.db_manager import DatabaseManager
+from peewee import JOIN
+from typing import List, Optional, Sequence, Tuple, cast
 from db.models import PricingRule, Car, PRULE_DISCOUNT, PRULE_SURCHARGE, AMOUNT_PERCENT, AMOUNT_FIXED, STATUS_AVAILABLE
 from common.validators import Validator
 from common.exceptions import ValidationError, NotFoundError, DatabaseError
+from common.pagination import Page, keyset_page, DEFAULT_PAGE_SIZE
+from common.rows import RuleRow, select_rows
 from admin_service.audit_service import AuditService
+from admin_service.pricing_engine import PricingRuleEngine
+from db.hot_queries import HotQueries
 
 DATE_FMT = "%d-%m-%Y"
 
 class PricingService:
-    def __init__(self, audit: Optional[AuditService] = None):
-        db = DatabaseManager().db
-        db.create_tables([PricingRule])
+    def __init__(self, audit: Optional[AuditService] = None, cached: bool = True, hot: Optional[HotQueries] = None):
+        """cached=False queries PricingRule on every quote (e.g. when another process edits rules)"""
         self.audit = audit or AuditService()
+        self.cached = cached
+        self.hot = hot or HotQueries()
+        self.engine = PricingRuleEngine()
 
     @staticmethod
     def _parse_date_or_none(s: Optional[str]):
@@ -62,6 +68,7 @@ class PricingService:
                 end_date=end_date,
                 is_active=True
             )
+            self.engine.invalidate()
             self.audit.write(actor_user_id=actor_user_id, action="create_pricing_rule",
                              target_type="pricing_rule", target_id=rule.id,
                              detail=f"{rule_type} {amount_type} {amount_value} scope={scope} min_days={min_days}")
@@ -69,8 +76,25 @@ class PricingService:
         except Exception as e:
             raise DatabaseError(f"Failed to create pricing rule: {e}") from e
 
-    def list_rules(self) -> List[PricingRule]:
-        return list(PricingRule.select().order_by(PricingRule.id.desc()))
+    @staticmethod
+    def _listing_query():
+        return (PricingRule
+            .select(PricingRule, Car.id, Car.make, Car.model)
+            .join(Car, JOIN.LEFT_OUTER))
+
+    def list_rules(self, *, readonly: bool = False) -> List[PricingRule] | List[RuleRow]:
+        """r.car is pre-joined (None for global rules): one query; readonly=True returns RuleRow tuples"""
+        if readonly:
+            return [RuleRow._make(r) for r in select_rows(PricingRule, RuleRow).order_by(PricingRule.id.desc())]
+        return list(self._listing_query().order_by(PricingRule.id.desc()))
+
+    def page_rules(self, *, after: Optional[int] = None, before: Optional[int] = None,
+                   limit: int = DEFAULT_PAGE_SIZE, readonly: bool = False) -> Page[PricingRule] | Page[RuleRow]:
+        """like list_rules, one page at a time (see common.pagination)"""
+        if readonly:
+            return keyset_page(select_rows(PricingRule, RuleRow), PricingRule.id, after=after, before=before,
+                               limit=limit, row=RuleRow._make)
+        return keyset_page(self._listing_query(), PricingRule.id, after=after, before=before, limit=limit)
 
     def set_active(self, *, actor_user_id: int, rule_id: int, active: bool) -> PricingRule:
         rule = PricingRule.get_or_none(PricingRule.id == rule_id)
@@ -78,6 +102,7 @@ class PricingService:
             raise NotFoundError("Rule not found")
         rule.is_active = active
         rule.save()
+        self.engine.invalidate()
         self.audit.write(actor_user_id=actor_user_id, action="update_pricing_rule",
                          target_type="pricing_rule", target_id=rule.id,
                          detail=f"set_active={active}")
@@ -89,16 +114,11 @@ class PricingService:
         daily_rate: float = cast(float, car.daily_rate)
         base_cost = daily_rate * days
 
-        # 1) Filter applicable rules
-        q = (PricingRule
-            .select()
-            .where(
-                (PricingRule.is_active == True) &
-                ((PricingRule.scope == "global") | ((PricingRule.scope == "car"))) &
-                ((PricingRule.start_date.is_null(True)) | (PricingRule.start_date <= start_date)) &
-                ((PricingRule.end_date.is_null(True))   | (PricingRule.end_date >= end_date)) &
-                (PricingRule.min_days <= days)
-            ))
+        # 1) Filter applicable rules (compiled cache, or one query when cached=False)
+        if self.cached:
+            q = self.engine.applicable_rules(car.id, start_date, end_date, days)
+        else:
+            q = self.hot.applicable_rules(car.id, start_date, end_date, days)
 
         # 2) Calculate delta for each rule, but do not stack; only pick 1 "main rule"
         best_discount: tuple[int, float] | None = None  # (rule_id, delta<0)
@@ -113,12 +133,12 @@ class PricingService:
 
             delta = -abs(raw) if rule.rule_type == PRULE_DISCOUNT else abs(raw)
 
-            # Record the "strongest" discount/surcharge
+            # Record the "strongest" discount/surcharge (ties: lowest rule id, whatever the iteration order)
             if rule.rule_type == PRULE_DISCOUNT:
-                if (best_discount is None) or (delta < best_discount[1]):  # more negative => bigger discount
+                if (best_discount is None) or (delta, rule.id) < (best_discount[1], best_discount[0]):  # more negative => bigger discount
                     best_discount = (rule.id, delta)
             else:  # surcharge
-                if (best_surcharge is None) or (delta > best_surcharge[1]):  # more positive => bigger surcharge
+                if (best_surcharge is None) or (-delta, rule.id) < (-best_surcharge[1], best_surcharge[0]):  # more positive => bigger surcharge
                     best_surcharge = (rule.id, delta)
 
         # 3) Pick the "main rule": prefer discount if any; else use surcharge; else no adjustment
@@ -130,3 +150,69 @@ class PricingService:
 
         grand_total = base_cost + (chosen[0][1] if chosen else 0.0)
         return base_cost, chosen, grand_total, daily_rate
+
+    # Batch quote: same result as quote() for every car, computed in one vectorized pass
+    def quote_many(self, cars: Sequence[Car], start_date, end_date) -> List[Tuple[float, List[Tuple[int, float]], float, float]]:
+        """
+        Price many cars for one period with NumPy.
+        Returns one (base_cost, adjustments, grand_total, daily_rate) per car, in input order,
+        using the same "best discount, else best surcharge" selection (ties: lowest rule id).
+        """
+        if not self.cached or not cars:
+            return [self.quote(car=c, start_date=start_date, end_date=end_date) for c in cars]
+        import numpy as np  # only needed once a customer searches; keeps CLI startup light
+
+        days = (end_date - start_date).days + 1
+        n = len(cars)
+        rates = np.fromiter((float(c.daily_rate) for c in cars), dtype=np.float64, count=n)
+        base = rates * days
+        global_rules, per_car = self.engine.applicable_by_scope(start_date, end_date, days)
+        position = {int(c.id): i for i, c in enumerate(cars)}
+
+        def best_of(rule_type: str):
+            # key = -|raw| for both kinds: the smallest key is the most negative discount
+            # or the most positive surcharge; returns (key, rule_id) per car, rule_id -1 = none
+            best_key = np.full(n, np.inf)
+            best_id = np.full(n, -1, dtype=np.int64)
+            rules = sorted((r for r in global_rules if r.rule_type == rule_type), key=lambda r: r.id)
+            if rules:
+                keys = np.empty((len(rules), n))
+                for k, r in enumerate(rules):
+                    raw = base * (r.amount_value / 100.0) if r.amount_type == AMOUNT_PERCENT else np.full(n, r.amount_value)
+                    keys[k] = -np.abs(raw)
+                first = keys.argmin(axis=0)  # first minimum = lowest id among equal keys
+                best_key = keys[first, np.arange(n)]
+                best_id = np.array([r.id for r in rules], dtype=np.int64)[first]
+
+            cand = [(position[cid], r) for cid, rs in per_car.items() if cid in position
+                    for r in rs if r.rule_type == rule_type]
+            if cand:
+                ci = np.array([i for i, _ in cand], dtype=np.int64)
+                rid = np.array([r.id for _, r in cand], dtype=np.int64)
+                value = np.array([r.amount_value for _, r in cand])
+                pct = np.array([r.amount_type == AMOUNT_PERCENT for _, r in cand])
+                key = -np.abs(np.where(pct, base[ci] * (value / 100.0), value))
+                order = np.lexsort((rid, key, ci))      # per car: smallest key, then lowest id
+                ci, rid, key = ci[order], rid[order], key[order]
+                _, first = np.unique(ci, return_index=True)
+                ci, rid, key = ci[first], rid[first], key[first]
+                better = (key < best_key[ci]) | ((key == best_key[ci]) & (rid < best_id[ci]))
+                best_key[ci[better]] = key[better]
+                best_id[ci[better]] = rid[better]
+            return best_key, best_id
+
+        disc_key, disc_id = best_of(PRULE_DISCOUNT)
+        sur_key, sur_id = best_of(PRULE_SURCHARGE)
+
+        results = []
+        for i in range(n):
+            base_cost = float(base[i])
+            if disc_id[i] >= 0:
+                chosen = [(int(disc_id[i]), float(disc_key[i]))]
+            elif sur_id[i] >= 0:
+                chosen = [(int(sur_id[i]), float(-sur_key[i]))]
+            else:
+                chosen = []
+            grand_total = base_cost + (chosen[0][1] if chosen else 0.0)
+            results.append((base_cost, chosen, grand_total, float(rates[i])))
+        return results
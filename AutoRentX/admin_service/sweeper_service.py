@@ -0,0 +1,124 @@
+# admin_service/sweeper_service.py
+# -*- coding: utf-8 -*-
+"""
+Booking sweeper (batch job)
+
+One transaction of set-based UPDATEs, no per-row Python:
+1) confirmed bookings whose end_date has passed -> completed
+2) unpaid pending bookings whose start_date has passed (never reviewed in time) -> cancelled;
+   paid ones (a Payment with ok) are left for the reviewer, who can approve or reject them
+3) reserved cars whose active-booking counter dropped to 0 -> available
+4) expired reservation holds are deleted, and the ChangeLog is pruned
+
+The per-row counter, data-version and changelog triggers on booking are
+suspended for the transaction (db.migrations.suspended_triggers): on a million
+bookings they cost two car UPDATEs, one dataversion UPDATE and one changelog
+INSERT per row. Instead car.active_bookings is recounted once per car touched
+by 1) and 2), before 3) reads the counters; after 3) the data version moves
+once and a single ChangeLog entry tells other processes to reload their
+availability views.
+
+Run headless:  python -m admin_service.sweeper_service [dd-mm-yyyy]
+"""
+
+import time
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+
+from db.db_manager import DatabaseManager
+from peewee import fn
+
+from db.changelog import prune
+from db.migrations import BUMP_DATA_VERSION_SQL, LOG_BULK_BOOKING_CHANGE_SQL, suspended_triggers
+from db.models import (
+    Booking, Car, Payment, ReservationHold,
+    BOOKING_PENDING, BOOKING_CONFIRMED, BOOKING_CANCELLED, BOOKING_COMPLETED,
+    STATUS_AVAILABLE, STATUS_RESERVED,
+)
+from admin_service.audit_service import AuditService
+from common.availability_index import AvailabilityIndex
+from common.exceptions import DatabaseError
+
+
+# the work these do row by row, sweep() does once per statement
+BULK_SUSPENDED_TRIGGERS = ["booking_count_update", "booking_version_update", "car_version_update",
+                           "booking_changelog_update"]
+_ACTIVE = (BOOKING_PENDING, BOOKING_CONFIRMED)
+
+
+class SweepResult(NamedTuple):
+    completed: int       # confirmed -> completed
+    expired: int         # pending -> cancelled
+    cars_freed: int      # reserved -> available
+    holds_removed: int
+    seconds: float
+
+
+class SweeperService:
+    def __init__(self, audit: Optional[AuditService] = None):
+        self.audit = audit or AuditService()
+
+    def sweep(self, *, actor_user_id: int = 0, today: Optional[date] = None) -> SweepResult:
+        today = today or date.today()
+        t0 = time.perf_counter()
+        db = DatabaseManager().db
+        try:
+            with db.atomic(), suspended_triggers(db, BULK_SUSPENDED_TRIGGERS):
+                done = (Booking.status == BOOKING_CONFIRMED) & (Booking.end_date < today)
+                paid = fn.EXISTS(Payment.select(Payment.id)
+                                 .where((Payment.booking == Booking.id) & (Payment.ok == True)))
+                stale = (Booking.status == BOOKING_PENDING) & (Booking.start_date < today) & ~paid
+                db.execute_sql("DROP TABLE IF EXISTS temp.sweep_car")
+                db.execute_sql("CREATE TEMP TABLE sweep_car (id INTEGER PRIMARY KEY)")
+                cars_sql, params = Booking.select(Booking.car).distinct().where(done | stale).sql()
+                db.execute_sql(f"INSERT INTO temp.sweep_car {cars_sql}", params)
+                completed = Booking.update(status=BOOKING_COMPLETED).where(done).execute()
+                expired = Booking.update(status=BOOKING_CANCELLED).where(stale).execute()
+                db.execute_sql(
+                    "UPDATE car SET active_bookings = (SELECT COUNT(*) FROM booking b "
+                    "WHERE b.car_id = car.id AND b.status IN (?, ?)) "
+                    "WHERE id IN (SELECT id FROM temp.sweep_car)", _ACTIVE)
+                db.execute_sql("DROP TABLE temp.sweep_car")
+                cars_freed = (Car
+                    .update(status=STATUS_AVAILABLE)
+                    .where((Car.status == STATUS_RESERVED) & (Car.active_bookings == 0))
+                    .execute())
+                if completed or expired or cars_freed:
+                    db.execute_sql(BUMP_DATA_VERSION_SQL)
+                if completed or expired:
+                    db.execute_sql(LOG_BULK_BOOKING_CHANGE_SQL)
+                holds_removed = (ReservationHold
+                    .delete()
+                    .where(ReservationHold.expires_at <= time.time())
+                    .execute())
+                prune()
+        except Exception as e:
+            raise DatabaseError(f"Sweep failed: {e}") from e
+
+        if completed or expired or cars_freed:
+            self._drop_caches()
+        result = SweepResult(completed, expired, cars_freed, holds_removed, time.perf_counter() - t0)
+        self.audit.write(actor_user_id=actor_user_id, action="sweep_bookings", target_type="booking",
+                         detail=f"completed={completed} expired={expired} cars_freed={cars_freed} "
+                                f"holds_removed={holds_removed} as_of={today.isoformat()}")
+        return result
+
+    @staticmethod
+    def _drop_caches() -> None:
+        # bulk changes bypass record(); let the in-memory views reload on next use
+        AvailabilityIndex().invalidate()
+        from common.availability_calendar import AvailabilityCalendar  # imported here: pulls in NumPy
+        AvailabilityCalendar().invalidate()
+
+
+def format_result(r: SweepResult) -> str:
+    return (f"✓ Completed {r.completed}, expired {r.expired} pending, freed {r.cars_freed} car(s), "
+            f"removed {r.holds_removed} hold(s) in {r.seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    import sys
+    from db.models import create_all_tables
+    create_all_tables()
+    as_of = datetime.strptime(sys.argv[1], "%d-%m-%Y").date() if len(sys.argv) > 1 else None
+    print(format_result(SweeperService().sweep(today=as_of)))
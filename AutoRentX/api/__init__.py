@@ -0,0 +1,6 @@
+# api/__init__.py
+# -*- coding: utf-8 -*-
+"""JSON HTTP API (Flask); see api/app.py for the routes and serve_api.py to run it"""
+from .app import create_app, STATUS_FOR
+
+__all__ = ["create_app", "STATUS_FOR"]
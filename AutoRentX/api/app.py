@@ -0,0 +1,291 @@
+# api/app.py
+# -*- coding: utf-8 -*-
+"""
+JSON HTTP API over the service classes (Flask)
+
+    POST /api/login                            {email, password} -> {token, user_id, role}
+    GET  /api/cars?start=&end=[&make=&max_rate=]  available cars with their total for the period
+    GET  /api/cars/<id>/quote?start=&end=      price breakdown
+    POST /api/orders                           {car_id, start, end, pay_method, pay_kwargs} -> 201 booking
+    GET  /api/me/bookings                      my current bookings
+    GET  /api/admin/bookings/pending           (admin) bookings waiting for review
+    POST /api/admin/bookings/<id>/approve      (admin)
+    POST /api/admin/bookings/<id>/reject       (admin)
+    GET  /api/admin/audit?after=&before=&limit=  (admin) audit log, newest first, keyset pages
+    GET  /api/admin/cars?after=&before=&limit=   (admin) car listing, newest first, keyset pages
+    GET  /api/admin/cache                      (admin) response cache statistics
+
+Dates in query strings / bodies use the CLI format (dd-mm-YYYY); responses use ISO dates.
+Requests after login carry `Authorization: Bearer <token>` (signed, expires after TOKEN_MAX_AGE).
+The token only names the user: every request reloads the user's role and
+is_active, so a deactivated or demoted account loses access at once. Tokens
+are signed with AUTORENTX_API_SECRET (serve_api.py refuses to start without
+it); without one, create_app() signs with a random per-process key and logs a
+warning.
+
+Every request checks a connection out when it starts and gives it back when
+it ends (a pool check-out in pooled mode), so the app is safe under a threaded
+server: the services keep no per-request state, and the in-memory caches they
+share are locked. AppError subclasses map to status codes in STATUS_FOR;
+anything else is a 500 with a generic message.
+
+Car search and the car listing are served from a ResponseCache
+(api/response_cache.py) with ETags; If-None-Match gets a 304. X-Cache says
+HIT or MISS.
+
+Run it with serve_api.py.
+"""
+
+import os
+import secrets
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import Flask, Response, g, jsonify, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from werkzeug.exceptions import HTTPException
+
+from auth_service import verify_password
+from db.db_manager import DatabaseManager
+from db.hot_queries import HotQueries
+from db.models import Booking, User
+from admin_service.audit_service import AuditService
+from admin_service.booking_review_service import BookingReviewService
+from admin_service.car_service import PeeweeCarService
+from common.exceptions import (AppError, AppPermissionError, AuthenticationError, ConflictError, DatabaseError,
+                               NotFoundError, ValidationError)
+from common.pagination import DEFAULT_PAGE_SIZE
+from customer_service.rent_service import RentService
+from api.response_cache import ResponseCache
+
+TOKEN_MAX_AGE = 8 * 3600  # seconds
+
+STATUS_FOR: dict[type[AppError], int] = {
+    ValidationError: 400,
+    AppPermissionError: 403,
+    NotFoundError: 404,
+    ConflictError: 409,
+    DatabaseError: 503,
+    AuthenticationError: 401,
+}
+
+
+def status_for(error: AppError) -> int:
+    """most specific match in STATUS_FOR (subclasses inherit their parent's code); 400 otherwise"""
+    for cls in type(error).__mro__:
+        if cls in STATUS_FOR:
+            return STATUS_FOR[cls]
+    return 400
+
+
+# ---------- JSON shapes ----------
+def booking_json(b: Booking) -> dict:
+    return {
+        "id": b.id, "car_id": b.car_id, "user_id": b.user_id, "status": b.status,
+        "start_date": b.start_date.isoformat(), "end_date": b.end_date.isoformat(), "days": b.days,
+        "base_cost": b.base_cost, "adj_total": b.adj_total, "grand_total": b.grand_total,
+    }
+
+
+def _joined_car(b: Booking) -> dict:
+    """b.car as pre-joined by list_my_bookings / list_pending (id, make, model)"""
+    return {"id": b.car.id, "make": b.car.make, "model": b.car.model}
+
+
+def create_app(*, rent: Optional[RentService] = None, review: Optional[BookingReviewService] = None,
+               audit: Optional[AuditService] = None, cars: Optional[PeeweeCarService] = None,
+               cache: Optional[ResponseCache] = None, secret: Optional[str] = None) -> Flask:
+    app = Flask(__name__)
+    app.json.sort_keys = False
+    audit = audit or AuditService()
+    rent = rent or RentService(audit=audit)
+    review = review or BookingReviewService(audit=audit)
+    cars = cars or PeeweeCarService()
+    cache = app.extensions["response_cache"] = cache or ResponseCache()
+    hot = HotQueries()
+    secret = secret or os.environ.get("AUTORENTX_API_SECRET")
+    if not secret:
+        app.logger.warning("AUTORENTX_API_SECRET is not set: tokens are signed with a random key and "
+                           "stop working when this process exits (and in other worker processes)")
+        secret = secrets.token_hex(32)
+    tokens = URLSafeTimedSerializer(secret, salt="autorentx-api")
+    db = DatabaseManager().db
+
+    # ---------- per-request connection ----------
+    @app.before_request
+    def _open_connection():
+        db.connect(reuse_if_open=True)
+
+    @app.teardown_request
+    def _close_connection(exc):
+        if not db.is_closed():
+            db.close()
+
+    # ---------- errors ----------
+    @app.errorhandler(AppError)
+    def _app_error(e: AppError):
+        return jsonify(error=type(e).__name__, message=str(e)), status_for(e)
+
+    @app.errorhandler(HTTPException)
+    def _http_error(e: HTTPException):
+        return jsonify(error=e.name, message=e.description), e.code
+
+    @app.errorhandler(Exception)
+    def _unexpected(e: Exception):
+        app.logger.exception("Unhandled error")
+        return jsonify(error="InternalServerError", message="Internal server error"), 500
+
+    # ---------- auth ----------
+    def login_required(role: Optional[str] = None) -> Callable:
+        def decorate(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                header = request.headers.get("Authorization", "")
+                if not header.startswith("Bearer "):
+                    raise AuthenticationError("Login required")
+                try:
+                    g.user_id, _ = tokens.loads(header[7:], max_age=TOKEN_MAX_AGE)
+                except BadSignature as e:  # also SignatureExpired
+                    raise AuthenticationError("Invalid or expired token") from e
+                current = hot.user_auth(g.user_id)  # the role in the token may be stale
+                if current is None or not current[1]:
+                    raise AuthenticationError("Account disabled or removed")
+                g.role = current[0]
+                if role and g.role != role:
+                    raise AppPermissionError("Permission denied")
+                return view(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def body() -> dict:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            raise ValidationError("Expected a JSON object body")
+        return data
+
+    def arg(name: str, source: Optional[dict] = None, type_: type = str):
+        value = (source if source is not None else request.args).get(name)
+        if value is None or value == "":
+            raise ValidationError(f"Missing parameter: {name}")
+        try:
+            return type_(value)
+        except (TypeError, ValueError) as e:
+            raise ValidationError(f"Invalid parameter: {name}") from e
+
+    def optional_int(name: str) -> Optional[int]:
+        return arg(name, type_=int) if request.args.get(name) else None
+
+    def cached_json(key: tuple, build: Callable[[], dict]) -> Response:
+        """
+        build()'s JSON through the response cache. The data version is read before
+        building, so a body is never tagged with a version newer than its data.
+        """
+        version = hot.data_version()
+        entry = cache.get(key, version)
+        hit = entry is not None
+        if not hit:
+            entry = cache.put(key, version, app.json.dumps(build()).encode())
+        if request.if_none_match.contains(entry.etag):
+            cache.record_not_modified()
+            resp = Response(status=304)
+        else:
+            resp = Response(entry.body, mimetype="application/json")
+        resp.set_etag(entry.etag)
+        resp.headers["Cache-Control"] = "private, no-cache"  # per login; revalidate every time
+        resp.headers["X-Cache"] = "HIT" if hit else "MISS"
+        return resp
+
+    def page_cursor_args() -> tuple[Optional[int], Optional[int], int]:
+        after, before = optional_int("after"), optional_int("before")
+        if after is not None and before is not None:
+            raise ValidationError("Pass either 'after' or 'before', not both")
+        return after, before, optional_int("limit") or DEFAULT_PAGE_SIZE  # limit is clamped to MAX_PAGE_SIZE
+
+    @app.post("/api/login")
+    def login():
+        data = body()
+        user = User.get_or_none(User.email == arg("email", data))
+        if (not user or not user.is_active or
+                not verify_password(arg("password", data), user.password_salt, user.password_hash, user.iterations)):
+            raise AuthenticationError("Invalid email or password")
+        return jsonify(token=tokens.dumps([user.id, user.role]), user_id=user.id, role=user.role)
+
+    # ---------- customer ----------
+    @app.get("/api/cars")
+    @login_required()
+    def search_cars():
+        start, end = arg("start"), arg("end")
+        make = request.args.get("make") or None
+        max_rate = arg("max_rate", type_=float) if request.args.get("max_rate") else None
+
+        def build():
+            offers = rent.available_cars(start, end, make=make, max_daily_rate=max_rate, readonly=True)
+            quotes = rent.quote_many(offers, start, end)
+            return {"cars": [{**c._asdict(), "total": total} for c, (_, _, total, _) in zip(offers, quotes)]}
+        return cached_json(("search", start, end, make and make.lower(), max_rate), build)
+
+    @app.get("/api/cars/<int:car_id>/quote")
+    @login_required()
+    def quote(car_id: int):
+        days, base_cost, adjs, total, daily_rate = rent.quote(car_id, arg("start"), arg("end"))
+        return jsonify(car_id=car_id, days=days, daily_rate=daily_rate, base_cost=base_cost,
+                       adjustments=[{"rule_id": rid, "amount": amount} for rid, amount in adjs], total=total)
+
+    @app.post("/api/orders")
+    @login_required()
+    def place_order():
+        data = body()
+        pay_kwargs = data.get("pay_kwargs") or {}
+        if not isinstance(pay_kwargs, dict):
+            raise ValidationError("Invalid parameter: pay_kwargs")
+        b = rent.place_order_and_pay(actor_user_id=g.user_id, user_id=g.user_id, car_id=arg("car_id", data, int),
+                                     start_str=arg("start", data), end_str=arg("end", data),
+                                     pay_method=arg("pay_method", data), pay_kwargs=pay_kwargs)
+        return jsonify(booking_json(b)), 201
+
+    @app.get("/api/me/bookings")
+    @login_required()
+    def my_bookings():
+        return jsonify(bookings=[{**booking_json(b), "car": _joined_car(b)} for b in rent.list_my_bookings(g.user_id)])
+
+    # ---------- admin ----------
+    @app.get("/api/admin/bookings/pending")
+    @login_required("admin")
+    def pending_bookings():
+        return jsonify(bookings=[{**booking_json(b), "car": _joined_car(b)} for b in review.list_pending()])
+
+    @app.post("/api/admin/bookings/<int:booking_id>/approve")
+    @login_required("admin")
+    def approve(booking_id: int):
+        return jsonify(booking_json(review.approve(actor_user_id=g.user_id, booking_id=booking_id)))
+
+    @app.post("/api/admin/bookings/<int:booking_id>/reject")
+    @login_required("admin")
+    def reject(booking_id: int):
+        return jsonify(booking_json(review.reject(actor_user_id=g.user_id, booking_id=booking_id)))
+
+    @app.get("/api/admin/audit")
+    @login_required("admin")
+    def audit_log():
+        after, before, limit = page_cursor_args()
+        page = audit.page_logs(after=after, before=before, limit=limit, readonly=True)
+        return jsonify(entries=[{**r._asdict(), "created_at": r.created_at.isoformat()} for r in page],
+                       next_cursor=page.next_cursor, prev_cursor=page.prev_cursor)
+
+    @app.get("/api/admin/cars")
+    @login_required("admin")
+    def car_listing():
+        after, before, limit = page_cursor_args()
+
+        def build():
+            page = cars.page_cars(after=after, before=before, limit=limit, readonly=True)
+            return {"cars": [c._asdict() for c in page], "next_cursor": page.next_cursor,
+                    "prev_cursor": page.prev_cursor}
+        return cached_json(("cars", after, before, limit), build)
+
+    @app.get("/api/admin/cache")
+    @login_required("admin")
+    def cache_stats():
+        return jsonify(cache.stats())
+
+    return app
@@ -0,0 +1,110 @@
+# api/response_cache.py
+# -*- coding: utf-8 -*-
+"""
+Response cache for the read-mostly endpoints (car search, car listing)
+
+Entries are JSON bodies keyed by (endpoint, parameters) and tagged with the
+DataVersion counter they were built at (db/models.py). The counter moves on
+every car / booking / pricing rule write, from any process, so an entry is
+served only while the counter still equals its version. Anything older is
+rebuilt on the next request. The rebuild sees other processes' writes too:
+the availability index and calendar replay the ChangeLog before every query
+(db/changelog.py) and the pricing rule engine reloads when DataVersion moves.
+
+Each entry also carries a strong ETag (a hash of the body). A request whose
+If-None-Match matches a current entry gets a 304: no search query, no body.
+After a write, the body is rebuilt, but if it comes out identical its ETag is
+unchanged and the client still gets a 304.
+
+Bounded by max_bytes of bodies, least recently used first out.
+AUTORENTX_RESPONSE_CACHE_MB sets the default (32).
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get("AUTORENTX_RESPONSE_CACHE_MB") or 32) * 2**20)
+
+
+class CachedResponse(NamedTuple):
+    version: int
+    etag: str
+    body: bytes
+
+
+def etag_for(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0        # no entry for the key
+        self.stale = 0         # an entry, built at an older data version
+        self.not_modified = 0  # 304s sent
+        self.evictions = 0
+
+    def get(self, key: Hashable, version: int) -> Optional[CachedResponse]:
+        """The entry for key if it was built at this data version"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.version != version:
+                self.stale += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, version: int, body: bytes) -> CachedResponse:
+        """Store body as built at version (unless a newer build is already stored); returns the entry to serve"""
+        entry = CachedResponse(version, etag_for(body), body)
+        if len(body) > self.max_bytes:
+            return entry  # served, never stored
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None:
+                if old.version > version:
+                    return entry  # a concurrent request stored a newer build meanwhile
+                self.bytes -= len(old.body)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self.bytes += len(body)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted.body)
+                self.evictions += 1
+        return entry
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+            }
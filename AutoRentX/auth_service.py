@@ -5,12 +5,11 @@ auth_service.py
 Peewee ORM + OOP
 Authentication service (Peewee ORM + OOP)
 """
-from attr import validate
 from peewee import DoesNotExist
 import hashlib, hmac, secrets
 from typing import Optional
 from abc import ABC, abstractmethod
-from db.models import User, db
+from db.models import User
 from common.validators import Validator
 
 # ========== Password Utils ==========
@@ -40,9 +39,6 @@ class AuthService(ABC):
 class PeeweeAuthService(AuthService):
     """Authentication service implemented with Peewee"""
 
-    def __init__(self):
-        db.create_tables([User])  # Ensure tables exist
-
     def register(self, name: str, email: str, password: str, role: str = "customer") -> bool:
         try:
             # ====== Input validation ======
@@ -0,0 +1,36 @@
+# benchmarks/_common.py
+# -*- coding: utf-8 -*-
+"""
+Shared helpers for the benchmark scripts
+Run from the AutoRentX folder, e.g.:  python -m benchmarks.bench_startup
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable
+
+
+def use_temp_db(name: str = "bench.db") -> str:
+    """Point AUTORENTX_DB at a fresh file; must run before any db module is imported"""
+    if "db.db_manager" in sys.modules:
+        raise RuntimeError("use_temp_db() must be called before importing db modules")
+    path = os.path.join(tempfile.mkdtemp(prefix="autorentx-bench-"), name)
+    os.environ["AUTORENTX_DB"] = path
+    return path
+
+
+def measure(fn: Callable[[], object], repeat: int = 20) -> tuple[float, float]:
+    """Run fn `repeat` times; returns (best, median) wall time in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return min(samples), statistics.median(samples)
+
+
+def report(label: str, best_ms: float, median_ms: float) -> None:
+    print(f"{label:<50} best {best_ms:9.3f} ms   median {median_ms:9.3f} ms")
@@ -0,0 +1,127 @@
+# benchmarks/bench_api_load.py
+# -*- coding: utf-8 -*-
+"""
+Local load test for the JSON API (api/app.py) on Werkzeug's threaded server
+
+CLIENTS threads each run ROUNDS customer sessions against a live server on
+127.0.0.1: search cars -> quote -> order + pay -> my bookings. The server
+runs the way serve_api.py runs it (pooled connections, balanced durability,
+buffered audit). Reported per endpoint: requests, p50 and p99 latency, and
+the overall request rate.
+
+Usage: python -m benchmarks.bench_api_load [clients, default 16]
+"""
+
+import http.client
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+from benchmarks._common import use_temp_db
+
+use_temp_db()
+
+from db.db_manager import DatabaseManager, DURABILITY_BALANCED
+
+DatabaseManager.configure(pooled=True, durability=DURABILITY_BALANCED)
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import common.payment_app as payment_app
+from auth_service import hash_password
+from admin_service.audit_service import AuditService, AUDIT_BUFFERED
+from admin_service.pricing_service import DATE_FMT
+from db.models import db, create_all_tables, Car, CustomerProfile, PricingRule, User
+from api import create_app
+
+CLIENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+ROUNDS = 25
+CARS = CLIENTS * ROUNDS + 100  # a booked car leaves "available", so keep enough for every order
+
+
+def seed() -> None:
+    create_all_tables()
+    salt, digest, iterations = hash_password("pw", iterations=1)
+    with db.atomic():
+        for i in range(CLIENTS):
+            user = User.create(name=f"u{i}", email=f"u{i}@x.io", password_salt=salt, password_hash=digest,
+                               iterations=iterations)
+            CustomerProfile.create(user=user, first_name="A", last_name="B", phone="1", id_document="X")
+        Car.insert_many([{"make": "Make", "model": f"M{i}", "year": 2022, "kilometre": 10, "daily_rate": 50.0}
+                         for i in range(CARS)]).execute()
+        PricingRule.create(name="g", rule_type="discount", amount_type="percent", amount_value=10)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class Client:
+    def __init__(self, port: int, latencies: dict):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port)
+        self.latencies = latencies
+        self.headers = {"Content-Type": "application/json"}
+
+    def call(self, label: str, method: str, path: str, body=None, expect=(200,)) -> dict:
+        t0 = time.perf_counter()
+        self.conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=self.headers)
+        resp = self.conn.getresponse()
+        data = json.loads(resp.read())
+        self.latencies[label].append(time.perf_counter() - t0)
+        if resp.status not in expect:
+            raise RuntimeError(f"{method} {path}: {resp.status} {data}")
+        return data
+
+
+def session(port: int, n: int, latencies: dict) -> None:
+    client = Client(port, latencies)
+    token = client.call("login", "POST", "/api/login", {"email": f"u{n}@x.io", "password": "pw"})["token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+    for r in range(ROUNDS):
+        day = date(2030, 1, 1) + timedelta(days=3 * (r * CLIENTS + n))  # every order gets its own slot
+        start = end = day.strftime(DATE_FMT)
+        cars = client.call("search", "GET", f"/api/cars?start={start}&end={end}")["cars"]
+        car_id = cars[n % len(cars)]["id"]  # clients may pick the same car: losers get a 404 / 409
+        quote = client.call("quote", "GET", f"/api/cars/{car_id}/quote?start={start}&end={end}", expect=(200, 404))
+        if "error" in quote:
+            continue  # another client's order made the car unavailable since the search
+        client.call("order", "POST", "/api/orders", {"car_id": car_id, "start": start, "end": end,
+                                                     "pay_method": "paypal", "pay_kwargs": {"email": "a@b.io"}},
+                    expect=(201, 409))
+        client.call("my bookings", "GET", "/api/me/bookings")
+
+
+def main() -> None:
+    payment_app.random.random = lambda: 0.5  # no simulated gateway failures
+    AuditService.default_mode = AUDIT_BUFFERED
+    seed()
+    server = make_server("127.0.0.1", 0, create_app(secret="bench"), threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    workers = [threading.Thread(target=session, args=(server.server_port, n, latencies)) for n in range(CLIENTS)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - t0
+    server.shutdown()
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{CLIENTS} clients x {ROUNDS} sessions, {CARS} cars; pool {DatabaseManager().pool_stats()}")
+    for label, values in latencies.items():
+        values.sort()
+        p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+        print(f"{label:<12} {len(values):6d} req   p50 {statistics.median(values) * 1000:8.2f} ms"
+              f"   p99 {p99 * 1000:8.2f} ms")
+    print(f"{total} requests in {elapsed:.2f} s: {total / elapsed:.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/bench_async_load.py
+# -*- coding: utf-8 -*-
+"""
+Asyncio load test: 500 simulated customers at once through the async facade
+
+Each customer quotes a car, pays (the mock gateway made to take GATEWAY_MS,
+like a real remote call) and lists their bookings. Reported: orders/s and
+p50/p99 order latency for several database worker counts, against the
+blocking RentService called one customer after another.
+
+Usage: python -m benchmarks.bench_async_load [gateway latency ms, default 50]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from benchmarks._common import use_temp_db
+
+use_temp_db()
+
+import common.payment_app as payment_app
+from common.payment_app import PaymentGateway
+from db.executor import DbExecutor
+from db.models import db, create_all_tables, Car, CustomerProfile, User
+from admin_service.pricing_service import DATE_FMT
+from customer_service.async_facade import AsyncRentService
+from customer_service.rent_service import RentService
+
+CUSTOMERS = 500
+GATEWAY_MS = float(sys.argv[1]) if len(sys.argv) > 1 else 50.0
+
+
+class RemoteGateway(PaymentGateway):
+    def process(self, method, req, **kwargs):
+        time.sleep(GATEWAY_MS / 1000)
+        return super().process(method, req, **kwargs)
+
+
+def seed() -> list[int]:
+    create_all_tables()
+    with db.atomic():
+        User.insert_many([{"name": f"u{i}", "email": f"u{i}@x.io", "password_salt": b"s", "password_hash": b"h",
+                           "iterations": 1} for i in range(CUSTOMERS)]).execute()
+        ids = [u.id for u in User.select(User.id)]
+        CustomerProfile.insert_many([{"user": uid, "first_name": "A", "last_name": "B", "phone": "1",
+                                      "id_document": "X"} for uid in ids]).execute()
+    return ids
+
+
+def add_cars() -> list[int]:
+    """A fresh car per customer for each round, so every order can succeed"""
+    first = Car.insert_many([{"make": "Make", "model": f"M{i}", "year": 2022, "kilometre": 10, "daily_rate": 50.0}
+                             for i in range(CUSTOMERS)]).execute()
+    return list(range(first - CUSTOMERS + 1, first + 1))
+
+
+DAY = (date(2030, 1, 1)).strftime(DATE_FMT)
+END = (date(2030, 1, 1) + timedelta(days=2)).strftime(DATE_FMT)
+
+
+def summary(label: str, latencies: list[float], elapsed: float) -> None:
+    lat = sorted(latencies)
+    p99 = lat[min(len(lat) - 1, int(len(lat) * 0.99))]
+    print(f"{label:<34} {len(lat) / elapsed:8.1f} orders/s   p50 {statistics.median(lat) * 1000:8.1f} ms"
+          f"   p99 {p99 * 1000:8.1f} ms")
+
+
+def run_blocking(users: list[int], n: int) -> None:
+    rent = RentService(gateway=RemoteGateway())
+    cars = add_cars()
+    latencies = []
+    t0 = time.perf_counter()
+    for uid, car_id in list(zip(users, cars))[:n]:
+        t = time.perf_counter()
+        rent.quote(car_id, DAY, END)
+        rent.place_order_and_pay(actor_user_id=uid, user_id=uid, car_id=car_id, start_str=DAY, end_str=END,
+                                 pay_method="paypal", pay_kwargs={"email": "a@b.io"})
+        rent.list_my_bookings(uid)
+        latencies.append(time.perf_counter() - t)
+    summary(f"blocking, one at a time ({n})", latencies, time.perf_counter() - t0)
+
+
+async def run_async(users: list[int], workers: int) -> None:
+    executor = DbExecutor(workers)
+    rent = AsyncRentService(RentService(gateway=RemoteGateway()), executor)
+    cars = await executor.run(add_cars)
+    # the gateway calls are I/O waits: give them enough threads for every customer
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(CUSTOMERS))
+    latencies = []
+
+    async def customer(uid: int, car_id: int) -> None:
+        t = time.perf_counter()
+        await rent.quote(car_id, DAY, END)
+        await rent.place_order_and_pay(actor_user_id=uid, user_id=uid, car_id=car_id, start_str=DAY, end_str=END,
+                                       pay_method="paypal", pay_kwargs={"email": "a@b.io"})
+        await rent.list_my_bookings(uid)
+        latencies.append(time.perf_counter() - t)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(customer(uid, car_id) for uid, car_id in zip(users, cars)))
+    elapsed = time.perf_counter() - t0
+    executor.close()
+    summary(f"async, {workers} db worker(s) ({CUSTOMERS})", latencies, elapsed)
+
+
+def main() -> None:
+    payment_app.random.random = lambda: 0.5  # no simulated gateway failures
+    users = seed()
+    print(f"{CUSTOMERS} customers, gateway latency {GATEWAY_MS:g} ms")
+    run_blocking(users, 50)
+    for workers in (1, 4, 8):
+        asyncio.run(run_async(users, workers))
+
+
+if __name__ == "__main__":
+    main()
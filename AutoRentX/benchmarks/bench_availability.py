@@ -0,0 +1,69 @@
+# benchmarks/bench_availability.py
+# -*- coding: utf-8 -*-
+"""
+"Which cars are busy for [S, E]": day-bitmap calendar vs interval index vs SQL
+10k cars, 100k pending/confirmed bookings spread over the next two years.
+"""
+
+import random
+from datetime import date, timedelta
+
+from benchmarks._common import use_temp_db, measure, report
+
+use_temp_db()
+
+from db.models import db, create_all_tables, Car, Booking, User, BOOKING_PENDING, BOOKING_CONFIRMED
+from common.availability_index import AvailabilityIndex
+from common.availability_calendar import AvailabilityCalendar
+
+N_CARS = 10_000
+N_BOOKINGS = 100_000
+
+
+def seed():
+    create_all_tables()
+    rnd = random.Random(5)
+    today = date.today()
+    with db.atomic():
+        user = User.create(name="u", email="u@x.io", password_salt=b"s", password_hash=b"h", iterations=1)
+        cars = [{"make": "Make", "model": f"M{i}", "year": 2020, "kilometre": 1000,
+                 "daily_rate": 50.0, "status": "available"} for i in range(N_CARS)]
+        for i in range(0, N_CARS, 1000):
+            Car.insert_many(cars[i:i + 1000]).execute()
+        snap = {"snap_first_name": "A", "snap_last_name": "B", "snap_phone": "1", "snap_id_document": "X"}
+        # pending rows first (they may overlap each other); confirmed rows then take distinct
+        # 12-day slots per car, since the overlap triggers reject clashes with confirmed bookings
+        rows = []
+        for _ in range(N_BOOKINGS // 2):
+            start = today + timedelta(days=rnd.randrange(700))
+            rows.append({"car": rnd.randint(1, N_CARS), "user": user.id, "start_date": start,
+                         "end_date": start + timedelta(days=rnd.randint(0, 10)), "status": BOOKING_PENDING, **snap})
+        slots = rnd.sample(range(N_CARS * (700 // 12)), N_BOOKINGS // 2)
+        for slot in slots:
+            car, k = divmod(slot, 700 // 12)
+            start = today + timedelta(days=k * 12 + rnd.randrange(2))
+            rows.append({"car": car + 1, "user": user.id, "start_date": start,
+                         "end_date": start + timedelta(days=rnd.randint(0, 9)), "status": BOOKING_CONFIRMED, **snap})
+        for i in range(0, N_BOOKINGS, 2000):
+            Booking.insert_many(rows[i:i + 2000]).execute()
+
+
+def sql_busy(start, end):
+    return {cid for (cid,) in Booking.select(Booking.car).where(
+        (Booking.status == BOOKING_CONFIRMED) & (Booking.start_date <= end) & (Booking.end_date >= start)
+    ).distinct().tuples()}
+
+
+if __name__ == "__main__":
+    seed()
+    cal, index = AvailabilityCalendar(), AvailabilityIndex()
+    start = date.today() + timedelta(days=200)
+    end = start + timedelta(days=6)
+    print(f"{N_CARS} cars, {N_BOOKINGS} bookings, 7-day query")
+    report("calendar load (full rebuild)", *measure(cal.load, repeat=3))
+    report("interval index load (full rebuild)", *measure(index.load, repeat=3))
+    confirmed = (BOOKING_CONFIRMED,)
+    assert cal.busy_car_ids(start, end, confirmed) == index.busy_car_ids(start, end, confirmed) == sql_busy(start, end)
+    report("SQL overlap query", *measure(lambda: sql_busy(start, end), repeat=10))
+    report("interval index busy_car_ids", *measure(lambda: index.busy_car_ids(start, end, confirmed), repeat=10))
+    report("calendar busy_car_ids (NumPy any)", *measure(lambda: cal.busy_car_ids(start, end, confirmed), repeat=50))
@@ -0,0 +1,148 @@
+# benchmarks/bench_booking_contention.py
+# -*- coding: utf-8 -*-
+"""
+Several processes booking the same few cars at once
+Each attempt is "check availability -> pay (simulated gateway latency) -> insert",
+the shape of RentService.place_order_and_pay. Modes:
+- unguarded:   overlap triggers dropped, nothing else (shows the race)
+- global lock: the whole attempt runs under one cross-process file lock (serialized app)
+- trigger:     no app lock; the booking_no_overlap_* triggers reject the loser,
+               possibly after it has paid
+- hold:        a reservation hold is taken before paying and claimed afterwards,
+               so losers are turned away before the gateway is called
+
+Usage: python -m benchmarks.bench_booking_contention [gateway latency ms, default 2]
+
+Unix only (fcntl). Every process opens its own connection, so db modules are
+imported inside the workers, never in this parent process.
+"""
+
+import fcntl
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+PROCESSES = 8
+ATTEMPTS = 150          # per process
+CARS = 4
+DAYS = 120              # booking window
+WORK_SECONDS = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.002  # gateway latency
+
+
+def _setup(db_path: str, triggers: bool) -> None:
+    os.environ["AUTORENTX_DB"] = db_path
+    from db.models import db, create_all_tables, Car, User
+    from db.migrations import BOOKING_TRIGGERS
+    create_all_tables()
+    User.create(name="u", email="u@x.io", password_salt=b"s", password_hash=b"h", iterations=1)
+    for i in range(CARS):
+        Car.create(make="Make", model=f"M{i}", year=2022, kilometre=10, daily_rate=50.0)
+    if not triggers:
+        for name in BOOKING_TRIGGERS:
+            db.execute_sql(f"DROP TRIGGER {name}")
+    db.close()
+
+
+def _worker(db_path: str, mode: str, seed: int, lock_path: str, ready, go, results) -> None:
+    os.environ["AUTORENTX_DB"] = db_path
+    from peewee import IntegrityError
+    from db.models import db, Booking, BOOKING_CONFIRMED, is_booking_overlap
+    from common.exceptions import ConflictError
+    from customer_service.hold_service import ReservationHoldService
+    from db.hot_queries import HotQueries
+    holds = ReservationHoldService(ttl_seconds=30)
+    hot = HotQueries()
+
+    rnd = random.Random(seed)
+    day0 = date(2030, 1, 1)
+    booked = conflicts = wasted = 0  # wasted: paid, then lost the slot
+    lock_file = open(lock_path, "w")
+    Booking.select().count()  # connect before the clock starts
+    ready.release()
+    go.wait()
+    for _ in range(ATTEMPTS):
+        car_id = rnd.randint(1, CARS)
+        start = day0 + timedelta(days=rnd.randrange(DAYS))
+        end = start + timedelta(days=rnd.randint(0, 3))
+        if mode == "global lock":
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            taken = hot.has_overlap(car_id, start, end, (BOOKING_CONFIRMED,))
+            if taken:
+                conflicts += 1
+                continue
+            hold = None
+            if mode == "hold":
+                try:
+                    hold = holds.acquire(car_id=car_id, user_id=1, start=start, end=end)
+                except ConflictError:
+                    conflicts += 1
+                    continue
+            time.sleep(WORK_SECONDS)
+            try:
+                with db.atomic():
+                    if hold:
+                        holds.claim(hold)
+                    Booking.create(car=car_id, user=1, start_date=start, end_date=end, status=BOOKING_CONFIRMED,
+                                   snap_first_name="A", snap_last_name="B", snap_phone="1", snap_id_document="X")
+                booked += 1
+            except IntegrityError as e:
+                if not is_booking_overlap(e):
+                    raise
+                conflicts += 1
+                wasted += 1
+        finally:
+            if mode == "global lock":
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    results.put((booked, conflicts, wasted))
+
+
+def _double_bookings(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    (n,) = conn.execute("""
+        SELECT COUNT(*) FROM booking a JOIN booking b
+          ON a.car_id = b.car_id AND a.id < b.id
+         AND a.start_date <= b.end_date AND a.end_date >= b.start_date
+        WHERE a.status = 'confirmed' AND b.status = 'confirmed'""").fetchone()
+    conn.close()
+    return n
+
+
+def run(mode: str) -> None:
+    ctx = mp.get_context("spawn")
+    folder = tempfile.mkdtemp(prefix="autorentx-bench-")
+    db_path = os.path.join(folder, "contention.db")
+    setup = ctx.Process(target=_setup, args=(db_path, mode != "unguarded"))
+    setup.start()
+    setup.join()
+
+    results, ready, go = ctx.Queue(), ctx.Semaphore(0), ctx.Event()
+    procs = [ctx.Process(target=_worker,
+                         args=(db_path, mode, seed, os.path.join(folder, "app.lock"), ready, go, results))
+             for seed in range(PROCESSES)]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.acquire()  # process start-up and imports are not timed
+    t0 = time.perf_counter()
+    go.set()
+    totals = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t0
+
+    booked, conflicts, wasted = (sum(col) for col in zip(*totals))
+    attempts = PROCESSES * ATTEMPTS
+    print(f"{mode:<12} {attempts / elapsed:8.0f} attempts/s   booked {booked:4d}   rejected {conflicts:4d}   "
+          f"paid then rejected {wasted:3d}   double bookings {_double_bookings(db_path)}")
+
+
+if __name__ == "__main__":
+    print(f"{PROCESSES} processes x {ATTEMPTS} attempts on {CARS} cars, {WORK_SECONDS * 1000:.0f} ms gateway latency")
+    for mode in ("unguarded", "global lock", "trigger", "hold"):
+        run(mode)
@@ -0,0 +1,130 @@
+# benchmarks/bench_durability.py
+# -*- coding: utf-8 -*-
+"""
+Commits/sec and fsync counts per durability profile (safe / balanced / fast)
+
+Workload: THREADS threads each run OPS small service transactions, alternating
+AuditService.write and ProfileService.create_or_update (profile + audit row),
+first with one thread, then with THREADS.
+
+fsyncs are counted by an LD_PRELOAD shim around fsync/fdatasync, compiled on
+the fly with the system C compiler; every profile runs in a fresh child
+process. Without a compiler (or off Linux) the fsync column shows "n/a".
+
+The database lives in the system temp folder: on tmpfs fsync costs nothing,
+point TMPDIR at a real disk to see the trade-off.
+
+Usage: python -m benchmarks.bench_durability
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+THREADS = 8
+OPS = 250  # per thread
+PROFILES = ("safe", "balanced", "fast")
+
+_SHIM = r"""
+#define _GNU_SOURCE
+#include <dlfcn.h>
+static long calls;
+long autorentx_fsync_calls(void) { return __atomic_load_n(&calls, __ATOMIC_RELAXED); }
+int fsync(int fd) {
+    static int (*real)(int);
+    if (!real) real = (int (*)(int))dlsym(RTLD_NEXT, "fsync");
+    __atomic_add_fetch(&calls, 1, __ATOMIC_RELAXED);
+    return real(fd);
+}
+int fdatasync(int fd) {
+    static int (*real)(int);
+    if (!real) real = (int (*)(int))dlsym(RTLD_NEXT, "fdatasync");
+    __atomic_add_fetch(&calls, 1, __ATOMIC_RELAXED);
+    return real(fd);
+}
+"""
+
+
+def _build_shim() -> str | None:
+    cc = shutil.which("cc") or shutil.which("gcc")
+    if not cc or not sys.platform.startswith("linux"):
+        return None
+    folder = tempfile.mkdtemp(prefix="autorentx-shim-")
+    src, lib = os.path.join(folder, "fsync_count.c"), os.path.join(folder, "fsync_count.so")
+    with open(src, "w") as f:
+        f.write(_SHIM)
+    done = subprocess.run([cc, "-shared", "-fPIC", "-O2", "-o", lib, src, "-ldl"], capture_output=True)
+    return lib if done.returncode == 0 else None
+
+
+def _fsync_counter():
+    import ctypes
+    try:
+        fn = ctypes.CDLL(None).autorentx_fsync_calls
+    except AttributeError:
+        return lambda: None
+    fn.restype = ctypes.c_long
+    return fn
+
+
+def _child(profile: str) -> None:
+    from benchmarks._common import use_temp_db
+    use_temp_db("durability.db")
+    os.environ["AUTORENTX_DURABILITY"] = profile
+    from db.models import create_all_tables, User
+    from db.group_commit import GroupCommitter
+    from admin_service.audit_service import AuditService, AUDIT_SYNC
+    from customer_service.profile_service import ProfileService
+    create_all_tables()
+    users = [User.create(name=f"u{i}", email=f"u{i}@x.io", password_salt=b"s", password_hash=b"h", iterations=1)
+             for i in range(THREADS)]
+    audit = AuditService(mode=AUDIT_SYNC)
+    profiles = ProfileService(audit)
+    fsyncs = _fsync_counter()
+
+    def work(user_id: int) -> None:
+        for i in range(OPS):
+            if i % 2:
+                audit.write(actor_user_id=user_id, action="bench", target_type="bench", target_id=i)
+            else:
+                profiles.create_or_update(actor_user_id=user_id, user_id=user_id, first_name="Ann",
+                                          last_name=f"Lee{i}", phone="021 555", id_document="P123")
+
+    for threads in (1, THREADS):
+        committer = GroupCommitter() if profile == "balanced" else None
+        commits0 = committer.commits if committer else 0
+        f0 = fsyncs()
+        pool = [threading.Thread(target=work, args=(users[t].id,)) for t in range(threads)]
+        t0 = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        f1 = fsyncs()
+        txns = threads * OPS
+        batches = f"{txns / (committer.commits - commits0):5.1f} txn/commit" if committer else ""
+        fsync_col = f"{f1 - f0:6d} fsyncs ({(f1 - f0) / txns:5.2f}/txn)" if f0 is not None else "   n/a fsyncs"
+        print(f"{profile:<9} {threads} thread(s)  {txns / elapsed:8.0f} txn/s   {fsync_col}   {batches}")
+
+
+def main() -> None:
+    shim = _build_shim()
+    print(f"{OPS} transactions per thread; fsyncs counted {'with an LD_PRELOAD shim' if shim else ': n/a (no C compiler)'}")
+    for profile in PROFILES:
+        env = dict(os.environ)
+        if shim:
+            env["LD_PRELOAD"] = shim
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_durability", "--child", profile],
+                       env=env, check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        _child(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_hot_queries.py
+# -*- coding: utf-8 -*-
+"""
+Per-call cost of the hot lookups: Peewee ORM vs the prepared-statement registry
+(db/hot_queries.py). 2k cars with profiles/users, 60 rules, 20k bookings;
+CALLS lookups per measurement, reported per call.
+"""
+
+import random
+from datetime import date, timedelta
+
+from benchmarks._common import use_temp_db, measure
+
+use_temp_db()
+
+from db.models import db, create_all_tables, Booking, Car, CustomerProfile, PricingRule, User, BOOKING_CONFIRMED
+from db.hot_queries import HotQueries, HOT_ORM, HOT_PREPARED
+
+N_CARS = 2_000
+N_BOOKINGS = 20_000
+CALLS = 2_000
+
+
+def seed():
+    create_all_tables()
+    rnd = random.Random(5)
+    with db.atomic():
+        for i in range(0, N_CARS, 500):
+            Car.insert_many([{"make": "Make", "model": f"M{j}", "year": 2020, "kilometre": 1000,
+                              "daily_rate": 50.0} for j in range(i, i + 500)]).execute()
+            User.insert_many([{"name": f"u{j}", "email": f"u{j}@x.io", "password_salt": b"s",
+                               "password_hash": b"h", "iterations": 1} for j in range(i, i + 500)]).execute()
+            CustomerProfile.insert_many([{"user": j + 1, "first_name": "A", "last_name": "B", "phone": "1",
+                                          "id_document": "X"} for j in range(i, i + 500)]).execute()
+        PricingRule.insert_many([{"name": f"r{i}", "rule_type": rnd.choice(["discount", "surcharge"]),
+                                  "amount_type": "percent", "amount_value": rnd.randint(1, 20),
+                                  "scope": "global" if i % 3 else "car", "car": None if i % 3 else rnd.randint(1, N_CARS),
+                                  "min_days": rnd.randint(1, 7)} for i in range(60)]).execute()
+        # per car: back-to-back 5-day slots, so the overlap triggers never fire
+        rows = [{"car": c, "user": 1, "start_date": date(2030, 1, 1) + timedelta(days=6 * k),
+                 "end_date": date(2030, 1, 5) + timedelta(days=6 * k), "status": BOOKING_CONFIRMED,
+                 "snap_first_name": "A", "snap_last_name": "B", "snap_phone": "1", "snap_id_document": "X"}
+                for c in range(1, N_CARS + 1) for k in range(N_BOOKINGS // N_CARS)]
+        for i in range(0, len(rows), 500):
+            Booking.insert_many(rows[i:i + 500]).execute()
+
+
+def main():
+    seed()
+    rnd = random.Random(7)
+    ids = [rnd.randint(1, N_CARS) for _ in range(CALLS)]
+    day = date(2030, 2, 1)
+    cases = {
+        "car(id)": lambda h: [h.car(i) for i in ids],
+        "profile(user_id)": lambda h: [h.profile(i) for i in ids],
+        "applicable_rules(car, 7 days)": lambda h: [h.applicable_rules(i, day, day + timedelta(days=6), 7) for i in ids],
+        "has_overlap(car, confirmed)": lambda h: [h.has_overlap(i, day, day + timedelta(days=2), (BOOKING_CONFIRMED,))
+                                                  for i in ids],
+    }
+    orm, prepared = HotQueries(HOT_ORM), HotQueries(HOT_PREPARED)
+    print(f"{CALLS} calls per run, best of 10, microseconds per call")
+    for label, run in cases.items():
+        assert [getattr(r, "__data__", r) for r in run(orm)] == [getattr(r, "__data__", r) for r in run(prepared)]
+        orm_ms, _ = measure(lambda: run(orm), repeat=10)
+        prep_ms, _ = measure(lambda: run(prepared), repeat=10)
+        print(f"{label:<32} orm {orm_ms * 1000 / CALLS:7.1f} us   prepared {prep_ms * 1000 / CALLS:7.1f} us   "
+              f"x{orm_ms / prep_ms:4.1f}")
+
+
+if __name__ == "__main__":
+    main()
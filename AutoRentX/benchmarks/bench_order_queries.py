@@ -0,0 +1,100 @@
+# benchmarks/bench_order_queries.py
+# -*- coding: utf-8 -*-
+"""
+Statements per customer order, with and without one unit of work around it
+
+The order flow is what the customer CLI / an API handler runs for one order:
+get_my_profile -> quote -> place_order_and_pay. Without an outer unit of work each
+service call loads Car / CustomerProfile itself; inside one (db/unit_of_work.py)
+each is loaded once and shared. create_pending_booking is measured on its own:
+it calls the quote path internally and now reuses its car.
+
+Every statement SQLite prepares is counted (sqlite3 trace callback, so the
+prepared hot queries are included; trigger bodies are not counted).
+"""
+
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from benchmarks._common import use_temp_db
+
+use_temp_db()
+
+import common.payment_app as payment_app
+from db.models import db, create_all_tables, Car, CustomerProfile, User
+from db.unit_of_work import unit_of_work
+from customer_service.profile_service import ProfileService
+from customer_service.rent_service import RentService
+from admin_service.pricing_service import DATE_FMT
+
+ORDERS = 200
+
+
+def seed() -> int:
+    create_all_tables()
+    user = User.create(name="u", email="u@x.io", password_salt=b"s", password_hash=b"h", iterations=1)
+    CustomerProfile.create(user=user, first_name="A", last_name="B", phone="1", id_document="X")
+    Car.insert_many([{"make": "Make", "model": f"M{i}", "year": 2022, "kilometre": 10, "daily_rate": 50.0}
+                     for i in range(3 * ORDERS)]).execute()  # a fresh car per order: a booked car leaves "available"
+    return user.id
+
+
+class StatementCounter:
+    def __init__(self):
+        self.counts: Counter = Counter()
+
+    def __call__(self, sql: str) -> None:
+        if sql.startswith("--"):  # trigger bodies
+            return
+        head = sql.lstrip().split(None, 1)[0].upper()
+        if head == "SELECT" and 'FROM "car"' in sql:
+            head = "SELECT car"
+        elif head == "SELECT" and 'FROM "customerprofile"' in sql:
+            head = "SELECT customerprofile"
+        self.counts[head] += 1
+
+
+def run(label: str, flow, uid: int, first_car: int) -> None:
+    counter = StatementCounter()
+    conn = db.connection()
+    conn.set_trace_callback(counter)
+    t0 = time.perf_counter()
+    for i in range(ORDERS):
+        flow(uid, first_car + i, date(2030, 1, 1) + timedelta(days=i))
+    elapsed = time.perf_counter() - t0
+    conn.set_trace_callback(None)
+    per = {k: v / ORDERS for k, v in counter.counts.items()}
+    print(f"{label:<42} {sum(per.values()):5.1f} stmts/order  car {per.get('SELECT car', 0):.1f}  "
+          f"profile {per.get('SELECT customerprofile', 0):.1f}  {elapsed * 1000 / ORDERS:6.2f} ms/order")
+
+
+def main() -> None:
+    payment_app.random.random = lambda: 0.5  # no simulated gateway failures
+    uid = seed()
+    rent, profiles = RentService(), ProfileService()
+    rent.available_cars("01-01-2030", "01-01-2030")  # warm the in-memory indexes once
+
+    def order(user_id, car_id, day):
+        s = day.strftime(DATE_FMT)
+        profiles.get_my_profile(user_id)
+        rent.quote(car_id, s, s)
+        rent.place_order_and_pay(actor_user_id=user_id, user_id=user_id, car_id=car_id, start_str=s,
+                                 end_str=s, pay_method="paypal", pay_kwargs={"email": "a@b.io"})
+
+    def order_in_uow(user_id, car_id, day):
+        with unit_of_work():
+            order(user_id, car_id, day)
+
+    def pending(user_id, car_id, day):
+        s = day.strftime(DATE_FMT)
+        rent.create_pending_booking(actor_user_id=user_id, user_id=user_id, car_id=car_id, start_str=s, end_str=s)
+
+    print(f"{ORDERS} orders each")
+    run("order flow, one unit of work per call", order, uid, 1)
+    run("order flow inside one unit of work", order_in_uow, uid, ORDERS + 1)
+    run("create_pending_booking", pending, uid, 2 * ORDERS + 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/bench_pool.py
+# -*- coding: utf-8 -*-
+"""
+Multi-threaded throughput with the pooled DatabaseManager, two workloads
+
+1) service mix: each worker checks a connection out per operation and runs
+   PricingService.quote, RentService.available_cars or an audit INSERT (1 write
+   per 10 operations). Throughput stays flat from 1 to 16 threads: the time goes
+   into Python (ORM, pricing, index lookups) under the GIL, and SQLite's reads
+   are too short to overlap much. What the pool buys here is a bounded number of
+   connections, safely shared by threads (in_use never exceeds max_connections,
+   extra threads wait), not more throughput.
+2) connect-heavy: one primary-key lookup per connection, as a request handler
+   that opens and closes its connection each time would do. Without a pool every
+   operation opens the file and runs the PRAGMAs (WAL, cache size, ...); with one
+   it is a check-out of an open connection. This is where pooling raises
+   throughput, at any thread count.
+"""
+
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+from benchmarks._common import use_temp_db
+
+use_temp_db()
+
+from db.db_manager import DatabaseManager, InstrumentedPooledSqliteDatabase, ProfiledSqliteDatabase, pragmas_for
+
+DatabaseManager.configure(pooled=True, max_connections=8, wait_timeout=30)
+
+from db.models import db, create_all_tables, Car, PricingRule, Booking, User, BOOKING_CONFIRMED
+from admin_service.audit_service import AuditService
+from admin_service.pricing_service import PricingService, DATE_FMT
+from customer_service.rent_service import RentService
+
+OPS_PER_THREAD = 400
+CONNECT_OPS_PER_THREAD = 2000
+
+
+def seed(n_cars=500, n_bookings=5000, n_rules=40):
+    create_all_tables()
+    rnd = random.Random(1)
+    with db.atomic():
+        user = User.create(name="bench", email="bench@x.io", password_salt=b"s", password_hash=b"h", iterations=1)
+        Car.insert_many([{"make": "Make", "model": f"M{i}", "year": 2020, "kilometre": 1000,
+                          "daily_rate": 40 + i % 60, "status": "available"} for i in range(n_cars)]).execute()
+        PricingRule.insert_many([{"name": f"r{i}", "rule_type": rnd.choice(["discount", "surcharge"]),
+                                  "amount_type": rnd.choice(["percent", "fixed"]), "amount_value": rnd.randint(1, 20),
+                                  "scope": "global", "min_days": rnd.randint(1, 7)} for i in range(n_rules)]).execute()
+        day0 = date(2030, 1, 1)
+        rows = []
+        for k in range(n_bookings):
+            # one booking per 8-day slot of a car: confirmed bookings may not overlap (booking triggers)
+            start = day0 + timedelta(days=8 * (k // n_cars))
+            rows.append({"car": k % n_cars + 1, "user": user.id, "start_date": start,
+                         "end_date": start + timedelta(days=rnd.randint(0, 6)), "status": BOOKING_CONFIRMED,
+                         "snap_first_name": "A", "snap_last_name": "B", "snap_phone": "1", "snap_id_document": "X"})
+        for i in range(0, len(rows), 500):
+            Booking.insert_many(rows[i:i + 500]).execute()
+    db.close()
+
+
+def worker(mgr, rent, pricing, audit, seed_value):
+    rnd = random.Random(seed_value)
+    for i in range(OPS_PER_THREAD):
+        start = date(2030, 1, 1) + timedelta(days=rnd.randrange(365))
+        end = start + timedelta(days=rnd.randint(0, 6))
+        with mgr.connection():
+            if i % 10 == 0:
+                audit.write(actor_user_id=1, action="bench", target_type="car", target_id=i)
+            elif i % 2:
+                car = Car.get_by_id(rnd.randint(1, 500))
+                pricing.quote(car=car, start_date=start, end_date=end)
+            else:
+                rent.available_cars(start.strftime(DATE_FMT), end.strftime(DATE_FMT))
+
+
+def run(n_threads):
+    mgr = DatabaseManager()
+    audit = AuditService()
+    pricing = PricingService(audit)
+    rent = RentService(pricing, audit)
+    threads = [threading.Thread(target=worker, args=(mgr, rent, pricing, audit, k)) for k in range(n_threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    ops = n_threads * OPS_PER_THREAD
+    stats = mgr.pool_stats()
+    print(f"threads={n_threads:<2} ops={ops:<5} {ops / elapsed:9.1f} ops/s   "
+          f"in_use={stats['in_use']} idle={stats['idle']} waits={stats['waits']} wait_time={stats['wait_time']:.3f}s")
+
+
+def connect_heavy(database, label, n_threads):
+    def work(seed_value):
+        rnd = random.Random(seed_value)
+        for _ in range(CONNECT_OPS_PER_THREAD):
+            database.connect()
+            database.execute_sql('SELECT "daily_rate" FROM "car" WHERE "id" = ?', (rnd.randint(1, 500),)).fetchone()
+            database.close()
+
+    threads = [threading.Thread(target=work, args=(k,)) for k in range(n_threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ops = n_threads * CONNECT_OPS_PER_THREAD
+    print(f"{label:<9} threads={n_threads:<2} ops={ops:<6} {ops / (time.perf_counter() - t0):9.1f} ops/s")
+
+
+if __name__ == "__main__":
+    seed()
+    with DatabaseManager().connection():
+        RentService().availability.load()  # warm the in-memory index outside the timings
+    print("service mix (quote / available_cars / audit write)")
+    for n in (1, 2, 4, 8, 16):
+        run(n)
+
+    print("\nconnect-heavy (connect, one PK lookup, close)")
+    path, pragmas = db.database, pragmas_for(DatabaseManager().durability)
+    unpooled = ProfiledSqliteDatabase(path, pragmas=pragmas, check_same_thread=False)
+    pooled = InstrumentedPooledSqliteDatabase(path, pragmas=pragmas, max_connections=8, timeout=30,
+                                              check_same_thread=False)
+    for n in (1, 4, 8):
+        connect_heavy(unpooled, "unpooled", n)
+        connect_heavy(pooled, "pooled", n)
@@ -0,0 +1,52 @@
+# benchmarks/bench_quote_many.py
+# -*- coding: utf-8 -*-
+"""
+Fleet-wide pricing for one date range: quote_many vs one quote() per car
+10k cars, 50 global rules and one car-scoped rule on every 20th car.
+"""
+
+import random
+from datetime import date, timedelta
+
+from benchmarks._common import use_temp_db, measure, report
+
+use_temp_db()
+
+from db.models import db, create_all_tables, Car, PricingRule
+from admin_service.pricing_service import PricingService
+
+N_CARS = 10_000
+
+
+def seed():
+    create_all_tables()
+    rnd = random.Random(3)
+    with db.atomic():
+        rows = [{"make": "Make", "model": f"M{i}", "year": 2020, "kilometre": 1000,
+                 "daily_rate": float(rnd.randint(30, 150)), "status": "available"} for i in range(N_CARS)]
+        for i in range(0, N_CARS, 1000):
+            Car.insert_many(rows[i:i + 1000]).execute()
+        rules = [{"name": f"g{i}", "rule_type": rnd.choice(["discount", "surcharge"]),
+                  "amount_type": rnd.choice(["percent", "fixed"]), "amount_value": rnd.randint(1, 25),
+                  "scope": "global", "min_days": rnd.randint(1, 7)} for i in range(50)]
+        rules += [{"name": f"c{i}", "rule_type": "discount", "amount_type": "percent",
+                   "amount_value": rnd.randint(5, 30), "scope": "car", "car": i, "min_days": 1}
+                  for i in range(1, N_CARS + 1, 20)]
+        for i in range(0, len(rules), 500):
+            PricingRule.insert_many(rules[i:i + 500]).execute()
+
+
+if __name__ == "__main__":
+    seed()
+    cars = list(Car.select())
+    svc = PricingService()
+    start = date(2030, 3, 1)
+    end = start + timedelta(days=6)
+    assert svc.quote_many(cars, start, end) == [svc.quote(car=c, start_date=start, end_date=end) for c in cars]
+    print(f"{N_CARS} cars, {PricingRule.select().count()} rules, 7-day period")
+    report("quote() per car (cached engine)", *measure(
+        lambda: [svc.quote(car=c, start_date=start, end_date=end) for c in cars], repeat=5))
+    uncached = PricingService(cached=False)
+    report("quote() per car (query per quote)", *measure(
+        lambda: [uncached.quote(car=c, start_date=start, end_date=end) for c in cars], repeat=1))
+    report("quote_many (NumPy)", *measure(lambda: svc.quote_many(cars, start, end), repeat=10))
@@ -0,0 +1,69 @@
+# benchmarks/bench_readonly_rows.py
+# -*- coding: utf-8 -*-
+"""
+Full Model instances vs readonly NamedTuple rows (common/rows.py) for the
+listing paths, 100k rows each: wall time, and memory held by the result list
+(plus peak while building it) measured with tracemalloc.
+"""
+
+import random
+import tracemalloc
+
+from benchmarks._common import use_temp_db, measure, report
+
+use_temp_db()
+
+from db.models import db, create_all_tables, AuditLog, Car, PricingRule
+from admin_service.audit_service import AuditService
+from admin_service.car_service import PeeweeCarService
+from admin_service.pricing_service import PricingService
+from customer_service.rent_service import RentService
+
+N = 100_000
+
+
+def seed():
+    create_all_tables()
+    rnd = random.Random(11)
+    with db.atomic():
+        for i in range(0, N, 1000):
+            Car.insert_many([{"make": "Make", "model": f"M{j}", "year": 2015 + j % 10, "kilometre": j,
+                              "daily_rate": float(rnd.randint(30, 150))} for j in range(i, i + 1000)]).execute()
+            AuditLog.insert_many([{"actor_user_id": 1, "action": "update_car", "target_type": "car",
+                                   "target_id": j, "detail": f"status=available #{j}"}
+                                  for j in range(i, i + 1000)]).execute()
+            PricingRule.insert_many([{"name": f"r{j}", "rule_type": "discount", "amount_type": "percent",
+                                      "amount_value": 5, "scope": "car", "car": j + 1}
+                                     for j in range(i, i + 1000)]).execute()
+
+
+def memory_mb(fn) -> tuple[float, float]:
+    """(MB still held by fn's result, peak MB while building it)"""
+    tracemalloc.start()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / 2**20, peak / 2**20
+
+
+def main():
+    seed()
+    cars, audit, rules, rent = PeeweeCarService(), AuditService(), PricingService(), RentService()
+    cases = {
+        "list_cars": lambda ro: cars.list_cars(readonly=ro),
+        "available_cars": lambda ro: rent.available_cars("01-01-2031", "07-01-2031", readonly=ro),
+        "list_logs": lambda ro: audit.list_logs(N, readonly=ro),
+        "list_rules": lambda ro: rules.list_rules(readonly=ro),
+    }
+    print(f"{N} rows per listing")
+    for name, fn in cases.items():
+        for ro in (False, True):
+            label = f"{name} ({'rows' if ro else 'models'})"
+            report(label, *measure(lambda: fn(ro), repeat=5))
+            held, peak = memory_mb(lambda: fn(ro))
+            print(f"{'':<50} held {held:7.1f} MB   peak {peak:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_response_cache.py
+# -*- coding: utf-8 -*-
+"""
+Car search through the API's response cache (api/response_cache.py), 2000 cars
+
+- cold:         cache cleared before every request (query + quote + JSON)
+- hit:          same search, current data version (cached body)
+- revalidated:  If-None-Match with the current ETag (304, no body)
+Then a mixed workload (searches over 20 date ranges, one order per 20
+requests), reporting hit ratio, 304s and memory held by the cache.
+Requests go through Flask's test client, so no network time is included.
+"""
+
+import random
+
+from benchmarks._common import use_temp_db, measure, report
+
+use_temp_db()
+
+import common.payment_app as payment_app
+from auth_service import hash_password
+from db.models import db, create_all_tables, Car, CustomerProfile, PricingRule, User
+from api import create_app
+
+N_CARS = 2000
+RANGES = [(f"{d:02d}-03-2030", f"{d + 2:02d}-03-2030") for d in range(1, 21)]
+
+
+def seed() -> None:
+    create_all_tables()
+    salt, digest, iterations = hash_password("pw", iterations=1)
+    with db.atomic():
+        user = User.create(name="u", email="u@x.io", password_salt=salt, password_hash=digest, iterations=iterations)
+        CustomerProfile.create(user=user, first_name="A", last_name="B", phone="1", id_document="X")
+        Car.insert_many([{"make": f"Make{i % 7}", "model": f"M{i}", "year": 2022, "kilometre": 10,
+                          "daily_rate": float(30 + i % 100)} for i in range(N_CARS)]).execute()
+        PricingRule.create(name="g", rule_type="discount", amount_type="percent", amount_value=10)
+
+
+def main() -> None:
+    payment_app.random.random = lambda: 0.5
+    seed()
+    app = create_app(secret="bench")
+    cache = app.extensions["response_cache"]
+    client = app.test_client()
+    token = client.post("/api/login", json={"email": "u@x.io", "password": "pw"}).json["token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    query = {"start": RANGES[0][0], "end": RANGES[0][1]}
+
+    def cold():
+        cache.clear()
+        assert client.get("/api/cars", headers=auth, query_string=query).status_code == 200
+
+    etag = client.get("/api/cars", headers=auth, query_string=query).headers["ETag"]
+    print(f"{N_CARS} cars, response body {cache.stats()['bytes'] / 1024:.0f} KiB")
+    report("search, cold (cache cleared)", *measure(cold, repeat=20))
+    report("search, cache hit", *measure(lambda: client.get("/api/cars", headers=auth, query_string=query),
+                                         repeat=50))
+    report("search, If-None-Match -> 304", *measure(
+        lambda: client.get("/api/cars", headers=dict(auth, **{"If-None-Match": etag}), query_string=query),
+        repeat=50))
+
+    # mixed: clients revalidate with the last ETag they saw for their range
+    cache.clear()
+    rnd, etags, car_ids = random.Random(3), {}, list(range(1, N_CARS + 1))
+    rnd.shuffle(car_ids)
+    for i in range(2000):
+        start, end = rnd.choice(RANGES)
+        if i % 20 == 19:
+            client.post("/api/orders", headers=auth, json={"car_id": car_ids.pop(), "start": "01-06-2030",
+                                                           "end": "02-06-2030", "pay_method": "paypal",
+                                                           "pay_kwargs": {}})
+            continue
+        headers = dict(auth, **({"If-None-Match": etags[start]} if start in etags else {}))
+        resp = client.get("/api/cars", headers=headers, query_string={"start": start, "end": end})
+        etags[start] = resp.headers["ETag"]
+    stats = cache.stats()
+    print(f"mixed 2000 requests (1 in 20 an order): hit ratio {stats['hit_ratio']:.2%}, "
+          f"304s {stats['not_modified']}, stale rebuilds {stats['stale']}, "
+          f"{stats['entries']} entries / {stats['bytes'] / 2**20:.1f} MiB held")
+
+
+if __name__ == "__main__":
+    main()
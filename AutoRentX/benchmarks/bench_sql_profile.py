@@ -0,0 +1,86 @@
+# benchmarks/bench_sql_profile.py
+# -*- coding: utf-8 -*-
+"""
+Cost of the SQL profiler (db/profiler.py) on the customer order flow
+
+The same flow (profile -> car search -> quote -> place_order_and_pay) runs
+with profiling off and on, alternating (every order takes a car out of the
+1000 in stock, so later runs search fewer cars). The profiled run then prints
+the report (per call site + slow statements with their query plan) and dumps
+it as JSON, the file a CI job would compare with `python -m db.profiler`.
+
+Usage: python -m benchmarks.bench_sql_profile [slow_ms, default 1]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+from datetime import date, timedelta
+
+from benchmarks._common import use_temp_db, measure, report
+
+use_temp_db()
+
+import common.payment_app as payment_app
+from db.db_manager import DatabaseManager
+from db.models import db, create_all_tables, Car, CustomerProfile, PricingRule, User
+from db.profiler import format_report
+from customer_service.profile_service import ProfileService
+from customer_service.rent_service import RentService
+from admin_service.pricing_service import DATE_FMT
+
+SLOW_MS = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+CARS = 1000
+ORDERS = 50  # per run
+RUNS = 6    # per mode
+
+
+def seed() -> int:
+    create_all_tables()
+    with db.atomic():
+        user = User.create(name="u", email="u@x.io", password_salt=b"s", password_hash=b"h", iterations=1)
+        CustomerProfile.create(user=user, first_name="A", last_name="B", phone="1", id_document="X")
+        Car.insert_many([{"make": f"Make{i % 7}", "model": f"M{i}", "year": 2022, "kilometre": 10,
+                          "daily_rate": float(30 + i % 100)} for i in range(CARS)]).execute()
+        PricingRule.create(name="g", rule_type="discount", amount_type="percent", amount_value=10)
+    return user.id
+
+
+def main() -> None:
+    payment_app.random.random = lambda: 0.5  # no simulated gateway failures
+    uid = seed()
+    rent, profiles = RentService(), ProfileService()
+    slot = iter(range(10**6))
+
+    def flow():
+        for _ in range(ORDERS):
+            n = next(slot)
+            day = (date(2030, 1, 1) + timedelta(days=2 * n)).strftime(DATE_FMT)
+            profiles.get_my_profile(uid)
+            car = rent.available_cars(day, day, make=f"Make{n % 7}")[0]
+            rent.quote(car.id, day, day)
+            rent.place_order_and_pay(actor_user_id=uid, user_id=uid, car_id=car.id, start_str=day, end_str=day,
+                                     pay_method="paypal", pay_kwargs={"email": "a@b.io"})
+
+    manager = DatabaseManager()
+    profiler = manager.enable_profiling(slow_ms=SLOW_MS)
+    samples = {"off": [], "on": []}
+    for _ in range(RUNS):
+        manager.db.profiler = None
+        samples["off"].append(measure(flow, repeat=1)[0])
+        manager.db.profiler = profiler  # the same one every time: the report covers all "on" runs
+        samples["on"].append(measure(flow, repeat=1)[0])
+    manager.disable_profiling()
+    for mode, values in samples.items():
+        report(f"{ORDERS} orders, profiling {mode}", min(values), statistics.median(values))
+
+    print()
+    print(format_report(profiler.report(), limit=8))
+    path = os.path.join(tempfile.gettempdir(), "autorentx_sql_profile.json")
+    result = profiler.dump(path)
+    print(f"\n{len(result['statements'])} statements at {len(result['call_sites'])} call sites dumped to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_startup.py
+# -*- coding: utf-8 -*-
+"""
+Time-to-first-menu: schema bootstrap + service construction
+
+"before" replays the DDL that every service constructor used to issue
+(db.create_tables per service, repeated on each admin login);
+"after" is the one-time create_all_tables() bootstrap followed by DDL-free
+service construction.
+"""
+
+from benchmarks._common import use_temp_db, measure, report
+
+use_temp_db()
+
+from db.models import db, create_all_tables, User, AuditLog, PricingRule, Booking, CustomerProfile, Payment
+from auth_service import PeeweeAuthService
+from admin_service.car_service import PeeweeCarService
+from admin_service.audit_service import AuditService
+from admin_service.pricing_service import PricingService
+from admin_service.booking_review_service import BookingReviewService
+from customer_service.profile_service import ProfileService
+from customer_service.rent_service import RentService
+from controllers import MenuFactory
+
+# tables each constructor created before the bootstrap step existed
+LEGACY_CTOR_DDL = {
+    "auth": [User], "car": [Payment], "audit": [AuditLog], "pricing": [PricingRule],
+    "review": [Booking], "profile": [CustomerProfile], "rent": [Booking],
+}
+ADMIN = User(id=1, name="bench", email="bench@x.io", role="admin")
+
+
+def _legacy_ddl(*keys):
+    for k in keys:
+        db.create_tables(LEGACY_CTOR_DDL[k])
+
+
+def first_menu_before():
+    _legacy_ddl("auth", "car", "audit")
+    auth, cars = PeeweeAuthService(), PeeweeCarService()
+    MenuFactory.create(None, auth, cars)
+    # admin login: AdminMenu builds audit, pricing and review services
+    _legacy_ddl("audit", "pricing", "review")
+    MenuFactory.create("admin", auth, cars, ADMIN)
+
+
+def first_menu_after():
+    create_all_tables(force=True)  # what a fresh process pays: one fingerprint lookup
+    auth, cars = PeeweeAuthService(), PeeweeCarService()
+    MenuFactory.create(None, auth, cars)
+    MenuFactory.create("admin", auth, cars, ADMIN)
+
+
+def admin_login_before():
+    _legacy_ddl("audit", "pricing", "review")
+    MenuFactory.create("admin", PeeweeAuthService(), PeeweeCarService(), ADMIN)
+
+
+def admin_login_after():
+    MenuFactory.create("admin", PeeweeAuthService(), PeeweeCarService(), ADMIN)
+
+
+if __name__ == "__main__":
+    create_all_tables()
+    report("time-to-first-menu (before: per-service DDL)", *measure(first_menu_before))
+    report("time-to-first-menu (after: one-time bootstrap)", *measure(first_menu_after))
+    report("admin login (before)", *measure(admin_login_before))
+    report("admin login (after)", *measure(admin_login_after))
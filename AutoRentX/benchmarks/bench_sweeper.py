@@ -0,0 +1,64 @@
+# benchmarks/bench_sweeper.py
+# -*- coding: utf-8 -*-
+"""
+Sweeper over 1M bookings: 10k cars, 100 back-to-back bookings per car, most
+of them in the past (confirmed -> completed) plus a slice of stale pending ones.
+Rows are generated inside SQLite (recursive CTE) so seeding stays fast; the
+overlap and counter triggers still run for every row.
+
+Measured: ~15 s with the per-row counter/version triggers firing for each of
+the 900k changed rows, ~11.5 s with them suspended and one recount per car.
+The rest is SQLite rewriting 900k booking rows (~3.5 s with every index
+dropped) and the three indexes that contain status, so at 1M bookings the
+sweep is not "a few seconds". It is linear in the rows it changes: a daily
+run only touches the bookings that ended since the last one.
+"""
+
+import time
+from datetime import date, timedelta
+
+from benchmarks._common import use_temp_db
+
+use_temp_db()
+
+from db.models import db, create_all_tables, Car, Booking, User
+from db.consistency import active_booking_drift
+from admin_service.audit_service import AuditService, AUDIT_SYNC
+from admin_service.sweeper_service import SweeperService, format_result
+
+N_CARS = 10_000
+PER_CAR = 100
+TODAY = date(2030, 1, 1)
+FIRST_DAY = TODAY - timedelta(days=3 * 90)   # 90 slots in the past, 10 from today on
+
+
+def seed():
+    create_all_tables()
+    with db.atomic():
+        User.create(name="u", email="u@x.io", password_salt=b"s", password_hash=b"h", iterations=1)
+        db.execute_sql(f"""
+            WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < {N_CARS})
+            INSERT INTO car (make, model, year, kilometre, daily_rate, min_days, max_days, status, active_bookings)
+            SELECT 'Make', 'M' || i, 2020, 1000, 50.0, 1, 30, 'reserved', 0 FROM seq""")
+        # slot k of car c: [FIRST_DAY + 3k, +1 day]; every 10th past slot was never reviewed
+        db.execute_sql(f"""
+            WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i < {N_CARS * PER_CAR - 1})
+            INSERT INTO booking (car_id, user_id, start_date, end_date, status, days, base_daily_rate, base_cost,
+                                 adj_total, grand_total, snap_first_name, snap_last_name, snap_phone,
+                                 snap_id_document, created_at)
+            SELECT i % {N_CARS} + 1, 1,
+                   date(?, '+' || (3 * (i / {N_CARS})) || ' days'),
+                   date(?, '+' || (3 * (i / {N_CARS}) + 1) || ' days'),
+                   CASE WHEN (i / {N_CARS}) % 10 = 3 THEN 'pending' ELSE 'confirmed' END,
+                   2, 50, 100, 0, 100, 'A', 'B', '1', 'X', datetime('now')
+            FROM seq""", (FIRST_DAY.isoformat(), FIRST_DAY.isoformat()))
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    seed()
+    print(f"seeded {Booking.select().count()} bookings on {Car.select().count()} cars "
+          f"in {time.perf_counter() - t0:.1f}s")
+    result = SweeperService(AuditService(AUDIT_SYNC)).sweep(today=TODAY)
+    print(format_result(result))
+    assert active_booking_drift() == []
@@ -0,0 +1,228 @@
+# common/availability_calendar.py
+# -*- coding: utf-8 -*-
+"""
+Day-bitmap availability calendar (NumPy)
+
+A rolling horizon (default 730 days from today) is stored as one row per car
+and one column per day, with a layer per active booking status (pending /
+confirmed). Cells count the bookings covering that day, so overlapping
+pending bookings can be removed one by one. Car status is kept alongside as a
+per-row "blocked" flag (maintenance / unavailable).
+
+"Which cars are busy for [S, E]" is then a single `layer[:, S:E+1].any(axis=1)`
+over all cars. Ranges reaching outside the horizon fall back to
+AvailabilityIndex. Like the index, the calendar is loaded once; the services
+apply their own changes right away (`record` on booking changes,
+`set_car_status` on car status changes), and before every query it replays the
+ChangeLog entries written since (db/changelog.py), so changes committed by
+other processes are seen too. It reloads itself when the day rolls over.
+"""
+
+from datetime import date, timedelta
+from threading import RLock
+from typing import Iterable, Optional
+
+import numpy as np
+
+from db.changelog import changes_since, latest_seq
+from db.models import (Booking, Car, BOOKING_PENDING, BOOKING_CONFIRMED,
+                       STATUS_MAINTENANCE, STATUS_UNAVAILABLE)
+from common.availability_index import AvailabilityIndex, ACTIVE_STATUSES
+
+HORIZON_DAYS = 730
+BLOCKED_STATUSES = (STATUS_MAINTENANCE, STATUS_UNAVAILABLE)
+
+# month grid cell marks
+MARK_FREE, MARK_PENDING, MARK_CONFIRMED, MARK_BLOCKED, MARK_OUTSIDE = ".", "p", "X", "M", " "
+
+
+class AvailabilityCalendar:
+    """
+    Availability calendar (Singleton)
+    car_id -> row; layers[status] is a (car rows x days) uint16 count array starting at `origin`
+    """
+    _instance = None
+
+    def __new__(cls, horizon_days: int = HORIZON_DAYS):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = RLock()
+            cls._instance.horizon_days = horizon_days
+            cls._instance._reset_state()
+        return cls._instance
+
+    def _reset_state(self) -> None:
+        self.origin = date.today().toordinal()
+        self._rows: dict[int, int] = {}
+        self._car_ids = np.zeros(0, dtype=np.int64)
+        self._blocked = np.zeros(0, dtype=bool)
+        self._layers = {s: np.zeros((0, self.horizon_days), dtype=np.uint16) for s in ACTIVE_STATUSES}
+        self._bookings: dict[int, tuple[int, str, int, int]] = {}
+        self._seq = 0  # last ChangeLog entry applied
+        self._loaded = False
+
+    # ---------- loading ----------
+    def load(self) -> None:
+        """(Re)build every layer from the Car and Booking tables"""
+        seq = latest_seq()  # before the rows: a change landing in between is replayed, not lost
+        cars = list(Car.select(Car.id, Car.status).tuples())
+        rows = list(Booking
+                    .select(Booking.id, Booking.car, Booking.status, Booking.start_date, Booking.end_date)
+                    .where(Booking.status.in_(ACTIVE_STATUSES) &
+                           (Booking.end_date >= date.today()))
+                    .tuples())
+        with self._lock:
+            self._reset_state()
+            self._grow(len(cars))
+            for car_id, status in cars:
+                self._blocked[self._row(car_id)] = status in BLOCKED_STATUSES
+
+            # paint all bookings at once: +1 on the first day, -1 after the last, then a running sum
+            spans = {status: ([], [], []) for status in ACTIVE_STATUSES}
+            for booking_id, car_id, status, start, end in rows:
+                s, e = start.toordinal(), end.toordinal()
+                self._bookings[booking_id] = (car_id, status, s, e)
+                span = self._clip(s, e)
+                if span:
+                    r, a, b = spans[status]
+                    r.append(self._row(car_id))
+                    a.append(span[0])
+                    b.append(span[1])
+            n = len(self._rows)
+            for status, (r, a, b) in spans.items():
+                diff = np.zeros((n, self.horizon_days + 1), dtype=np.int32)
+                np.add.at(diff, (np.asarray(r, dtype=np.intp), np.asarray(a, dtype=np.intp)), 1)
+                np.add.at(diff, (np.asarray(r, dtype=np.intp), np.asarray(b, dtype=np.intp)), -1)
+                self._layers[status][:n] = np.cumsum(diff[:, :-1], axis=1)
+            self._seq = seq
+            self._loaded = True
+
+    def invalidate(self) -> None:
+        """Drop everything; the next query reloads from the database"""
+        with self._lock:
+            self._reset_state()
+
+    def _ensure_current(self) -> None:
+        if not self._loaded or self.origin != date.today().toordinal():
+            self.load()
+            return
+        changes = changes_since(self._seq)
+        if changes is None:  # pruned past us, or a bulk change
+            self.load()
+            return
+        for car_id, status in changes.cars:
+            if status is not None:
+                self._blocked[self._row(car_id)] = status in BLOCKED_STATUSES
+        for booking in changes.bookings:
+            self.record_values(*booking)
+        self._seq = changes.seq
+
+    # ---------- rows / columns ----------
+    def _grow(self, capacity: int) -> None:
+        if capacity <= self._layers[BOOKING_PENDING].shape[0]:
+            return
+        capacity = max(capacity, 2 * self._layers[BOOKING_PENDING].shape[0], 16)
+        for status, layer in self._layers.items():
+            grown = np.zeros((capacity, self.horizon_days), dtype=np.uint16)
+            grown[:layer.shape[0]] = layer
+            self._layers[status] = grown
+        blocked = np.zeros(capacity, dtype=bool)
+        blocked[:len(self._blocked)] = self._blocked
+        self._blocked = blocked
+        car_ids = np.zeros(capacity, dtype=np.int64)
+        car_ids[:len(self._car_ids)] = self._car_ids
+        self._car_ids = car_ids
+
+    def _row(self, car_id: int) -> int:
+        row = self._rows.get(car_id)
+        if row is None:
+            row = len(self._rows)
+            self._grow(row + 1)
+            self._rows[car_id] = row
+            self._car_ids[row] = car_id
+        return row
+
+    def _clip(self, start: int, end: int) -> Optional[tuple[int, int]]:
+        """[start, end] ordinals -> [a, b) columns inside the horizon, or None"""
+        a, b = max(start - self.origin, 0), min(end - self.origin + 1, self.horizon_days)
+        return (a, b) if a < b else None
+
+    def _paint(self, car_id: int, status: str, start: int, end: int, add: bool) -> None:
+        span = self._clip(start, end)
+        if span:
+            cells = self._layers[status][self._row(car_id), span[0]:span[1]]
+            if add:
+                cells += 1
+            else:
+                cells -= 1
+
+    # ---------- updates ----------
+    def record(self, booking: Booking) -> None:
+        """Apply the current state of a booking (created, approved, rejected, cancelled …)"""
+        self.record_values(booking.id, booking.car_id, booking.status,
+                           booking.start_date, booking.end_date)
+
+    def record_values(self, booking_id: int, car_id: int, status: str, start: date, end: date) -> None:
+        with self._lock:
+            if not self._loaded:
+                return  # the first query loads this row from the DB
+            old = self._bookings.pop(booking_id, None)
+            if old is not None:
+                self._paint(*old, add=False)
+            if status in ACTIVE_STATUSES:
+                s, e = start.toordinal(), end.toordinal()
+                self._bookings[booking_id] = (car_id, status, s, e)
+                self._paint(car_id, status, s, e, add=True)
+
+    def set_car_status(self, car_id: int, status: str) -> None:
+        with self._lock:
+            if self._loaded:
+                self._blocked[self._row(car_id)] = status in BLOCKED_STATUSES
+
+    # ---------- queries ----------
+    def in_horizon(self, start: date, end: date) -> bool:
+        return (self.origin <= start.toordinal()
+                and end.toordinal() < self.origin + self.horizon_days)
+
+    def busy_car_ids(self, start: date, end: date,
+                     statuses: Iterable[str] = ACTIVE_STATUSES,
+                     car_ids: Optional[Iterable[int]] = None) -> set[int]:
+        """Cars (optionally restricted to car_ids) with a booking in `statuses` on any day of [start, end]"""
+        statuses = tuple(statuses)
+        with self._lock:
+            self._ensure_current()
+            if not self.in_horizon(start, end):
+                return AvailabilityIndex().busy_car_ids(start, end, statuses, car_ids)
+            n = len(self._rows)
+            a, b = start.toordinal() - self.origin, end.toordinal() - self.origin + 1
+            busy = np.zeros(n, dtype=bool)
+            for status in statuses:
+                busy |= self._layers[status][:n, a:b].any(axis=1)
+            ids = set(self._car_ids[:n][busy].tolist())
+        return ids if car_ids is None else ids & set(car_ids)
+
+    def month_grid(self, year: int, month: int, car_ids: Iterable[int]) -> dict[int, str]:
+        """
+        car_id -> one mark per day of the month:
+        X confirmed, p pending, M blocked (maintenance/unavailable), . free, blank outside the horizon
+        """
+        first = date(year, month, 1)
+        last = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        with self._lock:
+            self._ensure_current()
+            a, b = first.toordinal() - self.origin, last.toordinal() - self.origin + 1
+            lo, hi = max(a, 0), min(b, self.horizon_days)
+            grid = {}
+            for car_id in car_ids:
+                row = self._rows.get(car_id)
+                marks = np.full(b - a, MARK_OUTSIDE)
+                if lo < hi:
+                    inside = marks[lo - a:hi - a]
+                    inside[:] = MARK_FREE
+                    if row is not None:
+                        if self._blocked[row]:
+                            inside[:] = MARK_BLOCKED
+                        inside[self._layers[BOOKING_PENDING][row, lo:hi] > 0] = MARK_PENDING
+                        inside[self._layers[BOOKING_CONFIRMED][row, lo:hi] > 0] = MARK_CONFIRMED
+                grid[car_id] = "".join(marks.tolist())
+            return grid
@@ -0,0 +1,198 @@
+# common/availability_index.py
+# -*- coding: utf-8 -*-
+"""
+In-memory interval index for car availability
+
+Keeps, per car and per booking status, the active booking intervals sorted by
+start date together with a prefix maximum of the end dates. "Does any booking
+of car X overlap [S, E]?" is then one bisect plus one array lookup (O(log n),
+n = active bookings of that car and status).
+
+Writes are not O(log n): list.insert/del shift the tail of the lists (a C
+memmove, O(n)), and the prefix maximum is recomputed lazily, on the next query,
+from the first changed position onwards. A booking appended after the car's
+existing ones (the usual case) therefore costs O(1) amortised; one inserted in
+front of k others costs O(k).
+
+The index is loaded once from the Booking table. The services record their own
+booking changes right away; before every query the index also replays the
+ChangeLog entries it has not applied yet (db/changelog.py), so bookings written
+by other processes are seen too.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+from threading import RLock
+from typing import Iterable, Optional
+
+from db.changelog import changes_since, latest_seq
+from db.models import Booking, BOOKING_PENDING, BOOKING_CONFIRMED
+
+# Statuses that occupy a car; cancelled/completed bookings are never indexed
+ACTIVE_STATUSES = (BOOKING_PENDING, BOOKING_CONFIRMED)
+
+
+class _IntervalSet:
+    """Intervals of one car/status, sorted by (start, booking_id)"""
+
+    __slots__ = ("keys", "ends", "_max_end", "_dirty_from")
+
+    def __init__(self):
+        self.keys: list[tuple[int, int]] = []   # (start ordinal, booking id)
+        self.ends: list[int] = []               # end ordinal, parallel to keys
+        self._max_end: list[int] = []           # prefix max of ends, valid before _dirty_from
+        self._dirty_from: Optional[int] = None  # first position whose prefix max is stale
+
+    def add(self, booking_id: int, start: int, end: int) -> None:
+        key = (start, booking_id)
+        i = bisect_left(self.keys, key)
+        self.keys.insert(i, key)
+        self.ends.insert(i, end)
+        self._mark(i)
+
+    def remove(self, booking_id: int, start: int) -> None:
+        key = (start, booking_id)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+            del self.ends[i]
+            self._mark(i)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        # intervals with start1 <= end are candidates; one of them overlaps iff max(end1) >= start
+        i = bisect_right(self.keys, (end, float("inf")))
+        if i == 0:
+            return False
+        if self._dirty_from is not None:
+            self._rebuild()
+        return self._max_end[i - 1] >= start
+
+    def _mark(self, i: int) -> None:
+        if self._dirty_from is None or i < self._dirty_from:
+            self._dirty_from = i
+
+    def _rebuild(self) -> None:
+        """Recompute the prefix max from _dirty_from to the end; the part before it is still valid"""
+        i = self._dirty_from
+        max_end = self._max_end
+        del max_end[i:]
+        running = max_end[-1] if max_end else -1
+        for e in self.ends[i:]:
+            if e > running:
+                running = e
+            max_end.append(running)
+        self._dirty_from = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class AvailabilityIndex:
+    """
+    Availability engine (Singleton)
+    booking_id -> (car_id, status, start, end) plus car_id -> status -> _IntervalSet
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = RLock()
+            cls._instance._reset_state()
+        return cls._instance
+
+    def _reset_state(self) -> None:
+        self._cars: dict[int, dict[str, _IntervalSet]] = {}
+        self._bookings: dict[int, tuple[int, str, int, int]] = {}
+        self._seq = 0  # last ChangeLog entry applied
+        self._loaded = False
+
+    # ---------- loading ----------
+    def load(self) -> None:
+        """(Re)build the whole index from the Booking table"""
+        seq = latest_seq()  # before the rows: a change landing in between is replayed, not lost
+        rows = (Booking
+                .select(Booking.id, Booking.car, Booking.status, Booking.start_date, Booking.end_date)
+                .where(Booking.status.in_(ACTIVE_STATUSES))
+                .tuples())
+        with self._lock:
+            self._reset_state()
+            for booking_id, car_id, status, start, end in rows:
+                self._add(booking_id, car_id, status, start.toordinal(), end.toordinal())
+            self._seq = seq
+            self._loaded = True
+
+    def invalidate(self) -> None:
+        """Drop everything; the next query reloads from the database"""
+        with self._lock:
+            self._reset_state()
+
+    def _ensure_current(self) -> None:
+        if not self._loaded:
+            self.load()
+            return
+        changes = changes_since(self._seq)
+        if changes is None:  # pruned past us, or a bulk change
+            self.load()
+            return
+        for booking_id, car_id, status, start, end in changes.bookings:
+            self._discard(booking_id)
+            if status in ACTIVE_STATUSES:
+                self._add(booking_id, car_id, status, start.toordinal(), end.toordinal())
+        self._seq = changes.seq
+
+    # ---------- updates ----------
+    def _add(self, booking_id: int, car_id: int, status: str, start: int, end: int) -> None:
+        per_car = self._cars.setdefault(car_id, {})
+        per_car.setdefault(status, _IntervalSet()).add(booking_id, start, end)
+        self._bookings[booking_id] = (car_id, status, start, end)
+
+    def _discard(self, booking_id: int) -> None:
+        old = self._bookings.pop(booking_id, None)
+        if old is None:
+            return
+        car_id, status, start, _ = old
+        self._cars[car_id][status].remove(booking_id, start)
+
+    def record(self, booking: Booking) -> None:
+        """Apply the current state of a booking (created, approved, rejected, cancelled …)"""
+        self.record_values(booking.id, booking.car_id, booking.status,
+                           booking.start_date, booking.end_date)
+
+    def record_values(self, booking_id: int, car_id: int, status: str, start: date, end: date) -> None:
+        with self._lock:
+            if not self._loaded:
+                # nothing cached yet; the first query will load this row from the DB
+                return
+            self._discard(booking_id)
+            if status in ACTIVE_STATUSES:
+                self._add(booking_id, car_id, status, start.toordinal(), end.toordinal())
+
+    # ---------- queries ----------
+    def has_overlap(self, car_id: int, start: date, end: date,
+                    statuses: Iterable[str] = ACTIVE_STATUSES) -> bool:
+        """True if car_id has a booking in `statuses` overlapping [start, end] (inclusive)"""
+        with self._lock:
+            self._ensure_current()
+            return self._has_overlap(car_id, start.toordinal(), end.toordinal(), statuses)
+
+    def _has_overlap(self, car_id: int, s: int, e: int, statuses: Iterable[str]) -> bool:
+        per_car = self._cars.get(car_id)
+        if not per_car:
+            return False
+        for status in statuses:
+            iset = per_car.get(status)
+            if iset and iset.overlaps(s, e):
+                return True
+        return False
+
+    def busy_car_ids(self, start: date, end: date,
+                     statuses: Iterable[str] = ACTIVE_STATUSES,
+                     car_ids: Optional[Iterable[int]] = None) -> set[int]:
+        """Cars (optionally restricted to car_ids) with an overlapping booking in `statuses`"""
+        statuses = tuple(statuses)
+        s, e = start.toordinal(), end.toordinal()
+        with self._lock:
+            self._ensure_current()
+            candidates = self._cars.keys() if car_ids is None else car_ids
+            return {cid for cid in candidates if self._has_overlap(cid, s, e, statuses)}
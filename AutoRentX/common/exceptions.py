@@ -24,6 +24,10 @@ class AppPermissionError(AppError):
     """Permission denied (avoid shadowing built-in)"""
     pass
 
+class AuthenticationError(AppError):
+    """Not logged in / bad credentials / invalid token"""
+    pass
+
 class DatabaseError(AppError):
     """DB error wrapper"""
     pass
@@ -0,0 +1,78 @@
+# common/pagination.py
+# -*- coding: utf-8 -*-
+"""
+Keyset (cursor) pagination on the primary key
+
+Lists are shown newest first (id DESC). A page is fetched with
+`WHERE id < cursor ORDER BY id DESC LIMIT n+1` (or `id > cursor ... ASC`
+going back), so its cost is O(page size) however deep the user pages;
+no OFFSET is ever used. The extra row only tells whether another page exists.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Generic, Iterator, Optional, TypeVar
+
+from peewee import Field, ModelSelect
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 500
+
+
+@dataclass
+class Page(Generic[T]):
+    """One page of rows; pass next_cursor as `after` / prev_cursor as `before` to move"""
+    items: list[T] = field(default_factory=list)
+    next_cursor: Optional[int] = None  # id of the last row, if older rows exist
+    prev_cursor: Optional[int] = None  # id of the first row, if newer rows exist
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def keyset_page(query: ModelSelect, key: Field, *, after: Optional[int] = None,
+                before: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                row: Optional[Callable[[tuple], T]] = None) -> Page:
+    """
+    Slice `query` (any ordering on it is replaced) into a page ordered by `key` DESC.
+    - after:  rows with key < after (next page)
+    - before: rows with key > before (previous page)
+    - row:    for a .tuples() query, wraps each tuple (e.g. CarRow._make, see common.rows)
+    """
+    if after is not None and before is not None:
+        raise ValueError("Pass either 'after' or 'before', not both")
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    if before is not None:
+        rows = list(query.where(key > before).order_by(key.asc()).limit(limit + 1))
+        more_newer = len(rows) > limit
+        rows = rows[:limit][::-1]
+        more_older = True  # we came back from the page starting at `before`
+    else:
+        if after is not None:
+            query = query.where(key < after)
+        rows = list(query.order_by(key.desc()).limit(limit + 1))
+        more_older = len(rows) > limit
+        rows = rows[:limit]
+        more_newer = after is not None
+
+    if not rows:
+        return Page()
+    if row is not None:
+        rows = [row(r) for r in rows]
+    first, last = getattr(rows[0], key.name), getattr(rows[-1], key.name)
+    return Page(rows,
+                next_cursor=last if more_older else None,
+                prev_cursor=first if more_newer else None)
@@ -3,7 +3,7 @@
 """
 Mock Payment Gateway (for CLI project)
 
-unified interface: PaymentRequest + PaymentGateway.process()
+unified interface: PaymentRequest + PaymentGateway.process() / refund()
 support multiple methods: paypal, stripe, creditcard, banktransfer, crypto, googlepay
 """
 
@@ -83,3 +83,15 @@ class PaymentGateway:
             msg = f"Unknown method: {method}"
 
         return PaymentResult(ok=True, message=msg, txn_id=txn_id)
+
+    def refund(self, method: str, txn_id: str, req: PaymentRequest) -> PaymentResult:
+        """
+        Give back a completed payment (e.g. the order could not be stored after paying)
+
+        :param txn_id: txn_id of the payment to refund
+        :return: PaymentResult; txn_id is the refund's own transaction ID
+        """
+        if not txn_id:
+            return PaymentResult(ok=False, message="No transaction to refund", txn_id=None)
+        return PaymentResult(ok=True, message=f"refunded {req.amount:.2f} {req.currency} of {txn_id}",
+                             txn_id=f"REFUND-{uuid.uuid4().hex[:12]}")
@@ -0,0 +1,69 @@
+# common/rows.py
+# -*- coding: utf-8 -*-
+"""
+Read-only listing rows
+
+Listings that are only printed don't need Model instances (a __dict__, a
+__data__ dict, dirty tracking and default handling per row). With
+readonly=True the services select just the columns below, fetch them with
+.tuples() and wrap each tuple in one of these NamedTuples: slotted, immutable,
+attribute access like the model.
+
+Field names are the table's column names (so FKs read `car_id`), and
+`select_rows()` builds the matching SELECT.
+"""
+
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+
+from peewee import Model, ModelSelect
+
+
+class CarRow(NamedTuple):
+    """Admin car list"""
+    id: int
+    make: str
+    model: str
+    year: int
+    kilometre: int
+    daily_rate: float
+    status: str
+
+
+class CarOfferRow(NamedTuple):
+    """Customer search results (enough for quote_many and the result line)"""
+    id: int
+    make: str
+    model: str
+    year: int
+    daily_rate: float
+
+
+class RuleRow(NamedTuple):
+    id: int
+    name: str
+    rule_type: str
+    amount_type: str
+    amount_value: float
+    scope: str
+    car_id: Optional[int]
+    min_days: int
+    start_date: Optional[date]
+    end_date: Optional[date]
+    is_active: bool
+
+
+class AuditRow(NamedTuple):
+    id: int
+    created_at: datetime
+    actor_user_id: int
+    action: str
+    target_type: str
+    target_id: Optional[int]
+    detail: Optional[str]
+
+
+def select_rows(model: type[Model], row: type[NamedTuple]) -> ModelSelect:
+    """SELECT only row's columns from model, as plain tuples (wrap each with row._make)"""
+    columns = model._meta.columns
+    return model.select(*(columns[name] for name in row._fields)).tuples()
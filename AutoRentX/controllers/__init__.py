@@ -1,23 +1,29 @@
 # controllers/__init__.py
 # -*- coding: utf-8 -*-
-from typing import Optional
-from auth_service import PeeweeAuthService
-from db.models import User as DbUser
-from admin_service.car_service import PeeweeCarService
-from .public_menu import PublicMenu
-from .admin_menu import AdminMenu
-from .customer_menu import CustomerMenu
+"""
+Menus are imported on demand: the admin and customer menus (and the
+services they build) are only loaded once a user with that role logs in.
+"""
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from auth_service import PeeweeAuthService
+    from db.models import User as DbUser
+    from admin_service.car_service import PeeweeCarService
 
 class MenuFactory:
     """Factory Method for Menus"""
 
     @staticmethod
     def create(role: Optional[str],
-               auth: PeeweeAuthService,
-               cars: PeeweeCarService,
-               current_user: Optional[DbUser] = None):
+               auth: "PeeweeAuthService",
+               cars: "PeeweeCarService",
+               current_user: Optional["DbUser"] = None):
         if role is None:
+            from .public_menu import PublicMenu
             return PublicMenu(auth, cars, current_user)
         if role == "admin":
+            from .admin_menu import AdminMenu
             return AdminMenu(auth, cars, current_user)
+        from .customer_menu import CustomerMenu
         return CustomerMenu(auth, cars, current_user)
@@ -1,12 +1,18 @@
 # controllers/admin_booking_review_cli.py 〔新增 / new file〕
 # -*- coding: utf-8 -*-
+import calendar
+from datetime import date, datetime
+from typing import Optional
 from admin_service.booking_review_service import BookingReviewService
+from admin_service.car_service import PeeweeCarService
 from common.input_utils import prompt_id, prompt_choice
+from controllers.pager import browse
 
 class AdminBookingReviewCLI:
-    def __init__(self, svc: BookingReviewService, current_user_id: int):
+    def __init__(self, svc: BookingReviewService, current_user_id: int, cars: Optional[PeeweeCarService] = None):
         self.svc = svc
         self.uid = current_user_id
+        self.cars = cars or PeeweeCarService()
 
     def show(self):
         while True:
@@ -14,6 +20,8 @@ class AdminBookingReviewCLI:
 === Booking Review ===
 1) List pending
 2) Review (approve/reject)
+3) Availability calendar (month)
+4) Bulk review (several ids / all pending of a car)
 0) Back
 """)
             c = input("Choose: ").strip()
@@ -21,6 +29,10 @@ class AdminBookingReviewCLI:
                 self._list_pending()
             elif c == "2":
                 self._review()
+            elif c == "3":
+                self._month_grid()
+            elif c == "4":
+                self._bulk_review()
             elif c == "0":
                 break
             else:
@@ -48,3 +60,71 @@ class AdminBookingReviewCLI:
                 print(f"✓ Rejected: #{b.id}")
         except Exception as e:
             print("✗ Error:", e)
+
+    def _bulk_review(self):
+        s = input("Booking IDs (e.g. 3,5,8-12), 'car:<id>' for all pending of a car, or 'all': ").strip().lower()
+        try:
+            ids = _parse_selection(s, self.svc)
+        except ValueError as e:
+            print("✗ Invalid selection:", e)
+            return
+        if not ids:
+            print("No bookings selected")
+            return
+        decision = prompt_choice("Decision", ["approve","reject"], "approve")
+        if prompt_choice(f"{decision.capitalize()} {len(ids)} booking(s)?", ["y","n"], "n") != "y":
+            return
+        try:
+            if decision == "approve":
+                done = self.svc.approve_many(actor_user_id=self.uid, booking_ids=ids)
+            else:
+                done = self.svc.reject_many(actor_user_id=self.uid, booking_ids=ids)
+            print(f"✓ {'Approved' if decision == 'approve' else 'Rejected'} {len(done)} booking(s)")
+        except Exception as e:
+            print("✗ Error:", e)
+
+    def _month_grid(self):
+        today = date.today()
+        s = input(f"Month MM-YYYY [{today:%m-%Y}]: ").strip()
+        try:
+            month = datetime.strptime(s, "%m-%Y").date() if s else today.replace(day=1)
+        except ValueError:
+            print("✗ Invalid month, expected MM-YYYY")
+            return
+        days = calendar.monthrange(month.year, month.month)[1]
+        print(f"{calendar.month_name[month.month]} {month.year}   X confirmed  p pending  M maintenance/unavailable  . free")
+        print(" " * 10 + "".join(str(d % 10) for d in range(1, days + 1)))
+
+        grid: dict[int, str] = {}
+
+        def fetch(**cursor):
+            page = self.cars.page_cars(readonly=True, **cursor)
+            grid.update(self.svc.availability_grid(month.year, month.month, [c.id for c in page]))
+            return page
+
+        browse(fetch, lambda c: print(f"car#{c.id:<5} {grid[c.id]}  {c.make} {c.model}"), "No cars")
+
+
+
+MAX_SELECTION = 1000  # typed ids/ranges; 'all' and 'car:<id>' are not capped
+
+
+def _parse_selection(s: str, svc: BookingReviewService) -> list[int]:
+    """'3,5,8-12' -> [3, 5, 8, 9, 10, 11, 12]; 'car:7' / 'all' -> pending ids"""
+    if s == "all":
+        return svc.pending_ids()
+    if s.startswith("car:"):
+        return svc.pending_ids(car_id=int(s[4:]))
+    ids: list[int] = []
+    for part in filter(None, (p.strip() for p in s.split(","))):
+        lo, _, hi = part.partition("-")
+        try:
+            lo, hi = int(lo), int(hi or lo)
+        except ValueError:
+            raise ValueError(f"'{part}' is not an id or a range like 8-12") from None
+        if lo > hi:
+            raise ValueError(f"range {part} is reversed, did you mean {hi}-{lo}?")
+        if len(ids) + hi - lo + 1 > MAX_SELECTION:
+            raise ValueError(f"more than {MAX_SELECTION} ids, use 'car:<id>' or 'all'")
+        ids.extend(range(lo, hi + 1))
+    return ids
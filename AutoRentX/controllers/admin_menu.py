@@ -1,6 +1,7 @@
 # controllers/admin_menu.py
 # -*- coding: utf-8 -*-
 
+from datetime import date, datetime, timedelta
 from typing import Optional
 from controllers.admin_booking_review_cli import AdminBookingReviewCLI
 from db.models import User as DbUser
@@ -10,9 +11,13 @@ from .car_admin_cli import CarAdminCLI
 
 from controllers.admin_pricing_cli import AdminPricingCLI
 from controllers.admin_audit_cli import AdminAuditCLI
+from controllers.admin_sql_profile_cli import AdminSqlProfileCLI
 from admin_service.pricing_service import PricingService
 from admin_service.audit_service import AuditService
 from admin_service.booking_review_service import BookingReviewService
+from admin_service.sweeper_service import SweeperService, format_result
+from admin_service.archive_service import ArchiveService, DEFAULT_RETENTION_DAYS
+from common.input_utils import prompt_date
 
 class AdminMenu(BaseMenu):
     """Admin menu"""
@@ -23,7 +28,7 @@ class AdminMenu(BaseMenu):
         self.pricing_cli = AdminPricingCLI(self.pricing, safe_pk(self.current_user))
         self.audit_cli = AdminAuditCLI(self.audit)
         self.booking_review = AdminBookingReviewCLI(BookingReviewService(self.audit),
-                                                    safe_pk(self.current_user))
+                                                    safe_pk(self.current_user), self.cars)
 
     def show(self):
         # Logged-in state is ensured in main, directly show admin main menu here
@@ -37,6 +42,9 @@ class AdminMenu(BaseMenu):
             print("3) Booking review")
             print("4) Pricing rules")
             print("5) Audit logs")
+            print("6) Sweep past bookings (complete / expire / free cars)")
+            print("7) Archive closed bookings")
+            print("8) SQL profile")
             print("9) Logout")
             print("0) Exit")
             choice = input("Choose: ").strip()
@@ -58,6 +66,12 @@ class AdminMenu(BaseMenu):
                 self.pricing_cli.show()
             elif choice == "5":
                 self.audit_cli.show()
+            elif choice == "6":
+                self._sweep()
+            elif choice == "7":
+                self._archive()
+            elif choice == "8":
+                AdminSqlProfileCLI().show()
             elif choice == "9":
                 # Hand over to main, set to not logged in
                 return None
@@ -67,3 +81,20 @@ class AdminMenu(BaseMenu):
             else:
                 print("Invalid choice")
 
+    def _sweep(self):
+        try:
+            print(format_result(SweeperService(self.audit).sweep(actor_user_id=safe_pk(self.current_user))))
+        except Exception as e:
+            print("✗ Sweep failed:", e)
+
+    def _archive(self):
+        svc = ArchiveService(self.audit)
+        try:
+            print("Before: " + ", ".join(f"{k}={v}" for k, v in svc.counts().items()))
+            default = date.today() - timedelta(days=DEFAULT_RETENTION_DAYS)
+            cutoff = datetime.strptime(prompt_date("Archive closed bookings that ended before",
+                                                   default.strftime("%d-%m-%Y")), "%d-%m-%Y").date()
+            r = svc.archive(actor_user_id=safe_pk(self.current_user), cutoff=cutoff)
+            print(f"✓ Archived {r.bookings} booking(s) and {r.payments} payment(s) in {r.batches} batch(es)")
+        except Exception as e:
+            print("✗ Archive failed:", e)
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 from admin_service.pricing_service import PricingService, DATE_FMT
 from common.input_utils import prompt_str, prompt_choice, prompt_float, prompt_int, prompt_id, prompt_date
+from controllers.pager import browse
 
 class AdminPricingCLI:
     def __init__(self, svc: PricingService, current_user_id: int):
@@ -66,10 +67,9 @@ class AdminPricingCLI:
             print("✗ Failed to toggle rule:", e)
 
     def _list(self):
-        rules = self.svc.list_rules()
-        if not rules:
-            print("No rules")
-            return
-        for r in rules:
-            car_scope = f"car#{r.car.id}" if (r.scope == 'car' and r.car) else "global"
-            print(f"#{r.id} [{ 'ON' if r.is_active else 'OFF' }] {r.name} | {r.rule_type}/{r.amount_type}={r.amount_value} | scope={car_scope} | min_days={r.min_days} | {r.start_date or '-'}~{r.end_date or '-'}")
+        browse(lambda **cursor: self.svc.page_rules(readonly=True, **cursor), self._print_rule, "No rules")
+
+    @staticmethod
+    def _print_rule(r):
+        car_scope = f"car#{r.car_id}" if (r.scope == 'car' and r.car_id) else "global"
+        print(f"#{r.id} [{ 'ON' if r.is_active else 'OFF' }] {r.name} | {r.rule_type}/{r.amount_type}={r.amount_value} | scope={car_scope} | min_days={r.min_days} | {r.start_date or '-'}~{r.end_date or '-'}")
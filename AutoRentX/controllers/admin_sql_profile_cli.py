@@ -0,0 +1,69 @@
+# controllers/admin_sql_profile_cli.py
+# -*- coding: utf-8 -*-
+from db.db_manager import DatabaseManager
+from db.profiler import DEFAULT_SLOW_MS, format_report
+from common.input_utils import prompt_str, prompt_float
+
+class AdminSqlProfileCLI:
+    def __init__(self, manager: DatabaseManager | None = None):
+        self.manager = manager or DatabaseManager()
+
+    def show(self):
+        while True:
+            state = "ON" if self.manager.profiler else "OFF"
+            print(f"""
+=== SQL Profile [{state}] ===
+1) Enable/Disable
+2) Show report
+3) Dump JSON
+4) Reset
+0) Back
+""")
+            c = input("Choose: ").strip()
+            if c == "1":
+                self._toggle()
+            elif c == "2":
+                self._report()
+            elif c == "3":
+                self._dump()
+            elif c == "4":
+                self._reset()
+            elif c == "0":
+                break
+            else:
+                print("Invalid choice")
+
+    def _toggle(self):
+        if self.manager.profiler:
+            self.manager.disable_profiling()
+            print("✓ Profiling off (collected data discarded)")
+            return
+        slow_ms = prompt_float("Slow query threshold (ms)", DEFAULT_SLOW_MS)
+        self.manager.enable_profiling(slow_ms=slow_ms)
+        print(f"✓ Profiling on, EXPLAIN captured for statements >= {slow_ms:g} ms")
+
+    def _report(self):
+        profiler = self.manager.profiler
+        if not profiler:
+            print("Profiling is off")
+            return
+        print(format_report(profiler.report()))
+
+    def _dump(self):
+        profiler = self.manager.profiler
+        if not profiler:
+            print("Profiling is off")
+            return
+        path = prompt_str("File", "sql_profile.json")
+        try:
+            report = profiler.dump(path)
+            print(f"✓ {len(report['statements'])} statement(s) written to {path}")
+        except OSError as e:
+            print("✗ Failed to write profile:", e)
+
+    def _reset(self):
+        if self.manager.profiler:
+            self.manager.profiler.reset()
+            print("✓ Profile cleared")
+        else:
+            print("Profiling is off")
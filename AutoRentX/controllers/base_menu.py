@@ -5,6 +5,7 @@ from db.models import db
 from auth_service import PeeweeAuthService
 from db.models import User as DbUser
 from admin_service.car_service import PeeweeCarService
+from admin_service.audit_service import flush_audit_buffer
 
 class BaseMenu:
     """Base class for menus"""
@@ -26,6 +27,7 @@ class BaseMenu:
     def goodbye_and_exit(self):
         print("Goodbye")
         try:
+            flush_audit_buffer()  # write queued audit rows before closing
             db.close()
         except Exception:
             pass
@@ -8,6 +8,7 @@ from common.exceptions import AppError, NotFoundError, ValidationError, Conflict
 from admin_service.car_service import PeeweeCarService
 from admin_service.audit_service import AuditService
 from common.input_utils import prompt_int, prompt_float, prompt_str, prompt_choice, prompt_id
+from controllers.pager import browse
 
 class CarAdminCLI:
     """Admin car-management CLI"""
@@ -26,6 +27,7 @@ class CarAdminCLI:
 2) Update car
 3) List cars
 4) Update car status
+5) Check booking counters
 0) Back
 """)
             choice = input("Choose: ").strip()
@@ -38,6 +40,8 @@ class CarAdminCLI:
                 self._list_cars()
             elif choice == "4":
                 self._update_status()
+            elif choice == "5":
+                self._check_counters()
             elif choice == "0":
                 break
             else:
@@ -120,13 +124,12 @@ class CarAdminCLI:
             print("✗ Unknown error:", e)
 
     def _list_cars(self):
-        cars = self.cars.list_cars()
-        if not cars:
-            print(" No cars")
-            return
-        for c in cars:
-            print(f"#{c.id} {c.make} {c.model} {c.year} | {c.kilometre} km | "
-                  f"${c.daily_rate}/day | {c.status}")
+        browse(lambda **cursor: self.cars.page_cars(readonly=True, **cursor), self._print_car, " No cars")
+
+    @staticmethod
+    def _print_car(c):
+        print(f"#{c.id} {c.make} {c.model} {c.year} | {c.kilometre} km | "
+              f"${c.daily_rate}/day | {c.status}")
 
     def _update_status(self):
         car_id = prompt_id("Car ID")
@@ -136,4 +139,11 @@ class CarAdminCLI:
             self.cars.update_car(car_id, actor_user_id=self.uid, status=st)   # 只传 status / pass status only
             print("✓ Status updated")
         except Exception as e:
-            print("✗ Error:", e)
\ No newline at end of file
+            print("✗ Error:", e)
+
+    def _check_counters(self):
+        from db.consistency import report
+        drift = self.cars.check_booking_counters()
+        print(report(drift))
+        if drift and input("Repair now? y/N: ").strip().lower() == "y":
+            print(f"✓ Repaired {self.cars.repair_booking_counters(actor_user_id=self.uid)} car(s)")
@@ -17,6 +17,7 @@ class CustomerRentCLI:
 1) Available cars by date
 2) Select car & place order
 3) My bookings
+4) Booking history (incl. archived)
 0) Back
 """)
             c = input("Choose: ").strip()
@@ -26,6 +27,8 @@ class CustomerRentCLI:
                 self._place_order()
             elif c == "3":
                 self._my_bookings()
+            elif c == "4":
+                self._history()
             elif c == "0":
                 break
             else:
@@ -34,12 +37,13 @@ class CustomerRentCLI:
     def _list_available(self):
         start, end = prompt_date_range("Start date", "End date")
         try:
-            cars = self.rent.available_cars(start, end)
+            cars = self.rent.available_cars(start, end, readonly=True)
             if not cars:
                 print("No available cars")
                 return
-            for c in cars:
-                print(f"#{c.id} {c.make} {c.model} {c.year} | ${c.daily_rate}/day")
+            quotes = self.rent.quote_many(cars, start, end)
+            for c, (_, _, total, _) in zip(cars, quotes):
+                print(f"#{c.id} {c.make} {c.model} {c.year} | ${c.daily_rate}/day | total ${total:.2f}")
         except Exception as e:
             print("✗ Error:", e)
 
@@ -52,6 +56,15 @@ class CustomerRentCLI:
             print(f"#{b.id} car#{b.car.id} {b.car.make} {b.car.model} "
                   f"{b.start_date}~{b.end_date} | status={b.status} | total={b.grand_total:.2f}")
 
+    def _history(self):
+        rows = self.rent.list_booking_history(self.uid)
+        if not rows:
+            print("No bookings yet")
+            return
+        for b in rows:
+            print(f"#{b.id} car#{b.car_id} {b.start_date}~{b.end_date} | status={b.status} | "
+                  f"total={b.grand_total:.2f}{' (archived)' if b.archived else ''}")
+
     def _place_order(self):
     # 1) Profile check
         p = self.profile.get_my_profile(self.uid)
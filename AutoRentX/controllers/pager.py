@@ -0,0 +1,43 @@
+# controllers/pager.py
+# -*- coding: utf-8 -*-
+"""
+Next/previous navigation over a keyset-paginated service listing
+"""
+
+from typing import Callable, Optional
+
+from common.pagination import Page
+
+
+def browse(fetch: Callable[..., Page], render: Callable[[object], None], empty_msg: str = "No records") -> None:
+    """
+    fetch(after=..., before=...) -> Page; render(row) prints one row.
+    n = next (older), p = previous (newer), anything else returns.
+    """
+    page = fetch()
+    if not page:
+        print(empty_msg)
+        return
+    number = 1
+    while True:
+        for row in page:
+            render(row)
+        options = []
+        if page.has_next:
+            options.append("n) Next")
+        if page.has_prev:
+            options.append("p) Previous")
+        if not options:
+            return
+        choice = input(f"-- page {number} -- {'  '.join(options)}  0) Back: ").strip().lower()
+        target: Optional[Page] = None
+        if choice == "n" and page.has_next:
+            target, number = fetch(after=page.next_cursor), number + 1
+        elif choice == "p" and page.has_prev:
+            target, number = fetch(before=page.prev_cursor), number - 1
+        else:
+            return
+        if not target:  # rows were deleted under us
+            print(empty_msg)
+            return
+        page = target
@@ -0,0 +1,100 @@
+# customer_service/async_facade.py
+# -*- coding: utf-8 -*-
+"""
+Async counterpart of RentService
+
+Same methods, same arguments, same exceptions; database work runs on the
+database executor (db/executor.py). place_order_and_pay is split around the
+payment: the slot is validated, quoted and held on a database worker, the
+PaymentGateway.process call is awaited in a separate thread (asyncio.to_thread),
+so payments in flight never occupy a database worker and many run at once,
+then the paid order is persisted on a database worker again.
+
+An order is not abandoned halfway when its caller is cancelled (client gone,
+request timeout): the order runs in its own task, shielded from the caller.
+Cancelled before the payment started, the hold is released and nothing is
+charged; cancelled later, the payment and complete_order still run to the
+end (booking stored, or payment refunded). `join()` waits for such orders,
+call it before stopping the event loop.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from db.executor import DbExecutor
+from db.models import Booking, Car
+from common.rows import CarOfferRow
+from customer_service.rent_service import RentService
+
+log = logging.getLogger(__name__)
+
+
+class AsyncRentService:
+    def __init__(self, sync: Optional[RentService] = None, executor: Optional[DbExecutor] = None):
+        self.sync = sync or RentService()
+        self.executor = executor or DbExecutor()
+        self._orders: set[asyncio.Task] = set()  # orders in flight, kept referenced until done
+
+    async def available_cars(self, start_str: str, end_str: str, *, make: Optional[str] = None,
+                             max_daily_rate: Optional[float] = None,
+                             readonly: bool = False) -> List[Car] | List[CarOfferRow]:
+        return await self.executor.run(self.sync.available_cars, start_str, end_str, make=make,
+                                       max_daily_rate=max_daily_rate, readonly=readonly)
+
+    async def list_my_bookings(self, user_id: int) -> list[Booking]:
+        return await self.executor.run(self.sync.list_my_bookings, user_id)
+
+    async def list_booking_history(self, user_id: int) -> list[Booking]:
+        return await self.executor.run(self.sync.list_booking_history, user_id)
+
+    async def quote(self, car_id: int, start_str: str, end_str: str) -> Tuple[int, float, list[tuple[int, float]], float, float]:
+        return await self.executor.run(self.sync.quote, car_id, start_str, end_str)
+
+    async def quote_many(self, cars: list[Car], start_str: str, end_str: str) -> list[Tuple[float, list[tuple[int, float]], float, float]]:
+        return await self.executor.run(self.sync.quote_many, cars, start_str, end_str)
+
+    async def create_pending_booking(self, *, actor_user_id: int, user_id: int, car_id: int,
+                                     start_str: str, end_str: str) -> Booking:
+        return await self.executor.run(self.sync.create_pending_booking, actor_user_id=actor_user_id,
+                                       user_id=user_id, car_id=car_id, start_str=start_str, end_str=end_str)
+
+    async def place_order_and_pay(self, *, actor_user_id: int, user_id: int, car_id: int, start_str: str,
+                                  end_str: str, pay_method: str, pay_kwargs: dict) -> Booking:
+        caller_gone = asyncio.Event()
+        task = asyncio.create_task(self._order(
+            caller_gone, actor_user_id=actor_user_id, user_id=user_id, car_id=car_id, start_str=start_str,
+            end_str=end_str, pay_method=pay_method, pay_kwargs=pay_kwargs))
+        self._orders.add(task)
+        task.add_done_callback(self._order_done)
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            caller_gone.set()  # the order finishes (or backs out before paying) without us
+            raise
+
+    async def _order(self, caller_gone: asyncio.Event, *, actor_user_id: int, user_id: int, car_id: int,
+                     start_str: str, end_str: str, pay_method: str, pay_kwargs: dict) -> Optional[Booking]:
+        order = await self.executor.run(self.sync.prepare_order, actor_user_id=actor_user_id, user_id=user_id,
+                                        car_id=car_id, start_str=start_str, end_str=end_str, pay_method=pay_method)
+        if caller_gone.is_set():  # nothing charged yet: give the slot back
+            await self.executor.run(self.sync.abandon_order, order)
+            return None
+        try:
+            result = await asyncio.to_thread(self.sync.gateway.process, pay_method, order.request,
+                                             **(pay_kwargs or {}))
+        except BaseException:
+            await self.executor.run(self.sync.abandon_order, order)
+            raise
+        return await self.executor.run(self.sync.complete_order, order, result)
+
+    def _order_done(self, task: asyncio.Task) -> None:
+        self._orders.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # the caller re-raises it if still waiting; logged for orders whose caller was cancelled
+            log.info("Order finished with %r", task.exception())
+
+    async def join(self) -> None:
+        """Wait for every order in flight, including those whose caller was cancelled"""
+        while self._orders:
+            await asyncio.gather(*self._orders, return_exceptions=True)
@@ -0,0 +1,68 @@
+# customer_service/hold_service.py
+# -*- coding: utf-8 -*-
+"""
+Reservation holds
+
+A hold claims car + dates for a short TTL while the customer pays, so the
+payment gateway can take seconds without keeping a database lock open and
+without the slot being sold twice:
+
+    hold = holds.acquire(...)      # one INSERT; the overlap trigger decides
+    ... call the payment gateway ...
+    with db.atomic():
+        holds.claim(hold)          # drop our hold so it does not block our own insert
+        Booking.create(...)        # the overlap trigger decides, live hold or not
+
+Live holds count as occupied in the booking/hold overlap triggers
+(db/migrations.py v6). Expired holds are ignored by the triggers and removed
+by `sweep_expired()`, which also runs before each acquire.
+"""
+
+import time
+from datetime import date
+
+from peewee import IntegrityError
+
+from db.models import ReservationHold, is_booking_overlap
+from common.exceptions import ConflictError, DatabaseError
+
+HOLD_TTL_SECONDS = 120
+
+
+class ReservationHoldService:
+    def __init__(self, ttl_seconds: float = HOLD_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+
+    def acquire(self, *, car_id: int, user_id: int, start: date, end: date) -> ReservationHold:
+        """Take a hold, or raise ConflictError if a booking or another live hold overlaps"""
+        self.sweep_expired()
+        try:
+            return ReservationHold.create(car=car_id, user=user_id, start_date=start, end_date=end,
+                                          expires_at=time.time() + self.ttl_seconds)
+        except IntegrityError as e:
+            if is_booking_overlap(e):
+                raise ConflictError("Slot already taken") from e
+            raise DatabaseError(f"Failed to hold the car: {e}") from e
+
+    def claim(self, hold: ReservationHold) -> bool:
+        """
+        Consume a hold (call inside the transaction that creates the booking); returns
+        whether it was still live. An expired hold is not a refusal: the customer has paid,
+        so the booking INSERT is attempted and the overlap trigger decides whether the
+        slot was sold meanwhile.
+        """
+        live = (ReservationHold
+                .delete()
+                .where((ReservationHold.id == hold.id) & (ReservationHold.expires_at > time.time()))
+                .execute())
+        if not live:
+            self.release(hold)  # expired, possibly not swept yet
+        return bool(live)
+
+    def release(self, hold: ReservationHold) -> None:
+        """Give the slot back (e.g. the payment failed)"""
+        ReservationHold.delete().where(ReservationHold.id == hold.id).execute()
+
+    def sweep_expired(self) -> int:
+        """Delete expired holds; returns how many"""
+        return ReservationHold.delete().where(ReservationHold.expires_at <= time.time()).execute()
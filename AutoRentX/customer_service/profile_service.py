@@ -2,21 +2,22 @@
 # -*- coding: utf-8 -*-
 from typing import Optional
 from datetime import datetime
-from db.db_manager import DatabaseManager
 from db.models import CustomerProfile
 from db.models import User as DbUser
+from db.group_commit import run_grouped
+from db.hot_queries import HotQueries
+from db.unit_of_work import remember
 from common.validators import Validator
 from common.exceptions import NotFoundError, DatabaseError
 from admin_service.audit_service import AuditService
 
 class ProfileService:
-    def __init__(self, audit: Optional[AuditService] = None):
-        db = DatabaseManager().db
-        db.create_tables([CustomerProfile])
+    def __init__(self, audit: Optional[AuditService] = None, hot: Optional[HotQueries] = None):
         self.audit = audit or AuditService()
+        self.hot = hot or HotQueries()
 
     def get_my_profile(self, user_id: int) -> Optional[CustomerProfile]:
-        return CustomerProfile.get_or_none(CustomerProfile.user == user_id)
+        return self.hot.profile(user_id)
 
     def create_or_update(self, *, actor_user_id: int, user_id: int, first_name: str, last_name: str, phone: str, id_document: str) -> CustomerProfile:
         # validate
@@ -29,7 +30,7 @@ class ProfileService:
         if not user:
             raise NotFoundError("User not found")
 
-        try:
+        def save() -> CustomerProfile:
             prof = CustomerProfile.get_or_none(CustomerProfile.user == user_id)
             if prof:
                 prof.first_name = first_name.strip()
@@ -50,5 +51,10 @@ class ProfileService:
                 )
                 self.audit.write(actor_user_id=actor_user_id, action="create_profile", target_type="profile", target_id=prof.id)
                 return prof
+
+        try:
+            prof = run_grouped(save)  # profile + audit row in one (group-committed) transaction
         except Exception as e:
             raise DatabaseError(f"Failed to save profile: {e}") from e
+        remember("profile", user_id, prof)  # later lookups in this unit of work see the new values
+        return prof
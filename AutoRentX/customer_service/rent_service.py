@@ -1,20 +1,65 @@
 # customer_service/rent_service.py
 # -*- coding: utf-8 -*-
-from datetime import datetime
-from typing import List, Tuple
-from common.payment_app import PaymentGateway, PaymentRequest
-from db.models import STATUS_RESERVED, Car, Booking, CustomerProfile, BOOKING_CONFIRMED, BOOKING_PENDING, STATUS_AVAILABLE, Payment
+import logging
+from datetime import date, datetime
+from typing import List, NamedTuple, Optional, Tuple
+from peewee import IntegrityError, fn
+from common.payment_app import PaymentGateway, PaymentRequest, PaymentResult
+from db.models import refresh_car_status, Car, Booking, CustomerProfile, ReservationHold, BOOKING_CONFIRMED, BOOKING_PENDING, STATUS_AVAILABLE, Payment, is_booking_overlap
 from db.db_manager import DatabaseManager
+from db.hot_queries import HotQueries
+from db.unit_of_work import unit_of_work
 from admin_service.pricing_service import PricingService, DATE_FMT
 from admin_service.audit_service import AuditService
+from common.availability_index import AvailabilityIndex
+from common.rows import CarOfferRow, select_rows
+from common.availability_calendar import AvailabilityCalendar
+from customer_service.hold_service import ReservationHoldService
 from common.exceptions import ValidationError, NotFoundError, ConflictError, DatabaseError
 
+log = logging.getLogger(__name__)
+
+
+class PreparedOrder(NamedTuple):
+    """An order validated, quoted and held by RentService.prepare_order, waiting for its payment"""
+    actor_user_id: int
+    user_id: int
+    car: Car
+    profile: CustomerProfile
+    start_str: str
+    end_str: str
+    start: date
+    end: date
+    days: int
+    base_cost: float
+    adjustments: list[tuple[int, float]]
+    grand_total: float
+    daily_rate: float
+    pay_method: str
+    hold: ReservationHold
+    request: PaymentRequest
+
+
 class RentService:
-    def __init__(self, pricing: PricingService | None = None, audit: AuditService | None = None):
-        db = DatabaseManager().db
-        db.create_tables([Booking])  # idempotent
+    def __init__(self, pricing: PricingService | None = None, audit: AuditService | None = None,
+                 holds: ReservationHoldService | None = None, gateway: PaymentGateway | None = None,
+                 hot: HotQueries | None = None):
         self.pricing = pricing or PricingService()
         self.audit = audit or AuditService()
+        self.holds = holds or ReservationHoldService()
+        self.gateway = gateway or PaymentGateway()
+        self.hot = hot or HotQueries()
+        self.availability = AvailabilityIndex()
+        self.calendar = AvailabilityCalendar()
+
+    def _lost_race(self) -> ConflictError:
+        """
+        The overlap trigger fired: another process booked the slot after our cached check.
+        Our caches missed that booking, so drop them.
+        """
+        self.availability.invalidate()
+        self.calendar.invalidate()
+        return ConflictError("The car is already booked for this period")
 
     @staticmethod
     def _parse_date(s: str):
@@ -23,34 +68,48 @@ class RentService:
         except ValueError as e:
             raise ValidationError(f"Invalid date format {DATE_FMT}") from e
 
-    def available_cars(self, start_str: str, end_str: str) -> List[Car]:
+    def available_cars(self, start_str: str, end_str: str, *, make: Optional[str] = None,
+                       max_daily_rate: Optional[float] = None, readonly: bool = False) -> List[Car] | List[CarOfferRow]:
+        """
+        Optional filters: make (case-insensitive), max_daily_rate.
+        readonly=True returns CarOfferRow tuples (what the search result shows)
+        """
         start = self._parse_date(start_str)
         end = self._parse_date(end_str)
         if end < start:
             raise ValidationError("End date cannot be earlier than start date")
 
         # only return cars with status=available and no confirmed bookings in the period
-        # from db.models import Booking
-        overlapping = (Booking
-                       .select(Booking.car)
-                       .where((Booking.status == BOOKING_CONFIRMED) &
-                              (Booking.start_date <= end) &
-                              (Booking.end_date >= start)))
-        q = Car.select().where((Car.status == STATUS_AVAILABLE) & (Car.id.not_in(overlapping)))
-        return list(q.order_by(Car.id.desc()))
+        query = select_rows(Car, CarOfferRow) if readonly else Car.select()
+        query = query.where(Car.status == STATUS_AVAILABLE).order_by(Car.id.desc())
+        if make:
+            query = query.where(fn.LOWER(Car.make) == make.lower())
+        if max_daily_rate is not None:
+            query = query.where(Car.daily_rate <= max_daily_rate)
+        cars = [CarOfferRow._make(r) for r in query] if readonly else list(query)
+        busy = self.calendar.busy_car_ids(start, end, (BOOKING_CONFIRMED,), [c.id for c in cars])
+        return [c for c in cars if c.id not in busy]
 
     def list_my_bookings(self, user_id: int) -> list[Booking]:
-        """My bookings"""
+        """My bookings; b.car (id/make/model) is pre-joined: one query"""
         return list(Booking
-            .select(Booking)
+            .select(Booking, Car.id, Car.make, Car.model)
+            .join(Car)
             .where((Booking.user == user_id) &
                    (Booking.status.in_([BOOKING_PENDING, BOOKING_CONFIRMED])))
             .order_by(Booking.id.desc()))
 
+    def list_booking_history(self, user_id: int) -> list[Booking]:
+        """All my bookings, live and archived (b.archived), newest first; see db.archive"""
+        from db.archive import booking_history  # imported here: attaches the archive file
+        return booking_history(user_id=user_id)
+
+    @unit_of_work()
     def quote(self, car_id: int, start_str: str, end_str: str) -> Tuple[int, float, list[tuple[int, float]], float, float]:
-        start = self._parse_date(start_str)
-        end = self._parse_date(end_str)
-        car = Car.get_or_none(Car.id == car_id)
+        return self._quote(car_id, self._parse_date(start_str), self._parse_date(end_str))
+
+    def _quote(self, car_id: int, start: date, end: date) -> Tuple[int, float, list[tuple[int, float]], float, float]:
+        car = self.hot.car(car_id)  # from the identity map when the caller already loaded it
         if not car or car.status != STATUS_AVAILABLE:
             raise NotFoundError("Car not found or not available")
 
@@ -58,32 +117,33 @@ class RentService:
         base_cost, adjustments, grand_total, daily_rate = self.pricing.quote(car=car, start_date=start, end_date=end)
         return days, base_cost, adjustments, grand_total, daily_rate
 
+    def quote_many(self, cars: list[Car], start_str: str, end_str: str) -> list[Tuple[float, list[tuple[int, float]], float, float]]:
+        """Batch quote for a car list (e.g. available_cars results); one entry per car"""
+        start = self._parse_date(start_str)
+        end = self._parse_date(end_str)
+        return self.pricing.quote_many(cars, start, end)
+
+    @unit_of_work()
     def create_pending_booking(self, *, actor_user_id: int, user_id: int, car_id: int, start_str: str, end_str: str) -> Booking:
         start = self._parse_date(start_str)
         end = self._parse_date(end_str)
         if end < start:
             raise ValidationError("End date cannot be earlier than start date")
 
-        car = Car.get_or_none(Car.id == car_id)
+        car = self.hot.car(car_id)
         if not car:
             raise NotFoundError("Car not found")
-        prof = CustomerProfile.get_or_none(CustomerProfile.user == user_id)
+        prof = self.hot.profile(user_id)
 
         if not prof:
             raise ConflictError("Incomplete personal information, unable to place order")
 
         # Check availability (no conflict with confirmed bookings)
-        conflict = Booking.select().where(
-            (Booking.car == car) &
-            (Booking.status == BOOKING_CONFIRMED) &
-            (Booking.start_date <= end) &
-            (Booking.end_date >= start)
-        ).exists()
-        if conflict:
+        if self.availability.has_overlap(car.id, start, end, (BOOKING_CONFIRMED,)):
             raise ConflictError("The car is already booked for this period")
 
         # Quote
-        days, base_cost, adjustments, grand_total, daily_rate = self.quote(car_id, start_str, end_str)
+        days, base_cost, adjustments, grand_total, daily_rate = self._quote(car_id, start, end)
 
         try:
             b = Booking.create(
@@ -104,21 +164,46 @@ class RentService:
             )
             self.audit.write(actor_user_id=actor_user_id, action="create_booking", target_type="booking", target_id=b.id,
                              detail=f"car={car_id} {start_str}->{end_str} pending")
+            self.availability.record(b)
+            self.calendar.record(b)
             return b
+        except IntegrityError as e:
+            if is_booking_overlap(e):
+                raise self._lost_race() from e
+            raise DatabaseError(f"Failed to create booking: {e}") from e
         except Exception as e:
             raise DatabaseError(f"Failed to create booking: {e}") from e
 
+    def _refund(self, order: PreparedOrder, result: PaymentResult, cause: Exception) -> bool:
+        """
+        The customer was charged but the booking was not stored: refund the charge and
+        audit it (no Payment row, there is no booking to attach it to). The audit row and
+        the log line carry the txn ids either way, so a failed refund can be followed up.
+        """
+        try:
+            refund = self.gateway.refund(order.pay_method, result.txn_id, order.request)
+        except Exception as e:
+            refund = PaymentResult(ok=False, message=str(e), txn_id=None)
+        detail = (f"car={order.car.id} {order.start_str}->{order.end_str} {order.pay_method} "
+                  f"amount={order.grand_total:.2f} txn={result.txn_id or ''} refund_txn={refund.txn_id or ''} "
+                  f"reason={cause}")
+        try:
+            self.audit.write(actor_user_id=order.actor_user_id,
+                             action="refund_payment" if refund.ok else "refund_failed",
+                             target_type="payment", detail=detail)
+        except Exception:
+            log.exception("Could not audit the refund of an unstored order: %s", detail)
+        if refund.ok:
+            log.warning("Order not stored after payment, refunded: %s", detail)
+        else:
+            log.error("Order not stored after payment, refund failed (%s): %s", refund.message, detail)
+        return refund.ok
+
     def _recompute_car_status(self, car: Car) -> None:
-        """Occupy or free car by active bookings"""
-        active_exists = (Booking
-            .select()
-            .where((Booking.car == car) &
-                   (Booking.status.in_([BOOKING_PENDING, BOOKING_CONFIRMED])))
-            .exists())
-        status_value: str = STATUS_RESERVED if active_exists else STATUS_AVAILABLE
-        setattr(car, "status", status_value)  # bypass CharField descriptor static type misjudgment
-        car.save()
+        """Occupy or free car by active bookings (trigger-maintained counter)"""
+        setattr(car, "status", refresh_car_status(car.id))  # bypass CharField descriptor static type misjudgment
 
+    @unit_of_work()
     def place_order_and_pay(
         self, *,
         actor_user_id: int,      # acting user = booking user
@@ -132,59 +217,83 @@ class RentService:
         One-shot place order + pay (persist only on success)
         Process:
           1) validate profile, date range, car availability; quote
-          2) call payment gateway (no DB writes yet)
-          3) Booking(pending) + Payment(ok=True)；on success, persist Booking(pending) + Payment(ok=True) + set car to reserved
+          2) take a reservation hold (TTL) on car + dates, then call payment gateway
+             (no lock is held while the gateway works; the hold keeps the slot)
+          3) Booking(pending) + Payment(ok=True)；on success, consume the hold and persist Booking(pending) + Payment(ok=True) + set car to reserved
           4) write audit log
+        Steps 1-2 / 3-4 are also available separately (prepare_order / complete_order)
+        for callers that run the gateway themselves, e.g. the async facade.
         """
+        order = self.prepare_order(actor_user_id=actor_user_id, user_id=user_id, car_id=car_id,
+                                   start_str=start_str, end_str=end_str, pay_method=pay_method)
+        try:
+            result = self.gateway.process(pay_method, order.request, **(pay_kwargs or {}))
+        except Exception:
+            self.abandon_order(order)
+            raise
+        return self.complete_order(order, result)
+
+    @unit_of_work()
+    def prepare_order(self, *, actor_user_id: int, user_id: int, car_id: int,
+                      start_str: str, end_str: str, pay_method: str) -> PreparedOrder:
+        """Validate, quote and hold the slot; the result carries the PaymentRequest to send"""
         # 1) validate & quote
         start = self._parse_date(start_str)
         end = self._parse_date(end_str)
         if end < start:
             raise ValidationError("End date cannot be earlier than start date")
 
-        car = Car.get_or_none(Car.id == car_id)
+        car = self.hot.car(car_id)
         if not car:
             raise NotFoundError("Car not found")
-        prof = CustomerProfile.get_or_none(CustomerProfile.user == user_id)
+        prof = self.hot.profile(user_id)
         if not prof:
             raise ConflictError("Profile required before booking")
 
         # consider pending+confirmed as taken
-        conflict = Booking.select().where(
-            (Booking.car == car) &
-            (Booking.status.in_([BOOKING_PENDING, BOOKING_CONFIRMED])) &
-            (Booking.start_date <= end) &
-            (Booking.end_date >= start)
-        ).exists()
-        if conflict:
+        if self.availability.has_overlap(car.id, start, end, (BOOKING_PENDING, BOOKING_CONFIRMED)):
             raise ConflictError("Slot already taken")
 
         # quote (picks only the best single rule)
         days = (end - start).days + 1
         base_cost, adjs, grand_total, daily_rate = self.pricing.quote(car=car, start_date=start, end_date=end)
 
-        # 2) call payment gateway (no DB writes yet)
+        # 2) hold the slot; the caller pays
+        hold = self.holds.acquire(car_id=car.id, user_id=user_id, start=start, end=end)
         req = PaymentRequest(amount=grand_total, currency="NZD", payer_id=str(actor_user_id))
-        gw = PaymentGateway()
-        result = gw.process(pay_method, req, **(pay_kwargs or {}))
+        return PreparedOrder(actor_user_id, user_id, car, prof, start_str, end_str, start, end, days,
+                             base_cost, adjs, grand_total, daily_rate, pay_method, hold, req)
 
+    def abandon_order(self, order: PreparedOrder) -> None:
+        """The gateway call never returned a result: give the slot back"""
+        self.holds.release(order.hold)
+
+    def complete_order(self, order: PreparedOrder, result: PaymentResult) -> Booking:
+        """
+        Persist a paid order (or release its hold and raise ConflictError if the payment failed).
+        If the booking cannot be stored after the charge (slot sold after the hold expired,
+        database error), the payment is refunded and the refund audited before raising.
+        """
+        car, prof, hold, adjs = order.car, order.profile, order.hold, order.adjustments
         if not result.ok:
             # on failure, do not persist anything
+            self.holds.release(hold)
             raise ConflictError(f"Payment failed: {result.message or 'unknown'}")
 
         # 3) in transaction: Booking(pending) + Payment(ok=True) + set car to reserved
         db = DatabaseManager().db
         try:
             with db.atomic():
+                self.holds.claim(hold)  # expired or not: the overlap trigger on the INSERT decides
                 b = Booking.create(
-                    car=car, user=user_id,
-                    start_date=start, end_date=end,
+                    car=car, user=order.user_id,
+                    start_date=order.start, end_date=order.end,
                     status=BOOKING_PENDING,      # paid then pending review
-                    days=days,
-                    base_daily_rate=daily_rate,
-                    base_cost=base_cost,
+                    days=order.days,
+                    base_daily_rate=order.daily_rate,
+                    base_cost=order.base_cost,
                     adj_total=sum(d for _, d in adjs),
-                    grand_total=grand_total,
+                    grand_total=order.grand_total,
                     snap_first_name=prof.first_name,
                     snap_last_name=prof.last_name,
                     snap_phone=prof.phone,
@@ -192,19 +301,29 @@ class RentService:
                 )
                 # persist payment record
                 Payment.create(
-                    booking=b, method=pay_method, amount=grand_total,
+                    booking=b, method=order.pay_method, amount=order.grand_total,
                     currency="NZD", ok=True, message=result.message, txn_id=result.txn_id
                 )
                 # set car to reserved
                 self._recompute_car_status(car)
 
                 # audit
-                self.audit.write(actor_user_id=actor_user_id, action="create_payment",
+                self.audit.write(actor_user_id=order.actor_user_id, action="create_payment",
                                  target_type="payment", target_id=b.id,   # could also use payment.id here
-                                 detail=f"booking#{b.id} {pay_method} ok=True txn={result.txn_id or ''}")
-                self.audit.write(actor_user_id=actor_user_id, action="create_booking",
+                                 detail=f"booking#{b.id} {order.pay_method} ok=True txn={result.txn_id or ''}")
+                self.audit.write(actor_user_id=order.actor_user_id, action="create_booking",
                                  target_type="booking", target_id=b.id,
-                                 detail=f"car={car.id} {start_str}->{end_str} pending(after-paid)")
-                return b
+                                 detail=f"car={car.id} {order.start_str}->{order.end_str} pending(after-paid)")
         except Exception as e:
-            raise DatabaseError(f"Failed to create booking after payment: {e}") from e
\ No newline at end of file
+            self.holds.release(hold)  # the transaction rolled the claim back
+            refunded = self._refund(order, result, e)
+            outcome = "payment refunded" if refunded else "refund failed, contact support"
+            if isinstance(e, IntegrityError) and is_booking_overlap(e):
+                self._lost_race()
+                raise ConflictError(f"The car was booked by someone else while paying ({outcome})") from e
+            raise DatabaseError(f"Failed to create booking after payment ({outcome}): {e}") from e
+        # update the index only once the transaction has committed
+        self.availability.record(b)
+        self.calendar.record(b)
+        self.calendar.set_car_status(car.id, car.status)
+        return b
\ No newline at end of file
@@ -0,0 +1,249 @@
+# db/archive.py
+# -*- coding: utf-8 -*-
+"""
+Archive tier for closed bookings
+
+Completed / cancelled bookings that ended before a cutoff, and their
+payments, move out of the hot database into a separate SQLite file that is
+ATTACHed as schema "archive". Overlap checks, listings and the triggers only
+ever see the hot tables, so they stay small; `booking_history()` reads both
+tiers with one UNION ALL.
+
+The archive file is <db name>_archive.db next to the main database
+(AUTORENTX_ARCHIVE_DB overrides it).
+
+Moves are batched. In WAL mode a transaction spanning attached files is not
+atomic across them, so each batch is two transactions: copy into the archive
+(INSERT OR IGNORE, repeatable), then delete from the hot tables only the rows
+the archive holds an identical copy of. A crash between the two leaves a row
+in both tiers, never in neither; the next run finishes the move and the
+history read prefers the hot copy. An archived row with the same id but
+different content is a conflict: nothing of that batch is deleted and
+ArchiveConflictError is raised.
+
+Booking and payment ids are AUTOINCREMENT and their sequences are kept above
+the highest archived id (ensure_archive, migration 9), so a hot row never
+takes the id of an archived one.
+
+Run headless:  python -m db.archive dd-mm-yyyy
+"""
+
+import os
+import sqlite3
+from datetime import date
+from typing import List, NamedTuple, Optional
+
+from peewee import (
+    BooleanField, CharField, DateField, DateTimeField, FloatField, IntegerField, Model, TextField, Value, fn
+)
+
+from db.db_manager import DB_PATH, DatabaseManager
+from db.models import Booking, Payment, BOOKING_CANCELLED, BOOKING_COMPLETED
+
+ARCHIVE_SCHEMA = "archive"
+ARCHIVE_PATH = os.environ.get("AUTORENTX_ARCHIVE_DB", os.path.splitext(DB_PATH)[0] + "_archive.db")
+CLOSED_STATUSES = (BOOKING_COMPLETED, BOOKING_CANCELLED)
+DEFAULT_BATCH_SIZE = 5000
+
+
+class _ArchiveModel(Model):
+    class Meta:
+        database = DatabaseManager().db
+        schema = ARCHIVE_SCHEMA
+
+
+class ArchivedBooking(_ArchiveModel):
+    """
+    归档预订 / Archived booking: same columns, same order as Booking (rows are copied
+    with INSERT ... SELECT). car/user are plain ids: SQLite has no cross-file foreign keys.
+    """
+    id = IntegerField(primary_key=True)
+    car_id = IntegerField()
+    user_id = IntegerField()
+    start_date = DateField()
+    end_date = DateField()
+    status = CharField(max_length=20)
+    days = IntegerField(default=1)
+    base_daily_rate = FloatField(default=0)
+    base_cost = FloatField(default=0)
+    adj_total = FloatField(default=0)
+    grand_total = FloatField(default=0)
+    snap_first_name = CharField(max_length=50)
+    snap_last_name = CharField(max_length=50)
+    snap_phone = CharField(max_length=30)
+    snap_id_document = CharField(max_length=100)
+    created_at = DateTimeField()
+
+    class Meta:
+        table_name = "booking"
+        indexes = (
+            (("user_id", "start_date"), False),
+            (("car_id", "start_date"), False),
+        )
+
+
+class ArchivedPayment(_ArchiveModel):
+    id = IntegerField(primary_key=True)
+    booking_id = IntegerField(index=True)
+    method = CharField(max_length=30)
+    amount = FloatField()
+    currency = CharField(max_length=10)
+    ok = BooleanField()
+    message = TextField(null=True)
+    txn_id = CharField(max_length=64, null=True)
+    created_at = DateTimeField()
+
+    class Meta:
+        table_name = "payment"
+
+
+ARCHIVE_MODELS = [ArchivedBooking, ArchivedPayment]
+
+
+class ArchiveConflictError(Exception):
+    """The archive holds a different row under the id of a hot row being moved"""
+
+
+def archived_max_ids() -> dict[str, int]:
+    """Highest booking / payment id in the archive file, read without attaching it (0 if there is none)"""
+    if not os.path.exists(ARCHIVE_PATH):
+        return {"booking": 0, "payment": 0}
+    conn = sqlite3.connect(f"file:{ARCHIVE_PATH}?mode=ro", uri=True)
+    try:
+        return {t: conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {t}").fetchone()[0] for t in ("booking", "payment")}
+    except sqlite3.OperationalError:  # file without the archive tables
+        return {"booking": 0, "payment": 0}
+    finally:
+        conn.close()
+
+
+def raise_id_sequence(db, table: str, floor: int) -> None:
+    """Make the next AUTOINCREMENT id of `table` greater than `floor`"""
+    if floor <= 0:
+        return
+    if not db.execute_sql("UPDATE main.sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (floor, table)).rowcount:
+        db.execute_sql("INSERT INTO main.sqlite_sequence (name, seq) VALUES (?, ?)", (table, floor))
+
+
+_archive_ready = False
+
+
+def ensure_archive() -> None:
+    """ATTACH the archive file (every connection, now and later) and create its tables, once"""
+    global _archive_ready
+    if _archive_ready:
+        return
+    db = DatabaseManager().db
+    if db.attach(ARCHIVE_PATH, ARCHIVE_SCHEMA) and DatabaseManager().pooled:
+        db.close_idle()  # idle pooled connections were opened without the ATTACH
+    db.create_tables(ARCHIVE_MODELS, safe=True)
+    with db.atomic():
+        for model in ARCHIVE_MODELS:
+            table = model._meta.table_name
+            raise_id_sequence(db, table, db.execute_sql(f"SELECT COALESCE(MAX(id), 0) FROM archive.{table}").fetchone()[0])
+    _archive_ready = True
+
+
+class ArchiveResult(NamedTuple):
+    bookings: int
+    payments: int
+    batches: int
+
+
+def _columns(model) -> str:
+    return ", ".join(f'"{f.column_name}"' for f in model._meta.sorted_fields)
+
+
+def _same_row(model, hot: str, cold: str) -> str:
+    """SQL condition: the archive row `cold` is a column-for-column copy of the hot row `hot`"""
+    return " AND ".join(f'{cold}."{f.column_name}" IS {hot}."{f.column_name}"' for f in model._meta.sorted_fields)
+
+
+def _conflicts(db, model, key: str, marks: str, ids: list) -> list[int]:
+    """ids of hot rows (key IN ids) whose id the archive holds with different content"""
+    table = model._meta.table_name
+    return [rid for (rid,) in db.execute_sql(
+        f"SELECT h.id FROM main.{table} h JOIN archive.{table} a ON a.id = h.id "
+        f"WHERE h.{key} IN ({marks}) AND NOT ({_same_row(model, 'h', 'a')})", ids)]
+
+
+def archive_closed_bookings(cutoff: date, batch_size: int = DEFAULT_BATCH_SIZE) -> ArchiveResult:
+    """Move closed bookings that ended before `cutoff`, with their payments, to the archive"""
+    ensure_archive()
+    db = DatabaseManager().db
+    booking_cols, payment_cols = _columns(Booking), _columns(Payment)
+    bookings = payments = batches = 0
+    while True:
+        with db.atomic():
+            ids = [bid for (bid,) in (Booking
+                   .select(Booking.id)
+                   .where(Booking.status.in_(CLOSED_STATUSES) & (Booking.end_date < cutoff))
+                   .order_by(Booking.id)
+                   .limit(batch_size)
+                   .tuples())]
+            if not ids:
+                break
+            marks = ", ".join("?" * len(ids))
+            db.execute_sql(f"INSERT OR IGNORE INTO archive.booking ({booking_cols}) "
+                           f"SELECT {booking_cols} FROM main.booking WHERE id IN ({marks})", ids)
+            db.execute_sql(f"INSERT OR IGNORE INTO archive.payment ({payment_cols}) "
+                           f"SELECT {payment_cols} FROM main.payment WHERE booking_id IN ({marks})", ids)
+            # an ignored copy must be a copy of this very row (an interrupted earlier move), never another row
+            conflicts = {"booking": _conflicts(db, Booking, "id", marks, ids),
+                         "payment": _conflicts(db, Payment, "booking_id", marks, ids)}
+            if conflicts["booking"] or conflicts["payment"]:
+                raise ArchiveConflictError(
+                    f"archive already holds different rows with the ids of booking(s) {conflicts['booking']} / "
+                    f"payment(s) {conflicts['payment']}; nothing of this batch was deleted")
+        with db.atomic():
+            # payments go first (their booking must still be hot to be checked); the booking only
+            # goes once every payment of it is archived
+            payments += db.execute_sql(
+                f"DELETE FROM main.payment WHERE booking_id IN ({marks}) AND EXISTS "
+                f"(SELECT 1 FROM archive.payment a WHERE a.id = payment.id AND {_same_row(Payment, 'payment', 'a')})",
+                ids).rowcount
+            bookings += db.execute_sql(
+                f"DELETE FROM main.booking WHERE id IN ({marks}) AND EXISTS "
+                f"(SELECT 1 FROM archive.booking a WHERE a.id = booking.id AND {_same_row(Booking, 'booking', 'a')}) "
+                f"AND NOT EXISTS (SELECT 1 FROM main.payment p WHERE p.booking_id = booking.id)",
+                ids).rowcount
+        batches += 1
+    return ArchiveResult(bookings, payments, batches)
+
+
+def booking_history(*, user_id: Optional[int] = None, car_id: Optional[int] = None) -> List[Booking]:
+    """
+    Bookings of a user and/or car from both tiers, newest start first.
+    Rows are Booking instances with `archived` set; b.car is not joined (archived
+    bookings may outlive their car), use b.car_id.
+    """
+    ensure_archive()
+    hot = Booking.select(*Booking._meta.sorted_fields, Value(False).alias("archived"))
+    cold = (ArchivedBooking
+            .select(*ArchivedBooking._meta.sorted_fields, Value(True).alias("archived"))
+            .where(~fn.EXISTS(Booking.select(Booking.id).where(Booking.id == ArchivedBooking.id))))  # mid-move: hot wins
+    if user_id is not None:
+        hot = hot.where(Booking.user == user_id)
+        cold = cold.where(ArchivedBooking.user_id == user_id)
+    if car_id is not None:
+        hot = hot.where(Booking.car == car_id)
+        cold = cold.where(ArchivedBooking.car_id == car_id)
+    query = (hot + cold).order_by(Booking.start_date.desc(), Booking.id.desc())
+    return list(query)
+
+
+def archive_counts() -> dict:
+    """Row counts per tier (admin report)"""
+    ensure_archive()
+    return {"hot_bookings": Booking.select().count(), "archived_bookings": ArchivedBooking.select().count(),
+            "hot_payments": Payment.select().count(), "archived_payments": ArchivedPayment.select().count()}
+
+
+if __name__ == "__main__":
+    import sys
+    from datetime import datetime
+    from db.models import create_all_tables
+    create_all_tables()
+    result = archive_closed_bookings(datetime.strptime(sys.argv[1], "%d-%m-%Y").date())
+    print(f"Archived {result.bookings} booking(s) and {result.payments} payment(s) "
+          f"in {result.batches} batch(es) to {ARCHIVE_PATH}")
@@ -0,0 +1,65 @@
+# db/changelog.py
+# -*- coding: utf-8 -*-
+"""
+Replay of the ChangeLog table for the in-memory availability views
+
+AvailabilityIndex and AvailabilityCalendar are loaded once per process. Writes
+made by this process reach them through record(); writes made by any other
+process (another CLI terminal, the API, a sqlite3 shell) only show up in the
+database. Triggers append the id of every booking and car whose change can
+alter availability to ChangeLog (db/migrations.py v10), so before each query a
+view asks for the entries after the last seq it applied: one indexed range read,
+usually empty. Replaying an entry re-reads the row's current state, so entries
+for writes the view already recorded are harmless.
+
+changes_since() returns None when the view must reload instead: entries it has
+not seen were pruned (seq is AUTOINCREMENT, so the first entry after a gap-free
+seq is seq + 1), or a bulk statement logged a NULL row_id.
+"""
+
+from typing import NamedTuple, Optional
+
+from db.hot_queries import HotQueries
+from db.models import Booking, Car, ChangeLog
+
+CHANGELOG_KEEP = 100_000  # entries kept by prune(); views further behind reload
+_CHUNK = 500              # ids per IN (...) when re-reading changed rows
+
+
+class Changes(NamedTuple):
+    seq: int        # last entry included
+    bookings: list  # (id, car_id, status, start_date, end_date); status None: the row is gone
+    cars: list      # (id, status)
+
+
+def latest_seq() -> int:
+    """seq of the newest entry; read it before loading a view, then replay from there"""
+    return HotQueries().latest_change()
+
+
+def changes_since(seq: int) -> Optional[Changes]:
+    entries = HotQueries().changes_since(seq)
+    if not entries:
+        return Changes(seq, [], [])
+    if entries[0][0] != seq + 1 or any(row_id is None for _, _, row_id in entries):
+        return None
+    booking_ids = sorted({row_id for _, table, row_id in entries if table == "booking"})
+    car_ids = sorted({row_id for _, table, row_id in entries if table == "car"})
+    bookings = {}
+    for i in range(0, len(booking_ids), _CHUNK):
+        bookings.update((r[0], r) for r in (Booking
+            .select(Booking.id, Booking.car, Booking.status, Booking.start_date, Booking.end_date)
+            .where(Booking.id.in_(booking_ids[i:i + _CHUNK]))
+            .tuples()))
+    cars = {}
+    for i in range(0, len(car_ids), _CHUNK):
+        cars.update(Car.select(Car.id, Car.status).where(Car.id.in_(car_ids[i:i + _CHUNK])).tuples())
+    return Changes(entries[-1][0],
+                   [bookings.get(bid, (bid, None, None, None, None)) for bid in booking_ids],
+                   [(cid, cars.get(cid)) for cid in car_ids])
+
+
+def prune(keep: int = CHANGELOG_KEEP) -> int:
+    """Delete all but the newest `keep` entries (never the newest one); returns how many went"""
+    newest = latest_seq()
+    return ChangeLog.delete().where(ChangeLog.seq <= newest - max(keep, 1)).execute()
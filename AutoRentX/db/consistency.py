@@ -0,0 +1,68 @@
+# db/consistency.py
+# -*- coding: utf-8 -*-
+"""
+Consistency checks for denormalised columns
+
+car.active_bookings is maintained by the booking_count_* triggers. The
+checker recomputes it from Booking from scratch and reports every car where
+the stored value drifted; `repair_active_bookings()` rewrites them all.
+
+Run headless:  python -m db.consistency [--repair]
+"""
+
+import sys
+from typing import NamedTuple, Optional
+from peewee import SqliteDatabase
+from db.db_manager import DatabaseManager
+from db.migrations import RECOUNT_ACTIVE_BOOKINGS_SQL
+from db.models import BOOKING_PENDING, BOOKING_CONFIRMED
+
+
+class CounterDrift(NamedTuple):
+    car_id: int
+    stored: int
+    actual: int
+
+
+def active_booking_drift(db: Optional[SqliteDatabase] = None) -> list[CounterDrift]:
+    """Cars whose active_bookings differs from a fresh COUNT over Booking"""
+    db = db or DatabaseManager().db
+    rows = db.execute_sql(
+        """
+        SELECT c.id, c.active_bookings, COUNT(b.id)
+        FROM car c LEFT JOIN booking b ON b.car_id = c.id AND b.status IN (?, ?)
+        GROUP BY c.id
+        HAVING c.active_bookings IS NOT COUNT(b.id)
+        ORDER BY c.id
+        """,
+        (BOOKING_PENDING, BOOKING_CONFIRMED),
+    ).fetchall()
+    return [CounterDrift(*r) for r in rows]
+
+
+def repair_active_bookings(db: Optional[SqliteDatabase] = None) -> int:
+    """Recompute every counter; returns how many cars had drifted"""
+    db = db or DatabaseManager().db
+    with db.atomic():
+        drift = active_booking_drift(db)
+        if drift:
+            db.execute_sql(RECOUNT_ACTIVE_BOOKINGS_SQL)
+    return len(drift)
+
+
+def report(drift: list[CounterDrift]) -> str:
+    if not drift:
+        return "✓ car.active_bookings is consistent"
+    lines = [f"✗ {len(drift)} car(s) with drifted active_bookings:"]
+    lines += [f"  car#{d.car_id}: stored {d.stored}, actual {d.actual}" for d in drift]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from db.models import create_all_tables
+    create_all_tables()
+    drift = active_booking_drift()
+    print(report(drift))
+    if drift and "--repair" in sys.argv[1:]:
+        print(f"Repaired {repair_active_bookings()} car(s)")
+    sys.exit(1 if drift and "--repair" not in sys.argv[1:] else 0)
@@ -1,12 +1,130 @@
 """
 db_manager.py
 Database Manager (Peewee ORM + persistent connection, Singleton)
+
+Creating the manager does not open the database file: Peewee connects
+lazily on the first query (autoconnect), so importing db.models is free.
+
+Two modes:
+- single (default): one SqliteDatabase; Peewee keeps one connection per thread
+- pooled: a bounded pool of connections checked out per thread, with idle
+  timeout, wait statistics and a `connection()` context manager
+
+Pooled mode is chosen with DatabaseManager.configure(...) before the first
+DatabaseManager() call (i.e. before db.models is imported), or with the
+AUTORENTX_DB_POOL / AUTORENTX_DB_MAX_CONNECTIONS / AUTORENTX_DB_IDLE_TIMEOUT /
+AUTORENTX_DB_WAIT_TIMEOUT environment variables.
+
+Durability profiles (configure(durability=...) or AUTORENTX_DURABILITY):
+- safe:     synchronous=FULL, every commit is fsync'd before it returns
+- balanced: synchronous=NORMAL (WAL fsync'd at checkpoints only, a power loss
+            can drop the last commits but never corrupts), plus group commit
+            (db/group_commit.py): small service transactions queue up and are
+            committed together, durably, one fsync per batch
+- fast:     synchronous=OFF, no fsync at all (the historical default)
+
+SQL profiling (db/profiler.py) is off by default. enable_profiling() turns it
+on at runtime; AUTORENTX_SQL_PROFILE=1 turns it on from the start, with
+AUTORENTX_SQL_SLOW_MS setting the slow-query threshold.
 """
 
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
 from peewee import SqliteDatabase
+from playhouse.pool import PooledSqliteDatabase, MaxConnectionsExceeded
+
+from db.profiler import SqlProfiler
+
+# Use a single consistent database filename (AUTORENTX_DB overrides it, e.g. for tests)
+DB_PATH = os.environ.get("AUTORENTX_DB", "car_rental.db")
+
+# Applied to every connection, pooled or not
+PRAGMAS = {
+    "foreign_keys": 1,  # Enable foreign key constraints
+    "synchronous": 0,  # synchronous mode off (overridden by the durability profile)
+    "journal_mode": "wal",  # Write-ahead logging mode for better concurrency
+    "cache_size": -1024 * 64,  # Optimize cache
+}
+
+DURABILITY_SAFE = "safe"
+DURABILITY_BALANCED = "balanced"
+DURABILITY_FAST = "fast"
+SYNCHRONOUS = {DURABILITY_SAFE: 2, DURABILITY_BALANCED: 1, DURABILITY_FAST: 0}  # FULL / NORMAL / OFF
+
+
+def pragmas_for(durability: str) -> dict:
+    if durability not in SYNCHRONOUS:
+        raise ValueError(f"Unknown durability profile: {durability}")
+    return {**PRAGMAS, "synchronous": SYNCHRONOUS[durability]}
+
+
+class ProfiledDatabaseMixin:
+    """Hands every statement to `profiler` when one is set; None (the default) costs one attribute check"""
+    profiler: Optional[SqlProfiler] = None
+
+    def execute_sql(self, sql, params=None):
+        profiler = self.profiler
+        if profiler is None:
+            return super().execute_sql(sql, params)
+        return profiler.execute(self, super().execute_sql, sql, params)
+
+
+class ProfiledSqliteDatabase(ProfiledDatabaseMixin, SqliteDatabase):
+    pass
+
+
+class InstrumentedPooledSqliteDatabase(ProfiledDatabaseMixin, PooledSqliteDatabase):
+    """PooledSqliteDatabase that counts check-outs and time spent waiting for a free connection"""
 
-# Use a single consistent database filename
-DB_PATH = "car_rental.db"
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._waiting = threading.local()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def connect(self, reuse_if_open=False):
+        self._waiting.flag = False
+        t0 = time.perf_counter()
+        try:
+            return super().connect(reuse_if_open)
+        finally:
+            if self._waiting.flag:
+                with self._stats_lock:
+                    self.waits += 1
+                    self.wait_time += time.perf_counter() - t0
+
+    def _connect(self):
+        try:
+            conn = super()._connect()
+        except MaxConnectionsExceeded:
+            self._waiting.flag = True  # connect() retries until the wait timeout
+            raise
+        with self._stats_lock:
+            self.checkouts += 1
+        return conn
+
+    def stats(self) -> dict:
+        with self._pool_lock:
+            in_use, idle = len(self._in_use), len(self._connections)
+        with self._stats_lock:
+            return {
+                "max_connections": self._max_connections,
+                "in_use": in_use,
+                "idle": idle,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_time": round(self.wait_time, 6),
+            }
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else default
 
 
 class DatabaseManager:
@@ -16,23 +134,49 @@ class DatabaseManager:
     """
     _instance = None
     _db: SqliteDatabase | None = None
+    _config = {
+        "pooled": os.environ.get("AUTORENTX_DB_POOL", "") not in ("", "0"),
+        "max_connections": _env_int("AUTORENTX_DB_MAX_CONNECTIONS", 8),
+        "idle_timeout": _env_int("AUTORENTX_DB_IDLE_TIMEOUT", 300),  # seconds before an idle connection is closed
+        "wait_timeout": _env_int("AUTORENTX_DB_WAIT_TIMEOUT", 10),   # seconds to wait for a free connection
+        "durability": os.environ.get("AUTORENTX_DURABILITY") or DURABILITY_FAST,
+        "profile": os.environ.get("AUTORENTX_SQL_PROFILE", "") not in ("", "0"),
+    }
+
+    @classmethod
+    def configure(cls, *, pooled: Optional[bool] = None, max_connections: Optional[int] = None,
+                  idle_timeout: Optional[int] = None, wait_timeout: Optional[int] = None,
+                  durability: Optional[str] = None, profile: Optional[bool] = None) -> None:
+        """Choose the connection mode / durability profile; only valid before the first DatabaseManager()"""
+        if cls._instance is not None:
+            raise RuntimeError("DatabaseManager is already initialized")
+        if durability is not None:
+            pragmas_for(durability)  # validate
+        for key, value in (("pooled", pooled), ("max_connections", max_connections),
+                           ("idle_timeout", idle_timeout), ("wait_timeout", wait_timeout),
+                           ("durability", durability), ("profile", profile)):
+            if value is not None:
+                cls._config[key] = value
 
     def __new__(cls, path: str = DB_PATH):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            # Initialize database connection
-            cls._db = SqliteDatabase(
-                path,
-                pragmas={
-                    "foreign_keys": 1,  # Enable foreign key constraints
-                    "synchronous": 0,  # synchronous mode off
-                    "journal_mode": "wal",  # Write-ahead logging mode for better concurrency
-                    "cache_size": -1024 * 64,  # Optimize cache
-                },
-            )
-            if cls._db.is_closed():
-                cls._db.connect()
-            print(f"Database connected: {path}")
+            cfg = cls._config
+            pragmas = pragmas_for(cfg["durability"])
+            if cfg["pooled"]:
+                cls._db = InstrumentedPooledSqliteDatabase(
+                    path,
+                    pragmas=pragmas,
+                    max_connections=cfg["max_connections"],
+                    stale_timeout=cfg["idle_timeout"],
+                    timeout=cfg["wait_timeout"],
+                    check_same_thread=False,  # a pooled connection may be checked out by another thread later
+                )
+            else:
+                # connection is opened on first use (autoconnect)
+                cls._db = ProfiledSqliteDatabase(path, pragmas=pragmas)
+            if cfg["profile"]:
+                cls._db.profiler = SqlProfiler()
         return cls._instance
 
     @property
@@ -41,8 +185,63 @@ class DatabaseManager:
             raise RuntimeError("Database connection is not initialized")
         return self._db
 
+    @property
+    def pooled(self) -> bool:
+        return isinstance(self._db, InstrumentedPooledSqliteDatabase)
+
+    @property
+    def durability(self) -> str:
+        return self._config["durability"]
+
+    @property
+    def group_commit(self) -> bool:
+        """small service transactions go through db.group_commit (balanced profile)"""
+        return self.durability == DURABILITY_BALANCED
+
+    @property
+    def profiler(self) -> Optional[SqlProfiler]:
+        return self.db.profiler
+
+    def enable_profiling(self, slow_ms: Optional[float] = None) -> SqlProfiler:
+        """Start recording statements (keeps the current profile if already on)"""
+        profiler = self.db.profiler
+        if profiler is None:
+            profiler = self.db.profiler = SqlProfiler()
+        if slow_ms is not None:
+            profiler.slow_ms = slow_ms
+        return profiler
+
+    def disable_profiling(self) -> Optional[SqlProfiler]:
+        """Stop recording; returns the profile collected so far"""
+        profiler, self.db.profiler = self.db.profiler, None
+        return profiler
+
+    @contextmanager
+    def connection(self) -> Iterator[SqliteDatabase]:
+        """
+        Check a connection out for the calling thread and give it back on exit.
+        Nested use reuses the thread's open connection.
+        """
+        db = self.db
+        opened = db.is_closed()
+        if opened:
+            db.connect()
+        try:
+            yield db
+        finally:
+            if opened and not db.is_closed():
+                db.close()
+
+    def pool_stats(self) -> dict:
+        """in_use / idle / checkouts / waits / wait_time (seconds); empty for single mode"""
+        if isinstance(self._db, InstrumentedPooledSqliteDatabase):
+            return self._db.stats()
+        return {}
+
     def close(self):
         """Close connection safely"""
         if self._db and not self._db.is_closed():
             self._db.close()
             print("Database closed")
+        if isinstance(self._db, InstrumentedPooledSqliteDatabase):
+            self._db.close_idle()
@@ -0,0 +1,81 @@
+# db/executor.py
+# -*- coding: utf-8 -*-
+"""
+Database executor for asyncio callers
+
+The services are blocking (Peewee + sqlite3). Async code hands them to this
+bounded pool of worker threads instead of calling them on the event loop:
+
+    booking = await DbExecutor().run(rent.create_pending_booking, actor_user_id=..., ...)
+
+Each worker opens its connection when it starts and keeps it until close()
+(Peewee connections are per thread; in pooled mode each worker holds one pool
+connection), so no call pays for connect/PRAGMA setup. In pooled mode the
+worker count is capped at the pool size. Calls beyond the worker count queue
+in the executor; the event loop never blocks on SQLite.
+
+AUTORENTX_DB_WORKERS sets the default worker count (4).
+"""
+
+import asyncio
+import atexit
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from db.db_manager import DatabaseManager
+
+T = TypeVar("T")
+
+DEFAULT_WORKERS = int(os.environ.get("AUTORENTX_DB_WORKERS") or 4)
+
+
+class DbExecutor:
+    """Process-wide pool of database worker threads (Singleton)"""
+    _instance = None
+
+    def __new__(cls, max_workers: Optional[int] = None):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._setup(max_workers or DEFAULT_WORKERS)
+        return cls._instance
+
+    def _setup(self, max_workers: int) -> None:
+        manager = DatabaseManager()
+        if manager.pooled:
+            max_workers = min(max_workers, manager.pool_stats()["max_connections"])
+        self.max_workers = max_workers
+        self._closed = False
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="autorentx-db",
+                                        initializer=self._open_connection)
+        atexit.register(self.close)
+
+    @staticmethod
+    def _open_connection() -> None:
+        DatabaseManager().db.connect(reuse_if_open=True)
+
+    async def run(self, fn: Callable[..., T], /, *args, **kwargs) -> T:
+        """Run fn(*args, **kwargs) on a database worker and await its result (or exception)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+
+    def close(self) -> None:
+        """Finish queued calls, close every worker's connection (back to the pool when pooled), stop the workers"""
+        if self._closed:
+            return
+        self._closed = True
+        barrier = threading.Barrier(self.max_workers)  # holds each worker on its own close job
+
+        def close_connection() -> None:
+            db = DatabaseManager().db
+            if not db.is_closed():
+                db.close()
+            barrier.wait(timeout=10)
+
+        for _ in range(self.max_workers):
+            self._pool.submit(close_connection)
+        self._pool.shutdown(wait=True)
+        if DbExecutor._instance is self:
+            DbExecutor._instance = None
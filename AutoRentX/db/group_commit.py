@@ -0,0 +1,129 @@
+# db/group_commit.py
+# -*- coding: utf-8 -*-
+"""
+Group commit
+
+Under the balanced durability profile, small service transactions (audit
+writes, profile updates) are handed to one committer thread instead of
+committing on the caller's connection:
+
+    row = run_grouped(lambda: AuditLog.create(...))
+
+The committer takes every job queued while its previous commit was in
+flight, runs each one in its own SAVEPOINT and commits them together on a
+synchronous=FULL connection: one fsync per batch, and each caller returns only
+once its batch is durable. A failing job rolls back to its savepoint and its
+exception is re-raised in the caller; the rest of the batch still commits.
+No waiting is added: a lone caller is committed straight away, batches only
+form under concurrency.
+
+Other profiles, and callers already inside a transaction (whose work must
+stay in that transaction), run the job inline in a BEGIN IMMEDIATE
+transaction (a savepoint when nested).
+"""
+
+import atexit
+import queue
+import threading
+from typing import Any, Callable, Optional, TypeVar
+
+from db.db_manager import DatabaseManager, SYNCHRONOUS, DURABILITY_SAFE
+
+T = TypeVar("T")
+
+
+class _Job:
+    __slots__ = ("fn", "result", "error", "done")
+
+    def __init__(self, fn: Callable[[], Any]):
+        self.fn = fn
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class GroupCommitter:
+    """Process-wide committer thread (Singleton)"""
+    _instance = None
+
+    def __new__(cls, max_batch: int = 256):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._setup(max_batch)
+        return cls._instance
+
+    def _setup(self, max_batch: int) -> None:
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self.jobs = 0
+        self.commits = 0
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, fn: Callable[[], T]) -> T:
+        """Run fn in the next group transaction; blocks until that transaction is committed"""
+        if not self._thread.is_alive():
+            raise RuntimeError("Group committer is closed")
+        job = _Job(fn)
+        self._queue.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _next_batch(self) -> Optional[list[_Job]]:
+        job = self._queue.get()
+        if job is None:
+            return None
+        batch = [job]
+        while len(batch) < self.max_batch:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)  # finish this batch, stop afterwards
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self) -> None:
+        with DatabaseManager().connection() as db:
+            db.execute_sql(f"PRAGMA synchronous = {SYNCHRONOUS[DURABILITY_SAFE]}")  # this connection's commits fsync
+            while (batch := self._next_batch()) is not None:
+                self._commit(db, batch)
+
+    def _commit(self, db, batch: list[_Job]) -> None:
+        try:
+            with db.atomic("IMMEDIATE"):
+                for job in batch:
+                    try:
+                        with db.atomic():  # SAVEPOINT: a failing job only undoes itself
+                            job.result = job.fn()
+                    except Exception as e:
+                        job.error = e
+            self.commits += 1
+            self.jobs += len(batch)
+        except Exception as e:  # the COMMIT itself failed: nobody's work is durable
+            for job in batch:
+                job.error = job.error or e
+        finally:
+            for job in batch:
+                job.done.set()
+
+    def close(self) -> None:
+        """Commit what is queued and stop the thread (registered with atexit)"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+
+def run_grouped(fn: Callable[[], T]) -> T:
+    """fn() in its own transaction, group-committed when the profile asks for it"""
+    manager = DatabaseManager()
+    db = manager.db
+    if not manager.group_commit or db.in_transaction():
+        with db.atomic("IMMEDIATE"):  # take the write lock up front: no read->write upgrade to lose
+            return fn()
+    return GroupCommitter().submit(fn)
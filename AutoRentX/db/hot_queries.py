@@ -0,0 +1,176 @@
+# db/hot_queries.py
+# -*- coding: utf-8 -*-
+"""
+Hot-path lookups, two interchangeable backends
+
+- orm:      the Peewee expressions the services always used (built and
+            compiled to SQL on every call)
+- prepared: a registry of fixed, parameterized SQL strings run straight on the
+            connection's sqlite3 cursor. sqlite3 keeps a per-connection cache of
+            prepared statements keyed by the SQL text, so after the first call
+            each lookup is bind + step; rows are mapped to the same model
+            instances the ORM returns.
+
+Both return equal results; services take a HotQueries and never care which.
+car() and profile() go through the unit-of-work identity map when one is
+active (db/unit_of_work.py).
+AUTORENTX_HOT_QUERIES=orm|prepared picks the default (prepared).
+
+Statements bypass Peewee's query logging.
+"""
+
+import os
+from datetime import date
+from typing import Callable, Iterable, NamedTuple, Optional, Sequence
+
+from peewee import Model, fn
+
+from db.db_manager import DatabaseManager
+from db.unit_of_work import identity
+from db.models import (Booking, Car, ChangeLog, CustomerProfile, DataVersion, PricingRule, User,
+                       BOOKING_PENDING, BOOKING_CONFIRMED, DATA_VERSION_ID)
+
+HOT_ORM = "orm"
+HOT_PREPARED = "prepared"
+
+
+def _row_mapper(model: type[Model]) -> Callable[[Sequence], Model]:
+    """sqlite row (model's columns, in _meta.sorted_fields order) -> clean model instance"""
+    names = tuple(f.name for f in model._meta.sorted_fields)
+    converters = tuple(f.python_value for f in model._meta.sorted_fields)
+
+    def build(row: Sequence) -> Model:
+        obj = model.__new__(model)  # what Peewee's cursor wrapper builds, minus the __init__ round trip
+        obj.__data__ = {n: conv(v) for n, conv, v in zip(names, converters, row)}
+        obj._dirty = set()
+        obj.__rel__ = {}
+        return obj
+    return build
+
+
+def _select(model: type[Model], where: str, tail: str = "") -> str:
+    cols = ", ".join(f'"{f.column_name}"' for f in model._meta.sorted_fields)
+    return f'SELECT {cols} FROM "{model._meta.table_name}" WHERE {where}{tail}'
+
+
+class PreparedStatement(NamedTuple):
+    sql: str
+    row: Optional[Callable[[Sequence], Model]]  # None: raw tuples
+
+
+# name -> statement; parameters are positional, in the order of the ?s
+PREPARED: dict[str, PreparedStatement] = {
+    "car_by_id": PreparedStatement(_select(Car, '"id" = ?', " LIMIT 1"), _row_mapper(Car)),
+    "profile_by_user": PreparedStatement(_select(CustomerProfile, '"user_id" = ?', " LIMIT 1"),
+                                         _row_mapper(CustomerProfile)),
+    # same filter as PricingService.quote(cached=False)
+    "applicable_rules": PreparedStatement(_select(
+        PricingRule,
+        '"is_active" = 1'
+        ' AND ("scope" = \'global\' OR ("scope" = \'car\' AND "car_id" = ?))'
+        ' AND ("start_date" IS NULL OR "start_date" <= ?)'
+        ' AND ("end_date" IS NULL OR "end_date" >= ?)'
+        ' AND "min_days" <= ?'), _row_mapper(PricingRule)),
+    # one status per call, so the (car, status, start_date, end_date) index is usable
+    "booking_overlap": PreparedStatement(
+        'SELECT 1 FROM "booking" WHERE "car_id" = ? AND "status" = ? AND "start_date" <= ? AND "end_date" >= ? LIMIT 1',
+        None),
+    "data_version": PreparedStatement('SELECT "version" FROM "dataversion" WHERE "id" = ?', None),
+    "user_auth": PreparedStatement('SELECT "role", "is_active" FROM "user" WHERE "id" = ?', None),
+    "changes_since": PreparedStatement(
+        'SELECT "seq", "table_name", "row_id" FROM "changelog" WHERE "seq" > ? ORDER BY "seq"', None),
+    "latest_change": PreparedStatement('SELECT MAX("seq") FROM "changelog"', None),
+}
+
+
+class HotQueries:
+    default_mode = os.environ.get("AUTORENTX_HOT_QUERIES", HOT_PREPARED)
+
+    def __init__(self, mode: Optional[str] = None):
+        self.mode = mode or self.default_mode
+        if self.mode not in (HOT_ORM, HOT_PREPARED):
+            raise ValueError(f"Unknown hot query mode: {self.mode}")
+
+    # ---------- prepared backend ----------
+    @staticmethod
+    def _fetch(name: str, params: Sequence) -> list:
+        stmt = PREPARED[name]
+        db = DatabaseManager().db
+        if db.profiler is None:
+            rows = db.cursor().execute(stmt.sql, params).fetchall()
+        else:  # through execute_sql so the profiler sees it
+            rows = db.execute_sql(stmt.sql, params).fetchall()
+        return [stmt.row(r) for r in rows] if stmt.row else rows
+
+    # ---------- lookups ----------
+    def car(self, car_id: int) -> Optional[Car]:
+        return identity("car", car_id, lambda: self._car(car_id))
+
+    def profile(self, user_id: int) -> Optional[CustomerProfile]:
+        return identity("profile", user_id, lambda: self._profile(user_id))
+
+    def _car(self, car_id: int) -> Optional[Car]:
+        if self.mode == HOT_ORM:
+            return Car.get_or_none(Car.id == car_id)
+        rows = self._fetch("car_by_id", (car_id,))
+        return rows[0] if rows else None
+
+    def _profile(self, user_id: int) -> Optional[CustomerProfile]:
+        if self.mode == HOT_ORM:
+            return CustomerProfile.get_or_none(CustomerProfile.user == user_id)
+        rows = self._fetch("profile_by_user", (user_id,))
+        return rows[0] if rows else None
+
+    def applicable_rules(self, car_id: int, start: date, end: date, days: int) -> list[PricingRule]:
+        """Active rules (global or for this car) whose window covers [start, end] and min_days <= days"""
+        if self.mode == HOT_ORM:
+            return list(PricingRule
+                .select()
+                .where(
+                    (PricingRule.is_active == True) &
+                    ((PricingRule.scope == "global") | ((PricingRule.scope == "car") & (PricingRule.car == car_id))) &
+                    ((PricingRule.start_date.is_null(True)) | (PricingRule.start_date <= start)) &
+                    ((PricingRule.end_date.is_null(True))   | (PricingRule.end_date >= end)) &
+                    (PricingRule.min_days <= days)
+                ))
+        return self._fetch("applicable_rules", (car_id, start.isoformat(), end.isoformat(), days))
+
+    def has_overlap(self, car_id: int, start: date, end: date,
+                    statuses: Iterable[str] = (BOOKING_PENDING, BOOKING_CONFIRMED)) -> bool:
+        """Uncached overlap check against the database (the AvailabilityIndex answers from memory)"""
+        statuses = tuple(statuses)
+        if self.mode == HOT_ORM:
+            return (Booking.select()
+                    .where((Booking.car == car_id) & Booking.status.in_(statuses) &
+                           (Booking.start_date <= end) & (Booking.end_date >= start))
+                    .exists())
+        s, e = start.isoformat(), end.isoformat()
+        return any(self._fetch("booking_overlap", (car_id, status, e, s)) for status in statuses)
+
+    def user_auth(self, user_id: int) -> Optional[tuple[str, bool]]:
+        """(role, is_active) as stored now, uncached: the API checks it on every request"""
+        if self.mode == HOT_ORM:
+            return User.select(User.role, User.is_active).where(User.id == user_id).tuples().first()
+        rows = self._fetch("user_auth", (user_id,))
+        return (rows[0][0], bool(rows[0][1])) if rows else None
+
+    def changes_since(self, seq: int) -> list[tuple[int, str, Optional[int]]]:
+        """ChangeLog entries after seq, oldest first (db/changelog.py)"""
+        if self.mode == HOT_ORM:
+            return list(ChangeLog
+                        .select(ChangeLog.seq, ChangeLog.table_name, ChangeLog.row_id)
+                        .where(ChangeLog.seq > seq)
+                        .order_by(ChangeLog.seq)
+                        .tuples())
+        return self._fetch("changes_since", (seq,))
+
+    def latest_change(self) -> int:
+        if self.mode == HOT_ORM:
+            return ChangeLog.select(fn.MAX(ChangeLog.seq)).scalar() or 0
+        return self._fetch("latest_change", ())[0][0] or 0
+
+    def data_version(self) -> int:
+        """DataVersion counter: moves on every car / booking / pricing rule write"""
+        if self.mode == HOT_ORM:
+            return DataVersion.get_by_id(DATA_VERSION_ID).version
+        return self._fetch("data_version", (DATA_VERSION_ID,))[0][0]
@@ -0,0 +1,397 @@
+# db/migrations.py
+# -*- coding: utf-8 -*-
+"""
+Versioned schema migrations
+
+Each migration has a version number, a description and a function taking the
+database. `upgrade()` applies every migration newer than the highest version
+recorded in the SchemaVersion table, each one in its own transaction, so an
+existing car_rental.db is upgraded in place.
+
+`ensure_schema()` is the startup entry point: it compares a fingerprint of the
+models' DDL with the one stored on the latest SchemaVersion row and only runs
+`upgrade()` when they differ, so a normal start issues no DDL at all. If they
+differ but no migration was pending, the models or triggers were changed
+without a migration (or the database is newer than the code): that raises
+SchemaDriftError instead of stamping a fingerprint the schema doesn't match.
+
+Run headless:  python -m db.migrations
+"""
+
+import hashlib
+from contextlib import contextmanager
+from typing import Callable, NamedTuple, Optional
+from peewee import SqliteDatabase, OperationalError
+from playhouse.migrate import SqliteMigrator, migrate
+from db.db_manager import DatabaseManager
+from db.models import (
+    User, Car, AuditLog, PricingRule, CustomerProfile, Booking, Payment, ReservationHold, DataVersion, ChangeLog,
+    SchemaVersion, BOOKING_PENDING, BOOKING_CONFIRMED, BOOKING_OVERLAP_ERROR, DATA_VERSION_ID
+)
+
+ALL_MODELS = [User, Car, AuditLog, PricingRule, CustomerProfile, Booking, Payment, ReservationHold, DataVersion,
+              ChangeLog]
+
+
+class SchemaDriftError(Exception):
+    """The schema fingerprint changed but no migration brings the database there"""
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[SqliteDatabase], None]
+
+
+# ---------- helpers ----------
+def _columns(db: SqliteDatabase, table: str) -> set[str]:
+    return {c.name for c in db.get_columns(table)}
+
+
+def _add_missing_columns(db: SqliteDatabase, model, field_names: list[str]) -> None:
+    """ALTER TABLE ADD COLUMN for fields that an older database file lacks"""
+    table = model._meta.table_name
+    existing = _columns(db, table)
+    migrator = SqliteMigrator(db)
+    ops = []
+    for name in field_names:
+        field = model._meta.fields[name]
+        if field.column_name not in existing:
+            ops.append(migrator.add_column(table, field.column_name, field))
+    if ops:
+        migrate(*ops)
+
+
+# ---------- migrations ----------
+def _m1_baseline(db: SqliteDatabase) -> None:
+    # only tables that do not exist yet; indexes of older tables are handled by later
+    # migrations once their columns exist
+    db.create_tables([m for m in ALL_MODELS if not m.table_exists()], safe=True)
+
+
+def _m2_missing_columns(db: SqliteDatabase) -> None:
+    # columns the services already write (create_car min/max days, create_rule car)
+    _add_missing_columns(db, Car, ["min_days", "max_days"])
+    _add_missing_columns(db, PricingRule, ["car"])
+
+
+def _m3_hot_path_indexes(db: SqliteDatabase) -> None:
+    # composite indexes declared in Model.Meta.indexes (CREATE INDEX IF NOT EXISTS)
+    for model in (Booking, PricingRule):
+        model._schema.create_indexes(safe=True)
+    # single-column FK indexes are prefixes of the composite ones; dropping them stops
+    # the planner from picking the less selective index
+    db.execute_sql('DROP INDEX IF EXISTS "booking_car_id"')
+    db.execute_sql('DROP INDEX IF EXISTS "booking_user_id"')
+
+
+def _m4_schema_fingerprint(db: SqliteDatabase) -> None:
+    _add_missing_columns(db, SchemaVersion, ["fingerprint"])
+
+
+# An active (pending/confirmed) booking may not overlap a confirmed booking of the same car
+# (nor, from v6 on, a live reservation hold). Checked inside the INSERT/UPDATE statement itself,
+# i.e. while SQLite holds the write lock, so concurrent processes cannot both pass the check.
+_NOW = "((julianday('now') - 2440587.5) * 86400.0)"  # epoch seconds, like time.time()
+_ACTIVE = f"NEW.status IN ('{BOOKING_PENDING}', '{BOOKING_CONFIRMED}')"
+_LIVE_HOLD = f"""EXISTS (SELECT 1 FROM reservationhold h
+                  WHERE h.car_id = NEW.car_id AND h.expires_at > {_NOW}
+                    AND h.start_date <= NEW.end_date AND h.end_date >= NEW.start_date)"""
+
+
+def _booking_triggers(with_holds: bool) -> dict[str, str]:
+    check = f"""
+    SELECT RAISE(ABORT, '{BOOKING_OVERLAP_ERROR}')
+    WHERE EXISTS (SELECT 1 FROM booking b
+                  WHERE b.car_id = NEW.car_id AND b.status = '{BOOKING_CONFIRMED}'
+                    AND b.start_date <= NEW.end_date AND b.end_date >= NEW.start_date
+                    AND b.id IS NOT NEW.id){f" OR {_LIVE_HOLD}" if with_holds else ""};
+"""
+    return {
+        "booking_no_overlap_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS booking_no_overlap_insert
+        BEFORE INSERT ON booking
+        WHEN {_ACTIVE}
+        BEGIN {check} END""",
+        # Model.save() rewrites every column, so only fire when something relevant really changed
+        "booking_no_overlap_update": f"""
+        CREATE TRIGGER IF NOT EXISTS booking_no_overlap_update
+        BEFORE UPDATE OF car_id, status, start_date, end_date ON booking
+        WHEN {_ACTIVE} AND (NEW.car_id IS NOT OLD.car_id OR NEW.status IS NOT OLD.status
+                            OR NEW.start_date IS NOT OLD.start_date OR NEW.end_date IS NOT OLD.end_date)
+        BEGIN {check} END""",
+    }
+
+
+BOOKING_TRIGGERS = _booking_triggers(with_holds=True)
+
+# A hold is taken only if no active booking (pending included: the paid flow treats both as
+# taken) and no other live hold overlaps it
+HOLD_TRIGGERS = {
+    "reservationhold_no_overlap_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS reservationhold_no_overlap_insert
+        BEFORE INSERT ON reservationhold
+        BEGIN
+        SELECT RAISE(ABORT, '{BOOKING_OVERLAP_ERROR}')
+        WHERE EXISTS (SELECT 1 FROM booking b
+                      WHERE b.car_id = NEW.car_id AND b.status IN ('{BOOKING_PENDING}', '{BOOKING_CONFIRMED}')
+                        AND b.start_date <= NEW.end_date AND b.end_date >= NEW.start_date)
+           OR {_LIVE_HOLD};
+        END""",
+}
+
+
+# Car.active_bookings follows every booking insert / status or car change / delete, from any
+# code path or process, in the same transaction as the booking write
+_ACTIVE_SET = f"('{BOOKING_PENDING}', '{BOOKING_CONFIRMED}')"
+COUNTER_TRIGGERS = {
+    "booking_count_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS booking_count_insert
+        AFTER INSERT ON booking
+        WHEN NEW.status IN {_ACTIVE_SET}
+        BEGIN UPDATE car SET active_bookings = active_bookings + 1 WHERE id = NEW.car_id; END""",
+    "booking_count_update": f"""
+        CREATE TRIGGER IF NOT EXISTS booking_count_update
+        AFTER UPDATE OF status, car_id ON booking
+        WHEN (OLD.status IN {_ACTIVE_SET}) IS NOT (NEW.status IN {_ACTIVE_SET}) OR OLD.car_id IS NOT NEW.car_id
+        BEGIN
+        UPDATE car SET active_bookings = active_bookings - 1 WHERE id = OLD.car_id AND OLD.status IN {_ACTIVE_SET};
+        UPDATE car SET active_bookings = active_bookings + 1 WHERE id = NEW.car_id AND NEW.status IN {_ACTIVE_SET};
+        END""",
+    "booking_count_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS booking_count_delete
+        AFTER DELETE ON booking
+        WHEN OLD.status IN {_ACTIVE_SET}
+        BEGIN UPDATE car SET active_bookings = active_bookings - 1 WHERE id = OLD.car_id; END""",
+}
+
+# recompute from scratch (migration backfill and db.consistency repair)
+RECOUNT_ACTIVE_BOOKINGS_SQL = f"""
+    UPDATE car SET active_bookings = (
+        SELECT COUNT(*) FROM booking b WHERE b.car_id = car.id AND b.status IN {_ACTIVE_SET})"""
+
+
+# DataVersion.version moves on every write that can change a car search / listing result
+BUMP_DATA_VERSION_SQL = f"UPDATE dataversion SET version = version + 1 WHERE id = {DATA_VERSION_ID}"
+VERSION_TRIGGERS = {
+    f"{table}_version_{event.lower()}": f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+        AFTER {event} ON {table}
+        BEGIN {BUMP_DATA_VERSION_SQL}; END"""
+    for table in ("car", "booking", "pricingrule")
+    for event in ("INSERT", "UPDATE", "DELETE")
+}
+
+# ChangeLog gets the id of every booking entering, leaving or moving inside the active set and
+# of every car whose status changes, so the in-memory availability views of every process can
+# replay them (db/changelog.py)
+_LOG = "INSERT INTO changelog (table_name, row_id) VALUES"
+CHANGELOG_TRIGGERS = {
+    "booking_changelog_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS booking_changelog_insert
+        AFTER INSERT ON booking
+        WHEN NEW.status IN {_ACTIVE_SET}
+        BEGIN {_LOG} ('booking', NEW.id); END""",
+    "booking_changelog_update": f"""
+        CREATE TRIGGER IF NOT EXISTS booking_changelog_update
+        AFTER UPDATE OF car_id, status, start_date, end_date ON booking
+        WHEN (OLD.status IN {_ACTIVE_SET} OR NEW.status IN {_ACTIVE_SET})
+             AND (NEW.car_id IS NOT OLD.car_id OR NEW.status IS NOT OLD.status
+                  OR NEW.start_date IS NOT OLD.start_date OR NEW.end_date IS NOT OLD.end_date)
+        BEGIN {_LOG} ('booking', NEW.id); END""",
+    "booking_changelog_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS booking_changelog_delete
+        AFTER DELETE ON booking
+        WHEN OLD.status IN {_ACTIVE_SET}
+        BEGIN {_LOG} ('booking', OLD.id); END""",
+    "car_changelog_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS car_changelog_insert
+        AFTER INSERT ON car
+        BEGIN {_LOG} ('car', NEW.id); END""",
+    "car_changelog_update": f"""
+        CREATE TRIGGER IF NOT EXISTS car_changelog_update
+        AFTER UPDATE OF status ON car
+        WHEN NEW.status IS NOT OLD.status
+        BEGIN {_LOG} ('car', NEW.id); END""",
+}
+# a bulk statement that ran with the changelog triggers suspended logs this once instead
+LOG_BULK_BOOKING_CHANGE_SQL = f"{_LOG} ('booking', NULL)"
+
+
+@contextmanager
+def suspended_triggers(db: SqliteDatabase, names: list[str]):
+    """Drop the named triggers for a bulk statement and create them again afterwards
+
+    Only inside a transaction: the DDL commits or rolls back with it, so no other
+    connection ever runs without the triggers. The caller does the triggers' work
+    set-based (e.g. a recount) before the transaction commits.
+    """
+    if not db.in_transaction():
+        raise RuntimeError("suspended_triggers() needs an open transaction")
+    triggers = {**BOOKING_TRIGGERS, **HOLD_TRIGGERS, **COUNTER_TRIGGERS, **VERSION_TRIGGERS, **CHANGELOG_TRIGGERS}
+    for name in names:
+        db.execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+    try:
+        yield
+    finally:
+        for name in names:
+            db.execute_sql(triggers[name])
+
+
+def _m5_booking_overlap_triggers(db: SqliteDatabase) -> None:
+    for sql in _booking_triggers(with_holds=False).values():
+        db.execute_sql(sql)
+
+
+def _m6_reservation_holds(db: SqliteDatabase) -> None:
+    db.create_tables([ReservationHold], safe=True)
+    for name, sql in BOOKING_TRIGGERS.items():
+        db.execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+        db.execute_sql(sql)
+    for sql in HOLD_TRIGGERS.values():
+        db.execute_sql(sql)
+
+
+def _m7_active_booking_counter(db: SqliteDatabase) -> None:
+    _add_missing_columns(db, Car, ["active_bookings"])
+    db.execute_sql(RECOUNT_ACTIVE_BOOKINGS_SQL)
+    for sql in COUNTER_TRIGGERS.values():
+        db.execute_sql(sql)
+
+
+def _m8_data_version(db: SqliteDatabase) -> None:
+    db.create_tables([DataVersion], safe=True)
+    DataVersion.insert(id=DATA_VERSION_ID, version=0).on_conflict_ignore().execute()
+    for sql in VERSION_TRIGGERS.values():
+        db.execute_sql(sql)
+
+
+def _has_autoincrement(db: SqliteDatabase, table: str) -> bool:
+    row = db.execute_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    return bool(row) and "AUTOINCREMENT" in row[0].upper()
+
+
+def _m9_autoincrement_ids(db: SqliteDatabase) -> None:
+    # Without AUTOINCREMENT SQLite reuses the id of the newest booking / payment once it is
+    # archived (deleted), and the archive then holds a different row under the same id.
+    # Rebuild both tables with AUTOINCREMENT. Payments are dropped first, so dropping the
+    # bookings cascades nothing; the booking triggers go with the table and are recreated
+    # after the copy (so the copy itself fires none of them).
+    from db.archive import archived_max_ids, raise_id_sequence
+    if not (_has_autoincrement(db, "booking") and _has_autoincrement(db, "payment")):
+        for model in (Booking, Payment):
+            db.execute_sql(f"CREATE TEMP TABLE _m9_{model._meta.table_name} AS "
+                           f"SELECT * FROM main.{model._meta.table_name}")
+        db.execute_sql("DROP TABLE payment")
+        db.execute_sql("DROP TABLE booking")
+        for model in (Booking, Payment):
+            table = model._meta.table_name
+            cols = ", ".join(f'"{f.column_name}"' for f in model._meta.sorted_fields)
+            model.create_table(safe=False)
+            db.execute_sql(f"INSERT INTO main.{table} ({cols}) SELECT {cols} FROM temp._m9_{table}")
+            db.execute_sql(f"DROP TABLE temp._m9_{table}")
+        for sql in [*BOOKING_TRIGGERS.values(), *COUNTER_TRIGGERS.values(),
+                    *(v for k, v in VERSION_TRIGGERS.items() if k.startswith("booking_"))]:
+            db.execute_sql(sql)
+    for table, floor in archived_max_ids().items():
+        raise_id_sequence(db, table, floor)
+
+
+def _m10_changelog(db: SqliteDatabase) -> None:
+    db.create_tables([ChangeLog], safe=True)
+    for sql in CHANGELOG_TRIGGERS.values():
+        db.execute_sql(sql)
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "baseline tables", _m1_baseline),
+    Migration(2, "car.min_days/max_days and pricingrule.car_id", _m2_missing_columns),
+    Migration(3, "composite indexes for overlap checks, booking listings and pricing rules", _m3_hot_path_indexes),
+    Migration(4, "schemaversion.fingerprint", _m4_schema_fingerprint),
+    Migration(5, "triggers rejecting bookings that overlap a confirmed booking", _m5_booking_overlap_triggers),
+    Migration(6, "reservationhold table; holds count as occupied in the overlap triggers", _m6_reservation_holds),
+    Migration(7, "car.active_bookings kept by booking triggers", _m7_active_booking_counter),
+    Migration(8, "dataversion counter bumped by car/booking/pricingrule triggers", _m8_data_version),
+    Migration(9, "booking/payment ids AUTOINCREMENT, above every archived id", _m9_autoincrement_ids),
+    Migration(10, "changelog of availability-relevant booking/car changes, kept by triggers", _m10_changelog),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ---------- runner ----------
+def current_version(db: Optional[SqliteDatabase] = None) -> int:
+    db = db or DatabaseManager().db
+    if not db.table_exists(SchemaVersion._meta.table_name):
+        return 0
+    row = SchemaVersion.select(SchemaVersion.version).order_by(SchemaVersion.version.desc()).first()
+    return row.version if row else 0
+
+
+def upgrade(db: Optional[SqliteDatabase] = None) -> list[int]:
+    """Apply pending migrations in order; returns the versions applied"""
+    db = db or DatabaseManager().db
+    db.create_tables([SchemaVersion], safe=True)
+    applied = []
+    for m in MIGRATIONS:
+        if m.version <= current_version(db):
+            continue
+        with db.atomic():
+            m.apply(db)
+            SchemaVersion.create(version=m.version, description=m.description)
+        applied.append(m.version)
+    return applied
+
+
+def schema_fingerprint() -> str:
+    """sha256 over the migration level, every model's columns and indexes, and the triggers"""
+    parts = [str(LATEST_VERSION)]
+    for model in ALL_MODELS + [SchemaVersion]:
+        meta = model._meta
+        parts.append(meta.table_name)
+        for f in meta.sorted_fields:
+            parts.append(f"{f.column_name}:{f.field_type}:{f.null}:{f.unique}:{f.index}")
+        parts.append(repr(meta.indexes))
+    parts.extend(BOOKING_TRIGGERS.values())
+    parts.extend(HOLD_TRIGGERS.values())
+    parts.extend(COUNTER_TRIGGERS.values())
+    parts.extend(VERSION_TRIGGERS.values())
+    parts.extend(CHANGELOG_TRIGGERS.values())
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def stored_fingerprint(db: SqliteDatabase) -> Optional[str]:
+    try:
+        row = db.execute_sql("SELECT fingerprint FROM schemaversion ORDER BY version DESC LIMIT 1").fetchone()
+    except OperationalError:
+        return None  # no schemaversion table / column yet
+    return row[0] if row else None
+
+
+def ensure_schema(db: Optional[SqliteDatabase] = None) -> bool:
+    """Bring the schema up to date if needed; returns True if any DDL ran"""
+    db = db or DatabaseManager().db
+    fingerprint = schema_fingerprint()
+    stored = stored_fingerprint(db)
+    if stored == fingerprint:
+        return False
+    with db.atomic():
+        applied = upgrade(db)
+        # never stamped (fresh file, or upgraded by `python -m db.migrations`): nothing to compare with
+        if not applied and stored is not None:
+            raise SchemaDriftError(
+                f"Schema fingerprint changed but no migration is pending (database at version "
+                f"{current_version(db)}, code at {LATEST_VERSION}): add a Migration for the model or "
+                f"trigger change to db/migrations.py, or run the code that matches this database")
+        (SchemaVersion
+         .update(fingerprint=fingerprint)
+         .where(SchemaVersion.version == current_version(db))
+         .execute())
+    return True
+
+if __name__ == "__main__":
+    done = upgrade()
+    if done:
+        print(f"Applied migrations: {', '.join(map(str, done))} (schema version {LATEST_VERSION})")
+    else:
+        print(f"Schema is up to date (version {current_version()})")
@@ -1,8 +1,10 @@
 from peewee import (
     Model, CharField, BlobField, IntegerField, BooleanField, DateTimeField,
-    FloatField, AutoField, Check, DateField, ForeignKeyField, TextField
+    FloatField, AutoField, Check, DateField, ForeignKeyField, TextField, Case
 )
+from playhouse.sqlite_ext import AutoIncrementField
 from datetime import datetime
+import threading
 from db.db_manager import DatabaseManager
 
 db_manager = DatabaseManager()
@@ -12,12 +14,25 @@ class BaseModel(Model):
     class Meta:
         database = db
 
-def create_all_tables():
-    db = DatabaseManager().db
-    if db.is_closed():
-        db.connect(reuse_if_open=True)
-    models = [User, Car, AuditLog, PricingRule, CustomerProfile, Booking, Payment]
-    db.create_tables(models, safe=True)
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def create_all_tables(force: bool = False):
+    """
+    One-time schema bootstrap (once per process)
+    Skips all DDL when the stored schema fingerprint matches the models;
+    otherwise creates missing tables and applies pending migrations.
+    """
+    global _schema_ready
+    from db.migrations import ensure_schema
+    with _schema_lock:
+        if _schema_ready and not force:
+            return
+        db = DatabaseManager().db
+        if db.is_closed():
+            db.connect(reuse_if_open=True)
+        ensure_schema(db)
+        _schema_ready = True
 
 class User(BaseModel):
     """用户表 / User table"""
@@ -48,12 +63,45 @@ class Car(BaseModel):
     year = IntegerField()                           # 年份 / Year
     kilometre = IntegerField()                      # 里程 / Kilometre (km)
     daily_rate = FloatField()                       # 日租价 / Daily rate
+    min_days = IntegerField(default=1)              # 最短租期 / Min rental days
+    max_days = IntegerField(default=30)             # 最长租期 / Max rental days
     # 加 Check 约束（DB 层防呆）/ DB-level CHECK for safety
     status = CharField(
         max_length=20,
         default=STATUS_AVAILABLE,
         constraints=[Check(f"status in ('{STATUS_AVAILABLE}','{STATUS_UNAVAILABLE}','{STATUS_MAINTENANCE}','{STATUS_RESERVED}')")]
     )
+    # pending + confirmed 预订数，由触发器维护 / pending + confirmed bookings, kept by triggers (db/migrations.py v7)
+    active_bookings = IntegerField(default=0)
+
+    class Meta:
+        # save() 只写修改过的字段，避免覆盖触发器维护的计数 / save() writes changed fields only,
+        # so a stale in-memory active_bookings never overwrites the trigger-maintained value
+        only_save_dirty = True
+
+def refresh_car_status(car_id: int) -> str:
+    """
+    reserved if the car has active bookings, else available: one UPDATE on the
+    trigger-maintained counter (no Booking scan). Returns the new status.
+    """
+    return (Car
+            .update(status=Case(None, [(Car.active_bookings > 0, STATUS_RESERVED)], STATUS_AVAILABLE))
+            .where(Car.id == car_id)
+            .returning(Car.status)
+            .tuples()
+            .execute())[0][0]
+
+def refresh_car_statuses(car_ids) -> dict:
+    """refresh_car_status for many cars in one UPDATE; returns {car_id: new status}"""
+    car_ids = list(car_ids)
+    if not car_ids:
+        return {}
+    return dict(Car
+            .update(status=Case(None, [(Car.active_bookings > 0, STATUS_RESERVED)], STATUS_AVAILABLE))
+            .where(Car.id.in_(car_ids))
+            .returning(Car.id, Car.status)
+            .tuples()
+            .execute())
 
 # ====== 审计日志 / Audit log ======
 class AuditLog(BaseModel):
@@ -95,12 +143,19 @@ class PricingRule(BaseModel):
     amount_type = CharField(max_length=20, constraints=[Check(f"amount_type in ('{AMOUNT_PERCENT}','{AMOUNT_FIXED}')")])
     amount_value = FloatField()  # percent: 10=10%；fixed：金额
     scope = CharField(max_length=20, default="global")  # "global" or "car"
+    car = ForeignKeyField(Car, null=True, backref="pricing_rules", on_delete="CASCADE")  # scope="car" 时的目标车辆 / target car when scope="car"
     min_days = IntegerField(default=1)  # 满足最小租期触发
     start_date = DateField(null=True)
     end_date = DateField(null=True)
     is_active = BooleanField(default=True)
     created_at = DateTimeField(default=datetime.now)
 
+    class Meta:
+        indexes = (
+            # PricingService.quote: active rules filtered by min_days
+            (("is_active", "min_days"), False),
+        )
+
 # ====== 客户档案 / Customer profile ======
 class CustomerProfile(BaseModel):
     """
@@ -122,10 +177,19 @@ BOOKING_CANCELLED = "cancelled"
 BOOKING_COMPLETED = "completed"
 BOOKING_STATUS_CHOICES = (BOOKING_PENDING, BOOKING_CONFIRMED, BOOKING_CANCELLED, BOOKING_COMPLETED)
 
+# 由 booking/hold 重叠触发器抛出 / raised by the booking and hold overlap triggers (db/migrations.py)
+BOOKING_OVERLAP_ERROR = "slot overlaps a confirmed booking or a live hold"
+
+def is_booking_overlap(exc: Exception) -> bool:
+    """True if a database error is the overlap trigger firing"""
+    return BOOKING_OVERLAP_ERROR in str(exc)
+
 class Booking(BaseModel):
-    id = AutoField()
-    car = ForeignKeyField(Car, backref="bookings", on_delete="CASCADE")
-    user = ForeignKeyField(User, backref="bookings", on_delete="CASCADE")
+    # AUTOINCREMENT: ids of archived (deleted) bookings are never handed out again
+    id = AutoIncrementField()
+    # 单列索引由下方复合索引覆盖 / single-column FK indexes are covered by the composite ones below
+    car = ForeignKeyField(Car, backref="bookings", on_delete="CASCADE", index=False)
+    user = ForeignKeyField(User, backref="bookings", on_delete="CASCADE", index=False)
     start_date = DateField()
     end_date = DateField()
     status = CharField(
@@ -150,8 +214,18 @@ class Booking(BaseModel):
 
     created_at = DateTimeField(default=datetime.now)
 
+    class Meta:
+        indexes = (
+            # 冲突检查 / overlap checks: car + status + date range
+            (("car", "status", "start_date", "end_date"), False),
+            # list_my_bookings: user + status
+            (("user", "status"), False),
+            # list_pending: status (rowid order comes for free)
+            (("status",), False),
+        )
+
 class Payment(BaseModel):
-    id = AutoField()
+    id = AutoIncrementField()
     booking = ForeignKeyField(Booking, backref="payments", on_delete="CASCADE")
     method = CharField(max_length=30)
     amount = FloatField()
@@ -159,4 +233,60 @@ class Payment(BaseModel):
     ok = BooleanField(default=False)
     message = TextField(null=True)
     txn_id = CharField(max_length=64, null=True)
-    created_at = DateTimeField(default=datetime.now)
\ No newline at end of file
+    created_at = DateTimeField(default=datetime.now)
+
+# ====== 预留锁定 / Reservation holds ======
+class ReservationHold(BaseModel):
+    """
+    支付期间的临时占用 / Short-lived claim on a car while the customer pays
+    Live while expires_at (epoch seconds) is in the future; the overlap triggers treat
+    live holds as occupied. Converted into a Booking on payment, or swept once expired.
+    """
+    id = AutoField()
+    car = ForeignKeyField(Car, backref="holds", on_delete="CASCADE", index=False)
+    user = ForeignKeyField(User, backref="holds", on_delete="CASCADE")
+    start_date = DateField()
+    end_date = DateField()
+    expires_at = FloatField()
+    created_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        indexes = (
+            # overlap checks: car + date range
+            (("car", "start_date", "end_date"), False),
+            # sweeper
+            (("expires_at",), False),
+        )
+
+# ====== 数据版本 / Data version ======
+DATA_VERSION_ID = 1
+
+class DataVersion(BaseModel):
+    """
+    数据版本计数器 / One-row write counter for cached reads (row DATA_VERSION_ID)
+    Triggers bump it on every car, booking and pricing rule insert/update/delete, from any
+    code path or process (db/migrations.py v8), so a result cached together with the
+    version it was built at is current exactly while the counter has not moved.
+    """
+    id = IntegerField(primary_key=True)
+    version = IntegerField(default=0)
+
+# ====== 变更日志 / Change log ======
+class ChangeLog(BaseModel):
+    """
+    变更日志 / Bookings and cars whose change can alter availability, appended by triggers
+    from any code path or process (db/migrations.py v10). The in-memory availability views
+    replay the entries after the last seq they applied (db/changelog.py). seq is AUTOINCREMENT,
+    so a gap means entries were pruned; row_id NULL means "bulk change, reload everything".
+    """
+    seq = AutoIncrementField()
+    table_name = CharField(max_length=20)   # booking / car
+    row_id = IntegerField(null=True)
+
+# ====== 结构版本 / Schema version ======
+class SchemaVersion(BaseModel):
+    """已应用的迁移 / Applied schema migrations (see db/migrations.py)"""
+    version = IntegerField(primary_key=True)
+    description = CharField(max_length=200)
+    fingerprint = CharField(max_length=64, null=True)  # 模型 DDL 摘要 / hash of the models' DDL
+    applied_at = DateTimeField(default=datetime.now)
@@ -0,0 +1,277 @@
+# db/profiler.py
+# -*- coding: utf-8 -*-
+"""
+SQL profiler (opt-in)
+
+When enabled on the DatabaseManager, every statement the app runs is recorded
+with its duration (execute + fetch), its row count and the shape of its
+parameters. Statements are aggregated per (call site, SQL). The call site is
+the first frame outside the database layer and libraries, e.g.
+`customer_service.rent_service:RentService.prepare_order`. The prepared hot
+queries are included.
+
+A statement slower than slow_ms gets its EXPLAIN QUERY PLAN captured once per
+(call site, SQL), on the connection that ran it.
+
+    DatabaseManager().enable_profiling(slow_ms=20)   # or AUTORENTX_SQL_PROFILE=1
+    ... run the workload ...
+    print(format_report(DatabaseManager().profiler.report()))
+    DatabaseManager().profiler.dump("sql_profile.json")
+
+Compare two dumps in CI (exit status 1 if statements were added or their call
+counts grew):
+
+    python -m db.profiler base.json new.json
+
+While enabled, SELECT rows are counted through a proxy cursor (one Python call
+per row). Disabled, the cost is one attribute check per statement.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Sequence
+
+DEFAULT_SLOW_MS = float(os.environ.get("AUTORENTX_SQL_SLOW_MS") or 50)
+MAX_SHAPES = 8  # distinct parameter shapes kept per statement
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+# database plumbing: the interesting caller is above these
+_SKIP_MODULES = {"db.db_manager", "db.profiler", "db.hot_queries", "db.models", "db.group_commit", "db.changelog",
+                 "db.unit_of_work", "common.pagination", "common.rows"}
+_PLACEHOLDER_LIST = re.compile(r"\(\?(?:\s*,\s*\?)*\)")
+_SAVEPOINT_NAME = re.compile(r'(SAVEPOINT\s+)"s[0-9a-f]+"')  # peewee names savepoints with a random uuid
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse (?, ?, ...) lists and savepoint names so one statement doesn't split per list length / transaction"""
+    sql = _PLACEHOLDER_LIST.sub("(?, ...)", " ".join(sql.split()))
+    return _SAVEPOINT_NAME.sub(r'\1"s..."', sql)
+
+
+def params_shape(params: Optional[Sequence]) -> str:
+    if not params:
+        return "()"
+    names = [type(p).__name__ for p in params[:6]]
+    more = f", ... {len(params)} params" if len(params) > 6 else ""
+    return f"({', '.join(names)}{more})"
+
+
+def call_site() -> str:
+    """module:qualname of the nearest app frame outside the database layer"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if frame.f_code.co_filename.startswith(_APP_ROOT) and module not in _SKIP_MODULES:
+            return f"{module}:{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+@dataclass
+class StatementStats:
+    call_site: str
+    sql: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    slow: int = 0
+    shapes: set = field(default_factory=set)
+    plan: Optional[list] = None  # EXPLAIN QUERY PLAN details, captured the first time it ran slow
+
+    def as_dict(self) -> dict:
+        return {
+            "call_site": self.call_site, "sql": self.sql, "calls": self.calls,
+            "total_ms": round(self.total_ms, 3), "avg_ms": round(self.total_ms / self.calls, 3) if self.calls else 0,
+            "max_ms": round(self.max_ms, 3), "rows": self.rows, "slow": self.slow,
+            "shapes": sorted(self.shapes), "plan": self.plan,
+        }
+
+
+class _Execution:
+    """One statement in flight: finished when its rows are exhausted or its cursor goes away"""
+    __slots__ = ("profiler", "db", "site", "sql", "params", "elapsed", "rows", "done")
+
+    def __init__(self, profiler: "SqlProfiler", db, site: str, sql: str, params, elapsed: float):
+        self.profiler, self.db, self.site, self.sql, self.params = profiler, db, site, sql, params
+        self.elapsed, self.rows, self.done = elapsed, 0, False
+
+    def finish(self) -> None:
+        if not self.done:
+            self.done = True
+            self.profiler.record(self.db, self.site, self.sql, self.params, self.elapsed, self.rows)
+
+
+class ProfilingCursor:
+    """sqlite3 cursor proxy that adds fetch time and rows to its _Execution"""
+    __slots__ = ("_cursor", "_execution")
+
+    def __init__(self, cursor, execution: _Execution):
+        self._cursor = cursor
+        self._execution = execution
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = self._cursor.fetchone()
+        ex = self._execution
+        ex.elapsed += time.perf_counter() - t0
+        if row is None:
+            ex.finish()
+        else:
+            ex.rows += 1
+        return row
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = self._cursor.fetchall()
+        ex = self._execution
+        ex.elapsed += time.perf_counter() - t0
+        ex.rows += len(rows)
+        ex.finish()
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._execution.finish()
+        self._cursor.close()
+
+    def __del__(self):
+        self._execution.finish()
+
+    def __getattr__(self, name):  # description, lastrowid, rowcount, ...
+        return getattr(self._cursor, name)
+
+
+class SqlProfiler:
+    def __init__(self, slow_ms: float = DEFAULT_SLOW_MS):
+        self.slow_ms = slow_ms
+        self.started_at = datetime.now()
+        self._stats: dict[tuple[str, str], StatementStats] = {}
+        self._lock = threading.Lock()
+
+    # ---------- recording (called by the database, see db_manager.ProfiledDatabaseMixin) ----------
+    def execute(self, db, execute, sql: str, params):
+        """Run execute(sql, params) and return its cursor, profiled"""
+        site = call_site()
+        t0 = time.perf_counter()
+        cursor = execute(sql, params)
+        ex = _Execution(self, db, site, sql, params, time.perf_counter() - t0)
+        if cursor.description is None:  # no result rows: INSERT / UPDATE / DDL ...
+            ex.rows = max(cursor.rowcount, 0)
+            ex.finish()
+            return cursor
+        return ProfilingCursor(cursor, ex)
+
+    def record(self, db, site: str, sql: str, params, elapsed: float, rows: int) -> None:
+        ms = elapsed * 1000
+        key = (site, normalize_sql(sql))
+        with self._lock:
+            st = self._stats.get(key)
+            if st is None:
+                st = self._stats[key] = StatementStats(site, key[1])
+            st.calls += 1
+            st.total_ms += ms
+            st.max_ms = max(st.max_ms, ms)
+            st.rows += rows
+            if len(st.shapes) < MAX_SHAPES:
+                st.shapes.add(params_shape(params))
+            slow = ms >= self.slow_ms
+            if slow:
+                st.slow += 1
+            explain = slow and st.plan is None and sql.lstrip()[:7].upper().startswith(_EXPLAINABLE)
+            if explain:
+                st.plan = []  # claimed: captured once
+        if explain:
+            plan = self._explain(db, sql, params)
+            with self._lock:
+                st.plan = plan
+
+    @staticmethod
+    def _explain(db, sql: str, params) -> list:
+        try:
+            rows = db.cursor().execute("EXPLAIN QUERY PLAN " + sql, params or ()).fetchall()
+        except Exception as e:  # connection gone, statement not explainable, ...
+            return [f"<EXPLAIN failed: {e}>"]
+        return [r[-1] for r in rows]
+
+    # ---------- reporting ----------
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.started_at = datetime.now()
+
+    def statements(self) -> list[StatementStats]:
+        with self._lock:
+            return sorted(self._stats.values(), key=lambda s: s.total_ms, reverse=True)
+
+    def report(self) -> dict:
+        """JSON-ready: per call site totals and per statement detail, both by total time"""
+        statements = [s.as_dict() for s in self.statements()]
+        sites: dict[str, dict] = {}
+        for s in statements:
+            site = sites.setdefault(s["call_site"], {"call_site": s["call_site"], "statements": 0, "calls": 0,
+                                                     "total_ms": 0.0, "rows": 0, "slow": 0})
+            site["statements"] += 1
+            for k in ("calls", "total_ms", "rows", "slow"):
+                site[k] += s[k]
+        for site in sites.values():
+            site["total_ms"] = round(site["total_ms"], 3)
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "slow_ms": self.slow_ms,
+            "call_sites": sorted(sites.values(), key=lambda s: s["total_ms"], reverse=True),
+            "statements": statements,
+        }
+
+    def dump(self, path: str) -> dict:
+        report = self.report()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def format_report(report: dict, limit: int = 15) -> str:
+    lines = [f"SQL profile since {report['started_at']} (slow >= {report['slow_ms']:g} ms)",
+             f"{'call site':<64} {'stmts':>5} {'calls':>7} {'total ms':>10} {'rows':>8} {'slow':>5}"]
+    for s in report["call_sites"][:limit]:
+        lines.append(f"{s['call_site'][:64]:<64} {s['statements']:>5} {s['calls']:>7} {s['total_ms']:>10.1f} "
+                     f"{s['rows']:>8} {s['slow']:>5}")
+    slow = [s for s in report["statements"] if s["slow"]]
+    if slow:
+        lines.append("")
+        lines.append("Slow statements:")
+        for s in slow[:limit]:
+            lines.append(f"- {s['call_site']}  x{s['slow']}  max {s['max_ms']:.1f} ms  {s['sql'][:160]}")
+            lines.extend(f"    {step}" for step in s["plan"] or [])
+    return "\n".join(lines)
+
+
+def compare_reports(base: dict, new: dict) -> list[str]:
+    """Regressions from base to new: statements that appeared, or whose call count grew"""
+    before = {(s["call_site"], s["sql"]): s["calls"] for s in base["statements"]}
+    problems = []
+    for s in new["statements"]:
+        calls = before.get((s["call_site"], s["sql"]))
+        if calls is None:
+            problems.append(f"new statement at {s['call_site']} (x{s['calls']}): {s['sql'][:160]}")
+        elif s["calls"] > calls:
+            problems.append(f"{s['call_site']}: {calls} -> {s['calls']} calls: {s['sql'][:160]}")
+    return problems
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m db.profiler BASE.json NEW.json")
+    with open(sys.argv[1], encoding="utf-8") as f_base, open(sys.argv[2], encoding="utf-8") as f_new:
+        regressions = compare_reports(json.load(f_base), json.load(f_new))
+    print("\n".join(regressions) or "No new statements and no call count increases")
+    sys.exit(1 if regressions else 0)
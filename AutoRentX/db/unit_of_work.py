@@ -0,0 +1,81 @@
+# db/unit_of_work.py
+# -*- coding: utf-8 -*-
+"""
+Request-scoped identity map
+
+A unit of work spans one service operation (e.g. RentService.place_order_and_pay).
+Inside it, lookups that go through `identity()` (HotQueries.car / .profile) load
+each entity at most once and hand every caller the same instance, so the
+service methods it calls (quote, pricing, status refresh) share what was
+already loaded and see each other's in-memory changes.
+
+    @unit_of_work()                  # or:  with unit_of_work(): ...
+    def place_order_and_pay(...): ...
+
+Nested scopes join the outermost one. The map lives in a ContextVar, so
+threads and asyncio tasks never share it, and it is dropped when the
+outermost scope exits: nothing is cached across operations.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Hashable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class IdentityMap:
+    __slots__ = ("_entities", "loads", "hits")
+
+    def __init__(self):
+        self._entities: dict[tuple[str, Hashable], Any] = {}
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, kind: str, key: Hashable, load: Callable[[], T]) -> T:
+        """The entity for (kind, key), calling load() only the first time (a None result is kept too)"""
+        try:
+            entity = self._entities[(kind, key)]
+        except KeyError:
+            self.loads += 1
+            entity = self._entities[(kind, key)] = load()
+            return entity
+        self.hits += 1
+        return entity
+
+    def put(self, kind: str, key: Hashable, entity: Any) -> None:
+        self._entities[(kind, key)] = entity
+
+
+_current: ContextVar[Optional[IdentityMap]] = ContextVar("autorentx_identity_map", default=None)
+
+
+@contextmanager
+def unit_of_work() -> Iterator[IdentityMap]:
+    outer = _current.get()
+    if outer is not None:
+        yield outer
+        return
+    imap = IdentityMap()
+    token = _current.set(imap)
+    try:
+        yield imap
+    finally:
+        _current.reset(token)
+
+
+def current_identity_map() -> Optional[IdentityMap]:
+    return _current.get()
+
+
+def identity(kind: str, key: Hashable, load: Callable[[], T]) -> T:
+    """load() through the active identity map, or directly outside a unit of work"""
+    imap = _current.get()
+    return load() if imap is None else imap.get(kind, key, load)
+
+
+def remember(kind: str, key: Hashable, entity: Any) -> None:
+    """Record an entity just written, so later lookups in this unit of work see it"""
+    imap = _current.get()
+    if imap is not None:
+        imap.put(kind, key, entity)
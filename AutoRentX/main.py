@@ -1,13 +1,18 @@
 # main.py
 # -*- coding: utf-8 -*-
+import os
 from typing import Optional
 from auth_service import PeeweeAuthService
-from db.models import User as DbUser
+from db.models import User as DbUser, create_all_tables
 from admin_service.car_service import PeeweeCarService
+from admin_service.audit_service import AuditService, AUDIT_BUFFERED
 from controllers import MenuFactory
 
 class CarRentalCLIApp:
     def __init__(self):
+        # audit writes leave the request path unless AUTORENTX_AUDIT_MODE says otherwise
+        AuditService.default_mode = os.environ.get("AUTORENTX_AUDIT_MODE", AUDIT_BUFFERED)
+        create_all_tables()  # create missing tables + apply pending migrations
         self.auth = PeeweeAuthService()
         self.cars = PeeweeCarService()
         self.current_user: Optional[DbUser] = None
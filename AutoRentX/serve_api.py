@@ -0,0 +1,42 @@
+# serve_api.py
+# -*- coding: utf-8 -*-
+"""
+Run the JSON API (api/app.py) on a threaded WSGI server
+
+    AUTORENTX_API_SECRET=<long random string> python serve_api.py [--host 127.0.0.1] [--port 8000]
+
+The secret signs login tokens; it is required, so tokens survive restarts and
+every worker process accepts the others' tokens.
+
+Werkzeug's threaded server runs one thread per request; the database runs
+pooled (AUTORENTX_DB_MAX_CONNECTIONS caps concurrent connections, further
+requests wait for one), group-committed like the CLI, with audit writes buffered.
+Any WSGI server that runs `serve_api:app` works the same way.
+"""
+import argparse
+import os
+import sys
+from db.db_manager import DatabaseManager, DURABILITY_BALANCED
+
+API_SECRET = os.environ.get("AUTORENTX_API_SECRET")
+if not API_SECRET:
+    sys.exit("AUTORENTX_API_SECRET is not set: export a long random string to sign API tokens")
+
+# before anything opens the database
+DatabaseManager.configure(pooled=True,
+                          durability=os.environ.get("AUTORENTX_DURABILITY") or DURABILITY_BALANCED)
+
+from admin_service.audit_service import AuditService, AUDIT_BUFFERED
+from db.models import create_all_tables
+from api import create_app
+
+AuditService.default_mode = os.environ.get("AUTORENTX_AUDIT_MODE", AUDIT_BUFFERED)
+create_all_tables()  # create missing tables + apply pending migrations
+app = create_app(secret=API_SECRET)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AutoRentX JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    app.run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,187 @@
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest.mock import patch
+
+# Point the app at a throw-away database before any db module is imported
+os.environ.setdefault("AUTORENTX_DB", os.path.join(tempfile.mkdtemp(prefix="autorentx-"), "test.db"))
+os.environ["AUTORENTX_AUDIT_MODE"] = "sync"  # strict: audit rows are visible as soon as write() returns
+
+import pytest
+from peewee import IntegrityError
+from db.models import (
+    db, create_all_tables, Booking, Car, CustomerProfile, SchemaVersion, User,
+    BOOKING_CANCELLED, BOOKING_CONFIRMED, BOOKING_PENDING, STATUS_AVAILABLE,
+)
+from db.migrations import ALL_MODELS
+from common.availability_index import AvailabilityIndex
+from common.availability_calendar import AvailabilityCalendar
+from admin_service.pricing_engine import PricingRuleEngine
+
+MODELS = ALL_MODELS + [SchemaVersion]
+
+
+@pytest.fixture(autouse=True)
+def fresh_db():
+    """Every test starts from empty tables and cold in-memory caches"""
+    db.drop_tables(MODELS, safe=True)
+    create_all_tables(force=True)
+    AvailabilityIndex().invalidate()
+    AvailabilityCalendar().invalidate()
+    PricingRuleEngine().invalidate()
+    yield db
+
+
+class _StatementLog(logging.Handler):
+    """Collects every SQL statement Peewee logs (it logs (sql, params) at DEBUG)"""
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.statements: list[str] = []
+
+    def emit(self, record):
+        self.statements.append(record.msg[0] if isinstance(record.msg, tuple) else record.getMessage())
+
+
+@pytest.fixture
+def count_queries():
+    """with count_queries() as log: ...  ->  len(log.statements)"""
+    @contextmanager
+    def _count():
+        logger = logging.getLogger("peewee")
+        handler, level = _StatementLog(), logger.level
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+        try:
+            yield handler
+        finally:
+            logger.removeHandler(handler)
+            logger.setLevel(level)
+    return _count
+
+
+@pytest.fixture
+def other_process():
+    """A second sqlite3 connection to the test database, standing in for another process's writes"""
+    conn = sqlite3.connect(os.environ["AUTORENTX_DB"], isolation_level=None)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def book_elsewhere(other_process):
+    """Insert a booking through other_process; returns its id"""
+    def _book(car_id, user_id, start, days, status=BOOKING_CONFIRMED):
+        end = start + timedelta(days=days - 1)
+        return other_process.execute(
+            "INSERT INTO booking (car_id, user_id, start_date, end_date, status, days, base_daily_rate, base_cost,"
+            " adj_total, grand_total, snap_first_name, snap_last_name, snap_phone, snap_id_document, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, 10, 10, 0, 10, 'A', 'B', '1', 'X', '2030-01-01 00:00:00')",
+            (car_id, user_id, start.isoformat(), end.isoformat(), status, days)).lastrowid
+    return _book
+
+
+# ---------- factories (fixtures returning a function, so test modules never import each other) ----------
+@pytest.fixture
+def make_user():
+    """make_user() -> a customer with a complete profile"""
+    def _make():
+        user = User.create(name="u", email=f"u{random.random()}@x.io", password_salt=b"s",
+                           password_hash=b"h", iterations=1)
+        CustomerProfile.create(user=user, first_name="A", last_name="B", phone="1", id_document="X")
+        return user
+    return _make
+
+
+@pytest.fixture
+def make_car():
+    """make_car(status=available) -> a car at 50.0 a day"""
+    def _make(status=STATUS_AVAILABLE):
+        return Car.create(make="T", model="M", year=2024, kilometre=10, daily_rate=50.0, status=status)
+    return _make
+
+
+@pytest.fixture
+def make_booking():
+    """make_booking(car, user, start, days, status) -> a booking row, straight into the table"""
+    def _make(car, user, start, days, status):
+        return Booking.create(car=car, user=user, start_date=start, end_date=start + timedelta(days=days - 1),
+                              status=status, snap_first_name="A", snap_last_name="B",
+                              snap_phone="1", snap_id_document="X")
+    return _make
+
+
+@pytest.fixture
+def random_booking(make_booking):
+    """random_booking(rnd, cars, user, start) -> a random booking, or None when the overlap trigger rejects it"""
+    def _make(rnd, cars, user, start):
+        try:
+            return make_booking(rnd.choice(cars), user, start, rnd.randint(1, 14),
+                                rnd.choice([BOOKING_PENDING, BOOKING_CONFIRMED, BOOKING_CANCELLED]))
+        except IntegrityError:
+            return None
+    return _make
+
+
+@pytest.fixture
+def sql_available():
+    """sql_available(start, end) -> ids of available cars, by the original NOT IN query (the reference)"""
+    def _query(start, end):
+        overlapping = (Booking
+                       .select(Booking.car)
+                       .where((Booking.status == BOOKING_CONFIRMED) &
+                              (Booking.start_date <= end) &
+                              (Booking.end_date >= start)))
+        q = Car.select().where((Car.status == STATUS_AVAILABLE) & (Car.id.not_in(overlapping)))
+        return [c.id for c in q.order_by(Car.id.desc())]
+    return _query
+
+
+# ---------- JSON API ----------
+API_START, API_END = "01-08-2030", "03-08-2030"
+
+
+@pytest.fixture
+def client():
+    """Flask test client of the API, payments never fail"""
+    from api import create_app
+    with patch("common.payment_app.random.random", return_value=0.5):
+        yield create_app(secret="test").test_client()
+
+
+@pytest.fixture
+def make_account():
+    """make_account(email, role="customer") -> a user who can log in with password "pw" """
+    from auth_service import hash_password
+
+    def _make(email, role="customer"):
+        salt, digest, iterations = hash_password("pw", iterations=1)
+        user = User.create(name=email.split("@")[0], email=email, role=role, password_salt=salt,
+                           password_hash=digest, iterations=iterations)
+        CustomerProfile.create(user=user, first_name="A", last_name="B", phone="1", id_document="X")
+        return user
+    return _make
+
+
+@pytest.fixture
+def api_login():
+    """api_login(client, email) -> Authorization header of a fresh token"""
+    def _login(client, email):
+        r = client.post("/api/login", json={"email": email, "password": "pw"})
+        assert r.status_code == 200
+        return {"Authorization": f"Bearer {r.json['token']}"}
+    return _login
+
+
+@pytest.fixture
+def api_order():
+    """api_order(client, auth, car_id, start, end) -> response of POST /api/orders (paypal)"""
+    def _order(client, auth, car_id, start=API_START, end=API_END):
+        return client.post("/api/orders", headers=auth, json={"car_id": car_id, "start": start, "end": end,
+                                                             "pay_method": "paypal",
+                                                             "pay_kwargs": {"email": "a@b.io"}})
+    return _order
@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from db.models import Booking, PricingRule, User, BOOKING_CONFIRMED
+from api import create_app, STATUS_FOR
+from common.exceptions import AppError, ConflictError
+
+START, END = "01-08-2030", "03-08-2030"
+
+
+def test_customer_and_admin_flow(client, make_car, make_account, api_login, api_order):
+    make_account("c@x.io"), make_account("a@x.io", role="admin")
+    car, other = make_car(), make_car()
+    PricingRule.create(name="g", rule_type="discount", amount_type="percent", amount_value=10)
+    assert client.post("/api/login", json={"email": "c@x.io", "password": "no"}).status_code == 401
+    assert client.get("/api/cars", query_string={"start": START, "end": END}).status_code == 401
+    me, admin = api_login(client, "c@x.io"), api_login(client, "a@x.io")
+
+    r = client.get("/api/cars", headers=me, query_string={"start": START, "end": END})
+    assert [c["id"] for c in r.json["cars"]] == [other.id, car.id] and r.json["cars"][0]["total"] == 135.0
+    r = client.get(f"/api/cars/{car.id}/quote", headers=me, query_string={"start": START, "end": END})
+    assert (r.json["days"], r.json["total"]) == (3, 135.0)
+    assert client.get("/api/cars/999/quote", headers=me, query_string={"start": START, "end": END}).status_code == 404
+    r = client.get("/api/cars", headers=me, query_string={"start": "2030-08-01", "end": END})
+    assert r.status_code == 400 and r.json["error"] == "ValidationError"
+    assert client.post("/api/orders", headers=me, json=[1]).status_code == 400
+
+    r = api_order(client, me, car.id)
+    assert r.status_code == 201 and r.json["status"] == "pending" and r.json["start_date"] == "2030-08-01"
+    booking_id = r.json["id"]
+    assert api_order(client, me, car.id).json["error"] == "ConflictError"
+    assert client.get("/api/me/bookings", headers=me).json["bookings"][0]["car"]["id"] == car.id
+
+    assert client.get("/api/admin/bookings/pending", headers=me).status_code == 403
+    assert [b["id"] for b in client.get("/api/admin/bookings/pending", headers=admin).json["bookings"]] == [booking_id]
+    assert client.post(f"/api/admin/bookings/{booking_id}/approve", headers=admin).json["status"] == "confirmed"
+    assert client.post(f"/api/admin/bookings/{booking_id}/approve", headers=admin).status_code == 409
+
+    page = client.get("/api/admin/audit", headers=admin, query_string={"limit": 2}).json
+    assert [e["action"] for e in page["entries"]] == ["approve_booking", "create_booking"]
+    older = client.get("/api/admin/audit", headers=admin, query_string={"after": page["next_cursor"]}).json
+    assert older["entries"][0]["action"] == "create_payment" and older["next_cursor"] is None
+    assert client.get("/api/admin/audit", headers=admin, query_string={"after": 1, "before": 2}).status_code == 400
+    assert client.get("/api/nope", headers=admin).json["error"] == "Not Found"
+
+
+def test_status_mapping():
+    class SlotGone(ConflictError):
+        pass
+    assert STATUS_FOR[ConflictError] == 409
+    app = create_app(secret="test")
+
+    @app.get("/boom/<kind>")
+    def boom(kind):
+        raise {"sub": SlotGone("x"), "app": AppError("y"), "other": RuntimeError("z")}[kind]
+
+    client = app.test_client()
+    assert client.get("/boom/sub").status_code == 409
+    assert client.get("/boom/app").status_code == 400
+    r = client.get("/boom/other")
+    assert r.status_code == 500 and r.json["message"] == "Internal server error"
+
+
+def test_concurrent_requests(client, make_car, make_account, api_login, api_order):
+    users = [make_account(f"u{i}@x.io") for i in range(8)]
+    cars = [make_car() for _ in range(8)]
+    tokens = [api_login(client, u.email) for u in users]
+    with ThreadPoolExecutor(8) as pool:
+        own = list(pool.map(lambda i: api_order(client, tokens[i], cars[i].id).status_code, range(8)))
+        same = list(pool.map(lambda i: api_order(client, tokens[i], cars[0].id, "10-08-2030", "12-08-2030").status_code,
+                             range(8)))
+    assert own == [201] * 8
+    assert sorted(same) == [201] + [409] * 7
+    assert Booking.select().count() == 9
+    assert Booking.select().where(Booking.status == BOOKING_CONFIRMED).count() == 0
+
+
+def test_token_follows_the_current_account_state(client, make_account, api_login):
+    admin = make_account("a@x.io", role="admin")
+    auth = api_login(client, "a@x.io")
+    assert client.get("/api/admin/cache", headers=auth).status_code == 200
+
+    User.update(role="customer").where(User.id == admin.id).execute()
+    assert client.get("/api/admin/cache", headers=auth).status_code == 403      # demoted: old token, new role
+    assert client.get("/api/me/bookings", headers=auth).status_code == 200
+
+    User.update(is_active=False).where(User.id == admin.id).execute()
+    r = client.get("/api/me/bookings", headers=auth)
+    assert r.status_code == 401 and r.json["message"] == "Account disabled or removed"
+
+
+def test_server_refuses_to_start_without_a_secret():
+    env = {k: v for k, v in os.environ.items() if k != "AUTORENTX_API_SECRET"}
+    r = subprocess.run([sys.executable, "-c", "import serve_api"], env=env, capture_output=True, text=True,
+                       cwd=os.path.dirname(os.path.dirname(__file__)))
+    assert r.returncode == 1 and "AUTORENTX_API_SECRET" in r.stderr
@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+
+import pytest
+
+from db.models import AuditLog, Booking, Car, Payment, BOOKING_CANCELLED, BOOKING_COMPLETED, BOOKING_CONFIRMED
+from db.archive import (
+    ArchiveConflictError, ArchivedBooking, ArchivedPayment, archive_closed_bookings, booking_history, ensure_archive
+)
+from db.consistency import active_booking_drift
+from admin_service.archive_service import ArchiveService
+from customer_service.rent_service import RentService
+from common.exceptions import ValidationError
+
+OLD = date(2020, 3, 1)
+CUTOFF = date(2021, 1, 1)
+
+
+@pytest.fixture(autouse=True)
+def empty_archive(fresh_db):
+    ensure_archive()
+    ArchivedPayment.delete().execute()
+    ArchivedBooking.delete().execute()
+
+
+@pytest.fixture
+def paid(make_booking):
+    """paid(car, user, start, status) -> a two-day booking with one payment"""
+    def _paid(car, user, start, status):
+        b = make_booking(car, user, start, 2, status)
+        Payment.create(booking=b, method="card", amount=b.grand_total, ok=True)
+        return b
+    return _paid
+
+
+def test_moves_only_closed_bookings_before_cutoff(make_user, make_car, paid):
+    user, car = make_user(), make_car()
+    old = [paid(car, user, OLD + timedelta(days=3 * i), status)
+           for i, status in enumerate([BOOKING_COMPLETED, BOOKING_CANCELLED] * 4)]
+    old_open = paid(car, user, OLD + timedelta(days=100), BOOKING_CONFIRMED)
+    recent = paid(car, user, CUTOFF + timedelta(days=5), BOOKING_COMPLETED)
+
+    result = archive_closed_bookings(CUTOFF, batch_size=3)
+
+    assert (result.bookings, result.payments, result.batches) == (8, 8, 3)
+    assert sorted(b.id for b in Booking.select()) == [old_open.id, recent.id]
+    assert Payment.select().count() == 2
+    assert sorted(b.id for b in ArchivedBooking.select()) == [b.id for b in old]
+    assert ArchivedPayment.select().count() == 8
+    assert active_booking_drift() == []
+    assert archive_closed_bookings(CUTOFF).bookings == 0
+
+    history = RentService().list_booking_history(user.id)
+    assert [b.id for b in history] == [recent.id, old_open.id] + [b.id for b in reversed(old)]
+    assert [bool(b.archived) for b in history] == [False, False] + [True] * 8
+    assert history[-1].car_id == car.id and history[-1].start_date == OLD
+    assert booking_history(user_id=make_user().id) == []
+
+
+def test_interrupted_move_is_finished_and_never_read_twice(fresh_db, make_user, make_car, paid):
+    user, car = make_user(), make_car()
+    b = paid(car, user, OLD, BOOKING_COMPLETED)
+    # crash after the copy committed, before the hot delete
+    fresh_db.execute_sql("INSERT INTO archive.booking SELECT * FROM main.booking")
+    assert [(h.id, bool(h.archived)) for h in booking_history(car_id=car.id)] == [(b.id, False)]
+    assert archive_closed_bookings(CUTOFF).bookings == 1
+    assert [(h.id, bool(h.archived)) for h in booking_history(car_id=car.id)] == [(b.id, True)]
+    assert ArchivedPayment.select().count() == 1
+
+
+def test_archive_service_audits_and_validates(make_user, make_car, paid):
+    user, car = make_user(), make_car()
+    paid(car, user, OLD, BOOKING_COMPLETED)
+    svc = ArchiveService()
+    with pytest.raises(ValidationError):
+        svc.archive(cutoff=date.today() + timedelta(days=1))
+    svc.archive(actor_user_id=user.id, cutoff=CUTOFF)
+    log = AuditLog.get(AuditLog.action == "archive_bookings")
+    assert log.detail == "bookings=1 payments=1 before=2021-01-01"
+    assert svc.counts()["archived_bookings"] == 1
+    assert Car.get_by_id(car.id).active_bookings == 0
+
+
+def test_archived_ids_are_not_reused(make_user, make_car, paid):
+    user, car = make_user(), make_car()
+    first = paid(car, user, OLD, BOOKING_COMPLETED)
+    assert archive_closed_bookings(CUTOFF).bookings == 1
+    second = paid(car, user, OLD + timedelta(days=10), BOOKING_COMPLETED)  # newest row was deleted: id not reused
+    assert second.id > first.id and second.payments[0].id > ArchivedPayment.select().first().id
+
+    assert archive_closed_bookings(CUTOFF) == (1, 1, 1)
+    assert Booking.select().count() == 0
+    assert [(b.id, b.start_date) for b in ArchivedBooking.select().order_by(ArchivedBooking.id)] == \
+        [(first.id, OLD), (second.id, OLD + timedelta(days=10))]
+    assert [b.id for b in booking_history(user_id=user.id)] == [second.id, first.id]
+
+
+def test_archive_holding_another_row_under_the_same_id_fails_loudly(fresh_db, make_user, make_car, paid):
+    user, car = make_user(), make_car()
+    b = paid(car, user, OLD + timedelta(days=30), BOOKING_COMPLETED)
+    # an older row under the same id, archived before ids were AUTOINCREMENT
+    fresh_db.execute_sql("INSERT INTO archive.booking SELECT * FROM main.booking")
+    ArchivedBooking.update(start_date=OLD).execute()
+
+    with pytest.raises(ArchiveConflictError):
+        archive_closed_bookings(CUTOFF)
+    assert Booking.get_by_id(b.id).payments.count() == 1  # nothing deleted
+    assert ArchivedPayment.select().count() == 0
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from db.executor import DbExecutor
+from db.models import Booking, BOOKING_CONFIRMED, BOOKING_PENDING, ReservationHold
+from admin_service.async_facade import AsyncAuditService, AsyncBookingReviewService, AsyncPricingService
+from common.exceptions import ConflictError, NotFoundError
+from customer_service.async_facade import AsyncRentService
+
+DAY = date(2030, 7, 1)
+
+
+def _day(offset):
+    return (DAY + timedelta(days=offset)).strftime("%d-%m-%Y")
+
+
+@pytest.fixture
+def executor():
+    ex = DbExecutor(3)
+    yield ex
+    ex.close()
+
+
+def test_concurrent_orders_then_bulk_review(executor, make_user, make_car):
+    users, cars = [make_user() for _ in range(6)], [make_car() for _ in range(3)]
+    rent, review = AsyncRentService(executor=executor), AsyncBookingReviewService(executor=executor)
+    pay_threads = set()
+    real_process = rent.sync.gateway.process
+
+    def process(*args, **kwargs):
+        pay_threads.add(threading.current_thread().name)
+        return real_process(*args, **kwargs)
+
+    async def order(i):
+        return await rent.place_order_and_pay(actor_user_id=users[i].id, user_id=users[i].id, car_id=cars[i % 3].id,
+                                              start_str=_day(i), end_str=_day(i), pay_method="paypal",
+                                              pay_kwargs={"email": "a@b.io"})
+
+    async def scenario():
+        booked = await asyncio.gather(*(order(i) for i in range(6)))
+        with pytest.raises(ConflictError):  # same car and day as order 0
+            await rent.place_order_and_pay(actor_user_id=users[1].id, user_id=users[1].id, car_id=cars[0].id,
+                                           start_str=_day(0), end_str=_day(0), pay_method="paypal", pay_kwargs={})
+        with pytest.raises(NotFoundError):
+            await rent.quote(999, _day(0), _day(0))
+        ids = await review.pending_ids()
+        await review.approve_many(actor_user_id=1, booking_ids=ids)
+        return booked, ids
+
+    with patch("common.payment_app.random.random", return_value=0.5), \
+            patch.object(rent.sync.gateway, "process", side_effect=process):
+        booked, ids = asyncio.run(scenario())
+
+    assert all(b.status == BOOKING_PENDING for b in booked) and len(ids) == 6
+    assert Booking.select().where(Booking.status == BOOKING_CONFIRMED).count() == 6
+    assert ReservationHold.select().count() == 0
+    assert not any(name.startswith("autorentx-db") for name in pay_threads)
+
+
+def test_admin_facades(executor, make_car):
+    car = make_car()
+    pricing, audit = AsyncPricingService(executor=executor), AsyncAuditService(executor=executor)
+
+    async def scenario():
+        rule = await pricing.create_rule(actor_user_id=1, name="Summer", rule_type="discount",
+                                         amount_type="percent", amount_value=10)
+        quote = await pricing.quote(car=car, start_date=DAY, end_date=DAY + timedelta(days=1))
+        await audit.write_many([{"actor_user_id": 1, "action": "x", "target_type": "t"}])
+        return rule, quote, await audit.list_logs(readonly=True), await pricing.page_rules(readonly=True)
+
+    rule, quote, logs, page = asyncio.run(scenario())
+    assert quote[2] == pytest.approx(90.0)
+    assert [r.action for r in logs] == ["x", "create_pricing_rule"]
+    assert [r.id for r in page] == [rule.id]
+
+
+def test_cancelled_caller_does_not_abandon_a_payment_in_flight(executor, make_user, make_car):
+    user, car = make_user(), make_car()
+    rent = AsyncRentService(executor=executor)
+    paying, release = threading.Event(), threading.Event()
+    real_process = rent.sync.gateway.process
+
+    def slow_process(*args, **kwargs):
+        paying.set()
+        release.wait(5)
+        return real_process(*args, **kwargs)
+
+    async def scenario():
+        caller = asyncio.create_task(rent.place_order_and_pay(
+            actor_user_id=user.id, user_id=user.id, car_id=car.id, start_str=_day(0), end_str=_day(0),
+            pay_method="paypal", pay_kwargs={}))
+        while not paying.is_set():
+            await asyncio.sleep(0.01)
+        caller.cancel()  # e.g. the client disconnected while the gateway works
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        release.set()
+        await rent.join()
+
+    with patch.object(rent.sync.gateway, "process", side_effect=slow_process), \
+            patch("common.payment_app.random.random", return_value=0.5):
+        asyncio.run(scenario())
+    b = Booking.get(Booking.car == car.id)
+    assert b.status == BOOKING_PENDING and b.payments.count() == 1
+    assert ReservationHold.select().count() == 0
+
+
+def test_caller_cancelled_before_paying_releases_the_hold(executor, make_user, make_car):
+    user, car = make_user(), make_car()
+    rent = AsyncRentService(executor=executor)
+
+    async def scenario():
+        caller = asyncio.create_task(rent.place_order_and_pay(
+            actor_user_id=user.id, user_id=user.id, car_id=car.id, start_str=_day(0), end_str=_day(0),
+            pay_method="paypal", pay_kwargs={}))
+        await asyncio.sleep(0)  # the order is being prepared on a database worker
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await rent.join()
+
+    with patch.object(rent.sync.gateway, "process") as process:
+        asyncio.run(scenario())
+    process.assert_not_called()
+    assert Booking.select().count() == 0 and ReservationHold.select().count() == 0
@@ -0,0 +1,66 @@
+import time
+from unittest.mock import patch
+
+from peewee import OperationalError
+
+from db.models import db, AuditLog
+from admin_service.audit_service import AuditService, AuditBuffer, AUDIT_SYNC, AUDIT_BUFFERED
+
+
+def test_sync_mode_writes_immediately():
+    svc = AuditService(AUDIT_SYNC)
+    log = svc.write(actor_user_id=1, action="create_car", target_type="car", target_id=7)
+    assert log.id is not None
+    assert AuditLog.select().count() == 1
+
+
+def test_buffered_mode_batches_and_flushes():
+    svc = AuditService(AUDIT_BUFFERED)
+    buffer = AuditBuffer()
+    batches_before = buffer.batches
+    for i in range(25):
+        svc.write(actor_user_id=1, action="bench", target_type="car", target_id=i)
+    svc.flush()
+    assert AuditLog.select().count() == 25
+    # 25 rows land in a handful of insert_many batches, not 25 INSERTs
+    assert 1 <= buffer.batches - batches_before <= 25 // buffer.batch_size + 2
+    assert [l.target_id for l in svc.list_logs(limit=3)] == [24, 23, 22]
+
+
+def test_background_thread_flushes_by_time():
+    svc = AuditService(AUDIT_BUFFERED)
+    svc.write(actor_user_id=2, action="login", target_type="user", target_id=2)
+    query = AuditLog.select().where(AuditLog.action == "login")
+    deadline = time.time() + 5
+    while not query.count() and time.time() < deadline:
+        time.sleep(0.05)
+    assert query.count() == 1 and AuditBuffer().pending() == 0
+
+
+def test_failed_flush_keeps_rows_for_retry(caplog):
+    svc = AuditService(AUDIT_BUFFERED)
+    buffer = AuditBuffer()
+    buffer.flush()
+    with patch.object(AuditLog, "insert_many", side_effect=OperationalError("database is locked")):
+        for i in range(3):
+            svc.write(actor_user_id=1, action="retry", target_type="car", target_id=i)
+        assert buffer.flush() == 0
+        assert buffer.pending() == 3 and buffer.failures >= 1  # the writer thread may have retried too
+    assert "kept for retry" in caplog.text
+    buffer.flush()
+    assert buffer.pending() == 0 and buffer.failures == 0
+    assert [l.target_id for l in AuditLog.select().order_by(AuditLog.id)] == [0, 1, 2]
+
+
+def test_buffered_write_inside_a_transaction_rolls_back_with_it():
+    svc = AuditService(AUDIT_BUFFERED)
+    try:
+        with db.atomic():
+            svc.write(actor_user_id=1, action="create_booking", target_type="booking", target_id=1)
+            raise RuntimeError("booking insert failed")
+    except RuntimeError:
+        pass
+    with db.atomic():
+        svc.write_many([{"actor_user_id": 1, "action": "kept", "target_type": "booking"}])
+    svc.flush()
+    assert [l.action for l in AuditLog.select()] == ["kept"]
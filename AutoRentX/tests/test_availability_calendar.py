@@ -0,0 +1,84 @@
+import random
+from datetime import date, timedelta
+
+from db.models import BOOKING_PENDING, BOOKING_CONFIRMED, STATUS_AVAILABLE, STATUS_MAINTENANCE
+from customer_service.rent_service import RentService
+from admin_service.booking_review_service import BookingReviewService
+from admin_service.car_service import PeeweeCarService
+from admin_service.pricing_service import DATE_FMT
+from common.availability_index import AvailabilityIndex
+from common.availability_calendar import AvailabilityCalendar, HORIZON_DAYS
+
+TODAY = date.today()
+
+
+def test_busy_cars_match_interval_index(make_user, make_car, random_booking, sql_available):
+    rnd = random.Random(7)
+    user = make_user()
+    cars = [make_car(STATUS_MAINTENANCE if i % 7 == 0 else STATUS_AVAILABLE) for i in range(30)]
+    for _ in range(400):
+        random_booking(rnd, cars, user, TODAY + timedelta(days=rnd.randrange(-20, HORIZON_DAYS)))
+
+    cal, index, svc = AvailabilityCalendar(), AvailabilityIndex(), RentService()
+    for _ in range(200):
+        start = TODAY + timedelta(days=rnd.randrange(-5, HORIZON_DAYS + 10))  # some fall back to the index
+        end = start + timedelta(days=rnd.randrange(0, 20))
+        for statuses in ((BOOKING_CONFIRMED,), (BOOKING_PENDING, BOOKING_CONFIRMED)):
+            assert cal.busy_car_ids(start, end, statuses) == index.busy_car_ids(start, end, statuses)
+        got = [c.id for c in svc.available_cars(start.strftime(DATE_FMT), end.strftime(DATE_FMT))]
+        assert got == sql_available(start, end)
+
+
+def test_review_decisions_update_calendar_incrementally(make_user, make_car, make_booking):
+    user = make_user()
+    car = make_car()
+    start = TODAY + timedelta(days=10)
+    first = make_booking(car, user, start, 3, BOOKING_PENDING)
+    second = make_booking(car, user, start + timedelta(days=1), 3, BOOKING_PENDING)  # overlaps the first
+    cal = AvailabilityCalendar()
+    assert cal.busy_car_ids(start, start, (BOOKING_PENDING,)) == {car.id}
+    loads = cal.origin, id(cal._layers[BOOKING_PENDING])
+
+    review = BookingReviewService()
+    review.approve(actor_user_id=user.id, booking_id=first.id)
+    assert cal.busy_car_ids(start, start, (BOOKING_CONFIRMED,)) == {car.id}
+    assert cal.busy_car_ids(start, start, (BOOKING_PENDING,)) == set()
+    # the day shared with the first booking stays pending while the second one is
+    assert cal.busy_car_ids(start + timedelta(days=1), start + timedelta(days=1), (BOOKING_PENDING,)) == {car.id}
+    review.reject(actor_user_id=user.id, booking_id=second.id)
+    assert cal.busy_car_ids(start + timedelta(days=3), start + timedelta(days=3)) == set()
+    assert (cal.origin, id(cal._layers[BOOKING_PENDING])) == loads  # no reload happened
+
+
+def test_month_grid_marks_bookings_and_maintenance(make_user, make_car, make_booking):
+    user = make_user()
+    cars = PeeweeCarService()
+    busy, broken = make_car(), make_car()
+    month = (TODAY.replace(day=1) + timedelta(days=40)).replace(day=1)  # fully inside the horizon
+    make_booking(busy, user, month + timedelta(days=2), 2, BOOKING_CONFIRMED)
+    make_booking(busy, user, month + timedelta(days=5), 1, BOOKING_PENDING)
+    review = BookingReviewService()
+    review.availability_grid(month.year, month.month, [busy.id])  # loads the calendar
+    cars.update_car(broken.id, actor_user_id=user.id, status=STATUS_MAINTENANCE)
+
+    grid = review.availability_grid(month.year, month.month, [busy.id, broken.id])
+    assert grid[busy.id].startswith("..XX.p.")
+    assert set(grid[broken.id]) == {"M"}
+    past = review.availability_grid(TODAY.year - 3, 1, [busy.id])
+    assert set(past[busy.id]) == {" "}
+
+
+def test_calendar_sees_other_process_writes(make_user, make_car, other_process, book_elsewhere):
+    user, car, other = make_user(), make_car(), make_car()
+    day = (TODAY + timedelta(days=20)).strftime(DATE_FMT)
+    svc = RentService()
+    assert [c.id for c in svc.available_cars(day, day)] == [other.id, car.id]  # loads the calendar
+
+    bid = book_elsewhere(car.id, user.id, TODAY + timedelta(days=19), 3)
+    assert [c.id for c in svc.available_cars(day, day)] == [other.id]
+    other_process.execute("UPDATE booking SET status = 'cancelled' WHERE id = ?", (bid,))
+    assert [c.id for c in svc.available_cars(day, day)] == [other.id, car.id]
+
+    month = (TODAY.replace(day=1) + timedelta(days=40)).replace(day=1)
+    other_process.execute("UPDATE car SET status = ? WHERE id = ?", (STATUS_MAINTENANCE, other.id))
+    assert set(BookingReviewService().availability_grid(month.year, month.month, [other.id])[other.id]) == {"M"}
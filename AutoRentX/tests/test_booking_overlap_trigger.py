@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+
+import pytest
+from peewee import IntegrityError
+
+from db.models import Booking, Payment, BOOKING_PENDING, BOOKING_CONFIRMED, BOOKING_CANCELLED, is_booking_overlap
+from db.migrations import BOOKING_TRIGGERS
+from customer_service.rent_service import RentService
+from admin_service.booking_review_service import BookingReviewService
+from admin_service.pricing_service import DATE_FMT
+from common.availability_index import AvailabilityIndex
+from common.exceptions import ConflictError
+
+DAY = date(2030, 5, 1)
+
+
+def _raw_insert(car, user, start, days, status):
+    """Write behind the services' back, like another process would (caches are not told)"""
+    return (Booking.insert(car=car, user=user, start_date=start, end_date=start + timedelta(days=days - 1),
+                           status=status, snap_first_name="A", snap_last_name="B", snap_phone="1",
+                           snap_id_document="X")
+            .execute())
+
+
+def test_triggers_installed(fresh_db):
+    names = {r[0] for r in fresh_db.execute_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert set(BOOKING_TRIGGERS) <= names
+
+
+def test_trigger_rejects_only_overlaps_with_confirmed(make_user, make_car, make_booking):
+    user, car = make_user(), make_car()
+    make_booking(car, user, DAY, 5, BOOKING_CONFIRMED)
+    for status in (BOOKING_CONFIRMED, BOOKING_PENDING):
+        with pytest.raises(IntegrityError) as err:
+            make_booking(car, user, DAY + timedelta(days=4), 3, status)
+        assert is_booking_overlap(err.value)
+    make_booking(car, user, DAY + timedelta(days=2), 1, BOOKING_CANCELLED)   # inactive: allowed
+    make_booking(car, user, DAY + timedelta(days=5), 3, BOOKING_PENDING)     # adjacent: allowed
+    make_booking(car, user, DAY + timedelta(days=6), 3, BOOKING_PENDING)     # pending over pending: allowed
+    make_booking(make_car(), user, DAY, 5, BOOKING_CONFIRMED)                    # other car: allowed
+    confirmed = Booking.get(Booking.status == BOOKING_CONFIRMED, Booking.car == car)
+    confirmed.save()  # re-saving an unchanged booking does not trip the update trigger
+
+
+def test_approve_maps_trigger_to_conflict(make_user, make_car, make_booking):
+    user, car = make_user(), make_car()
+    pending = make_booking(car, user, DAY, 3, BOOKING_PENDING)
+    _raw_insert(car, user, DAY + timedelta(days=2), 2, BOOKING_CONFIRMED)
+    with pytest.raises(ConflictError):
+        BookingReviewService().approve(actor_user_id=user.id, booking_id=pending.id)
+    assert Booking.get_by_id(pending.id).status == BOOKING_PENDING
+
+
+def test_stale_cache_loses_the_race_cleanly(make_user, make_car):
+    user, car = make_user(), make_car()
+    rent = RentService()
+    assert not AvailabilityIndex().has_overlap(car.id, DAY, DAY)  # loads the index
+    _raw_insert(car, user, DAY, 3, BOOKING_CONFIRMED)             # the index does not know
+    with pytest.raises(ConflictError):
+        rent.create_pending_booking(actor_user_id=user.id, user_id=user.id, car_id=car.id,
+                                    start_str=DAY.strftime(DATE_FMT), end_str=DAY.strftime(DATE_FMT))
+    # caches were dropped, so the next check sees the other process' booking
+    assert AvailabilityIndex().has_overlap(car.id, DAY, DAY, (BOOKING_CONFIRMED,))
+
+
+def test_paid_order_cannot_hold_a_pending_slot(monkeypatch, make_user, make_car):
+    monkeypatch.setattr("common.payment_app.random.random", lambda: 0.5)  # no simulated gateway failure
+    user, car = make_user(), make_car()
+    rent = RentService()
+    assert not AvailabilityIndex().has_overlap(car.id, DAY, DAY)
+    _raw_insert(car, user, DAY, 3, BOOKING_PENDING)
+    with pytest.raises(ConflictError):
+        rent.place_order_and_pay(actor_user_id=user.id, user_id=user.id, car_id=car.id,
+                                 start_str=DAY.strftime(DATE_FMT), end_str=DAY.strftime(DATE_FMT),
+                                 pay_method="paypal", pay_kwargs={})
+    assert Booking.select().count() == 1 and Payment.select().count() == 0
@@ -0,0 +1,63 @@
+from datetime import date, timedelta
+
+import pytest
+
+from db.models import AuditLog, Booking, Car, BOOKING_PENDING, BOOKING_CONFIRMED, BOOKING_CANCELLED, STATUS_RESERVED
+from admin_service.booking_review_service import BookingReviewService
+from common.availability_index import AvailabilityIndex
+from common.exceptions import ConflictError, NotFoundError
+from controllers.admin_booking_review_cli import _parse_selection
+
+DAY = date(2030, 5, 1)
+
+
+def test_approve_many_is_constant_query_count(count_queries, make_user, make_car, make_booking):
+    user, cars = make_user(), [make_car() for _ in range(3)]
+    ids = [make_booking(car, user, DAY + timedelta(days=10 * i), 3, BOOKING_PENDING).id
+           for car in cars for i in range(4)]
+    svc = BookingReviewService()
+    with count_queries() as log:
+        done = svc.approve_many(actor_user_id=user.id, booking_ids=ids)
+    writes = [s for s in log.statements if not s.startswith("SELECT")]
+    # UPDATE booking, UPDATE car (all three cars at once), INSERT audit
+    assert len(writes) == 3, writes
+    assert len(done) == 12
+    assert Booking.select().where(Booking.status == BOOKING_CONFIRMED).count() == 12
+    assert Car.select().where(Car.status == STATUS_RESERVED).count() == 3
+    assert AuditLog.select().where(AuditLog.action == "approve_booking").count() == 12
+    assert AvailabilityIndex().has_overlap(cars[0].id, DAY, DAY, (BOOKING_CONFIRMED,))
+
+
+def test_batch_is_all_or_nothing(make_user, make_car, make_booking):
+    user, car = make_user(), make_car()
+    a = make_booking(car, user, DAY, 3, BOOKING_PENDING)
+    b = make_booking(car, user, DAY + timedelta(days=2), 3, BOOKING_PENDING)   # overlaps a
+    c = make_booking(car, user, DAY + timedelta(days=20), 3, BOOKING_PENDING)
+    svc = BookingReviewService()
+    with pytest.raises(ConflictError, match=f"#{b.id}"):
+        svc.approve_many(actor_user_id=user.id, booking_ids=[a.id, b.id, c.id])
+    with pytest.raises(NotFoundError, match="#999"):
+        svc.reject_many(actor_user_id=user.id, booking_ids=[a.id, 999])
+    assert Booking.select().where(Booking.status != BOOKING_PENDING).count() == 0
+    assert AuditLog.select().count() == 0
+
+    svc.reject_many(actor_user_id=user.id, booking_ids=[b.id])
+    svc.approve_many(actor_user_id=user.id, booking_ids=svc.pending_ids(car_id=car.id))
+    assert [x.status for x in Booking.select().order_by(Booking.id)] == \
+        [BOOKING_CONFIRMED, BOOKING_CANCELLED, BOOKING_CONFIRMED]
+    with pytest.raises(ConflictError, match="Invalid status"):
+        svc.reject_many(actor_user_id=user.id, booking_ids=[a.id])
+
+
+def test_parse_selection():
+    svc = BookingReviewService()
+    assert _parse_selection("3, 5,8-10", svc) == [3, 5, 8, 9, 10]
+    with pytest.raises(ValueError):
+        _parse_selection("x", svc)
+    with pytest.raises(ValueError, match="reversed"):
+        _parse_selection("5-3", svc)
+    with pytest.raises(ValueError, match="more than 1000"):
+        _parse_selection("1-100000000", svc)
+    with pytest.raises(ValueError, match="more than 1000"):
+        _parse_selection("1-600,2000-2600", svc)
+    assert len(_parse_selection("1-1000", svc)) == 1000
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+from db.models import (Booking, Car, refresh_car_status, BOOKING_PENDING,
+                       BOOKING_CANCELLED, BOOKING_COMPLETED, STATUS_AVAILABLE, STATUS_RESERVED)
+from db.consistency import active_booking_drift, repair_active_bookings
+from admin_service.booking_review_service import BookingReviewService
+from admin_service.car_service import PeeweeCarService
+
+DAY = date(2030, 9, 1)
+
+
+def _active(car):
+    return Car.get_by_id(car.id).active_bookings
+
+
+def test_counter_follows_every_transition(make_user, make_car, make_booking):
+    user, car, other = make_user(), make_car(), make_car()
+    a = make_booking(car, user, DAY, 2, BOOKING_PENDING)
+    b = make_booking(car, user, DAY + timedelta(days=5), 2, BOOKING_PENDING)
+    make_booking(car, user, DAY + timedelta(days=9), 1, BOOKING_CANCELLED)
+    assert _active(car) == 2
+
+    review = BookingReviewService()
+    review.approve(actor_user_id=user.id, booking_id=a.id)   # pending -> confirmed: still active
+    assert _active(car) == 2
+    review.reject(actor_user_id=user.id, booking_id=b.id)
+    assert _active(car) == 1
+    Booking.update(status=BOOKING_COMPLETED).where(Booking.id == a.id).execute()
+    assert _active(car) == 0
+
+    c = make_booking(car, user, DAY + timedelta(days=20), 1, BOOKING_PENDING)
+    Booking.update(car=other).where(Booking.id == c.id).execute()
+    assert (_active(car), _active(other)) == (0, 1)
+    Booking.delete().where(Booking.id == c.id).execute()
+    assert _active(other) == 0
+    assert active_booking_drift() == []
+
+
+def test_status_refresh_is_one_statement_and_saves_keep_the_counter(count_queries, make_user, make_car, make_booking):
+    user, car = make_user(), make_car()
+    stale = Car.get_by_id(car.id)                  # loaded with active_bookings == 0
+    make_booking(car, user, DAY, 2, BOOKING_PENDING)
+    with count_queries() as log:
+        assert refresh_car_status(car.id) == STATUS_RESERVED
+    assert len(log.statements) == 1 and 'FROM "booking"' not in log.statements[0]
+    PeeweeCarService().update_car(car.id, actor_user_id=user.id, daily_rate=60.0)
+    stale.kilometre = 99
+    stale.save()                                   # only the dirty column is written
+    assert _active(car) == 1
+
+
+def test_checker_reports_and_repairs_drift(make_user, make_car, make_booking):
+    user, car = make_user(), make_car()
+    make_booking(car, user, DAY, 2, BOOKING_PENDING)
+    Car.update(active_bookings=5).where(Car.id == car.id).execute()
+    drift = active_booking_drift()
+    assert [(d.car_id, d.stored, d.actual) for d in drift] == [(car.id, 5, 1)]
+    assert repair_active_bookings() == 1
+    assert active_booking_drift() == [] and _active(car) == 1
+    Booking.update(status=BOOKING_CANCELLED).execute()
+    assert refresh_car_status(car.id) == STATUS_AVAILABLE
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import threading
+import time
+
+from db.db_manager import DatabaseManager, InstrumentedPooledSqliteDatabase, PRAGMAS
+
+
+def _pool(max_connections=2):
+    path = os.path.join(tempfile.mkdtemp(), "pool.db")
+    return InstrumentedPooledSqliteDatabase(path, pragmas=PRAGMAS, max_connections=max_connections,
+                                            stale_timeout=60, timeout=5, check_same_thread=False)
+
+
+def test_pool_bounds_connections_and_records_waits():
+    pool = _pool(max_connections=2)
+    pool.execute_sql("CREATE TABLE t (x INTEGER)")
+    pool.close()
+    before = pool.stats()["checkouts"]
+    seen = []
+    barrier = threading.Barrier(4)
+
+    def worker():
+        barrier.wait()
+        with pool.connection_context():
+            seen.append((pool.execute_sql("PRAGMA journal_mode").fetchone()[0],
+                         pool.execute_sql("PRAGMA foreign_keys").fetchone()[0]))
+            pool.execute_sql("INSERT INTO t VALUES (1)")
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = pool.stats()
+    assert stats["in_use"] == 0 and stats["idle"] <= 2
+    assert stats["checkouts"] - before == 4
+    assert stats["waits"] >= 1 and stats["wait_time"] > 0
+    # the WAL / foreign-key pragmas are applied on every pooled connection
+    assert seen == [("wal", 1)] * 4
+    assert pool.execute_sql("SELECT COUNT(*) FROM t").fetchone()[0] == 4
+    pool.close()
+    pool.close_idle()
+
+
+def test_connection_context_manager_reuses_open_connection():
+    mgr = DatabaseManager()
+    with mgr.connection() as db:
+        with mgr.connection() as inner:
+            assert inner is db
+            assert not db.is_closed()
+        assert not db.is_closed()
@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from db.db_manager import DatabaseManager, pragmas_for
+from db.group_commit import GroupCommitter, run_grouped
+from db.models import AuditLog, db
+from admin_service.audit_service import AuditService
+
+
+def _audit(action):
+    return lambda: AuditLog.create(actor_user_id=1, action=action, target_type="t")
+
+
+def test_profiles_map_to_synchronous():
+    assert [pragmas_for(p)["synchronous"] for p in ("safe", "balanced", "fast")] == [2, 1, 0]
+    with pytest.raises(ValueError):
+        pragmas_for("reckless")
+    with pytest.raises(RuntimeError):
+        DatabaseManager.configure(durability="safe")  # already initialized
+
+
+def test_queued_jobs_share_one_commit_and_fail_alone():
+    committer = GroupCommitter()
+    gate, started = threading.Event(), threading.Event()
+
+    def blocker():
+        started.set()
+        gate.wait(5)
+        return AuditLog.create(actor_user_id=1, action="first", target_type="t")
+
+    def boom():
+        raise ValueError("bad job")
+
+    results, errors = {}, {}
+
+    def call(name, fn):
+        try:
+            results[name] = committer.submit(fn)
+        except Exception as e:
+            errors[name] = e
+
+    first = threading.Thread(target=call, args=("first", blocker))
+    first.start()
+    started.wait(5)
+    commits = committer.commits
+    # queued while the committer is busy with "first": they form the next batch
+    others = [threading.Thread(target=call, args=(f"job{i}", _audit(f"job{i}"))) for i in range(8)]
+    others.append(threading.Thread(target=call, args=("boom", boom)))
+    for t in others:
+        t.start()
+    while committer._queue.qsize() < len(others):
+        threading.Event().wait(0.001)
+    gate.set()
+    for t in [first] + others:
+        t.join(5)
+
+    assert committer.commits - commits == 2
+    assert isinstance(errors.pop("boom"), ValueError) and not errors
+    assert sorted(r.action for r in results.values()) == ["first"] + sorted(f"job{i}" for i in range(8))
+    assert AuditLog.select().count() == 9
+
+
+def test_run_grouped_routes_by_profile(monkeypatch):
+    committer = GroupCommitter()
+    jobs = committer.jobs
+    run_grouped(_audit("inline"))                       # fast profile: caller's own transaction
+    assert committer.jobs == jobs
+
+    monkeypatch.setitem(DatabaseManager._config, "durability", "balanced")
+    AuditService(mode="sync").write(actor_user_id=1, action="grouped", target_type="t")
+    assert committer.jobs == jobs + 1
+    with db.atomic():                                   # already in a transaction: stays in it
+        run_grouped(_audit("nested"))
+    assert committer.jobs == jobs + 1
+    assert {r.action for r in AuditLog.select()} == {"inline", "grouped", "nested"}
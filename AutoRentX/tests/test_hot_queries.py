@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+
+import pytest
+
+from db.hot_queries import HotQueries, HOT_ORM, HOT_PREPARED, PREPARED
+from db.models import PricingRule, BOOKING_CONFIRMED, BOOKING_PENDING
+from admin_service.pricing_service import PricingService
+from customer_service.rent_service import RentService
+
+DAY = date(2030, 5, 1)
+ORM, FAST = HotQueries(HOT_ORM), HotQueries(HOT_PREPARED)
+
+
+def _same(a, b):
+    assert type(a) is type(b)
+    if a is not None:
+        assert a.__data__ == b.__data__ and not b._dirty
+
+
+def test_prepared_rows_match_the_orm(make_user, make_car, make_booking):
+    user, car = make_user(), make_car()
+    other = make_car()
+    PricingRule.create(name="g", rule_type="discount", amount_type="percent", amount_value=10,
+                       start_date=DAY - timedelta(days=5), end_date=None)
+    PricingRule.create(name="c", rule_type="surcharge", amount_type="fixed", amount_value=5,
+                       scope="car", car=car, min_days=2)
+    PricingRule.create(name="other car", rule_type="surcharge", amount_type="fixed", amount_value=5,
+                       scope="car", car=other)
+    PricingRule.create(name="off", rule_type="discount", amount_type="fixed", amount_value=1, is_active=False)
+    make_booking(car, user, DAY, 3, BOOKING_CONFIRMED)
+
+    _same(ORM.car(car.id), FAST.car(car.id))
+    _same(ORM.car(999), FAST.car(999))
+    _same(ORM.profile(user.id), FAST.profile(user.id))
+    _same(ORM.profile(999), FAST.profile(999))
+    assert isinstance(FAST.profile(user.id).user_id, int)
+    for days in (1, 3):
+        orm = ORM.applicable_rules(car.id, DAY, DAY + timedelta(days=days - 1), days)
+        fast = FAST.applicable_rules(car.id, DAY, DAY + timedelta(days=days - 1), days)
+        assert [r.__data__ for r in orm] == [r.__data__ for r in fast]
+        assert isinstance(fast[0].start_date, date)
+    assert len(FAST.applicable_rules(car.id, DAY, DAY + timedelta(days=2), 3)) == 2
+    for start, span, statuses in [(DAY + timedelta(days=2), 5, (BOOKING_CONFIRMED,)),
+                                  (DAY + timedelta(days=3), 5, (BOOKING_CONFIRMED,)),
+                                  (DAY, 1, (BOOKING_PENDING,))]:
+        end = start + timedelta(days=span)
+        assert ORM.has_overlap(car.id, start, end, statuses) == FAST.has_overlap(car.id, start, end, statuses)
+    assert FAST.has_overlap(car.id, DAY + timedelta(days=2), DAY + timedelta(days=9), (BOOKING_CONFIRMED,))
+    assert ORM.user_auth(user.id) == FAST.user_auth(user.id) == ("customer", True)
+    assert ORM.user_auth(999) is FAST.user_auth(999) is None
+
+    fetched = FAST.car(car.id)
+    fetched.status = "maintenance"
+    fetched.save()  # only_save_dirty: a clean mapped row saves just the changed column
+    assert ORM.car(car.id).status == "maintenance"
+
+
+def test_services_switch_backends(make_car):
+    car = make_car()
+    PricingRule.create(name="g", rule_type="discount", amount_type="percent", amount_value=10)
+    start = DAY.strftime("%d-%m-%Y")
+    quotes = [RentService(pricing=PricingService(cached=False, hot=h), hot=h).quote(car.id, start, start)
+              for h in (ORM, FAST)]
+    assert quotes[0] == quotes[1] and quotes[0][3] == pytest.approx(45.0)
+
+
+def test_registry_statements_prepare(fresh_db):
+    for name, stmt in PREPARED.items():
+        fresh_db.execute_sql("EXPLAIN " + stmt.sql, [0] * stmt.sql.count("?"))
+    with pytest.raises(ValueError):
+        HotQueries("cython")
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+import pytest
+
+from db.models import Booking, Car, User, BOOKING_PENDING, PRULE_DISCOUNT, AMOUNT_PERCENT
+from admin_service.booking_review_service import BookingReviewService
+from admin_service.booking_service import BookingService
+from admin_service.pricing_service import PricingService
+from customer_service.rent_service import RentService
+
+
+def _seed(n):
+    user = User.create(name="u", email="u@x.io", password_salt=b"s", password_hash=b"h", iterations=1)
+    pricing = PricingService()
+    for i in range(n):
+        car = Car.create(make="Make", model=f"M{i}", year=2022, kilometre=10, daily_rate=50.0)
+        start = date(2030, 1, 1) + timedelta(days=3 * i)
+        Booking.create(car=car, user=user, start_date=start, end_date=start, status=BOOKING_PENDING,
+                       snap_first_name="A", snap_last_name="B", snap_phone="1", snap_id_document="X")
+        pricing.create_rule(actor_user_id=user.id, name=f"r{i}", rule_type=PRULE_DISCOUNT,
+                            amount_type=AMOUNT_PERCENT, amount_value=5,
+                            scope="car" if i % 2 else "global", car_id=car.id if i % 2 else None)
+    return user
+
+
+def _render_all(user_id):
+    """Touch every attribute the CLI controllers print"""
+    for b in RentService().list_my_bookings(user_id):
+        (b.car.id, b.car.make, b.car.model, b.start_date, b.status, b.grand_total)
+    for b in BookingReviewService().list_pending():
+        (b.user.id, b.snap_first_name, b.car.id, b.car.make, b.car.model, b.grand_total)
+    for b in BookingService().list_bookings():
+        (b.user.id, b.user.name, b.car.make, b.car.model)
+    for r in PricingService().list_rules():
+        (r.car.id if (r.scope == "car" and r.car) else "global", r.name, r.min_days)
+
+
+@pytest.mark.parametrize("n_rows", [1, 25])
+def test_listings_run_constant_number_of_queries(n_rows, count_queries):
+    user = _seed(n_rows)
+    with count_queries() as log:
+        _render_all(user.id)
+    # one SELECT per listing, however many rows come back
+    assert len(log.statements) == 4, log.statements
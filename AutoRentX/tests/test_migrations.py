@@ -0,0 +1,137 @@
+import logging
+import os
+import tempfile
+from datetime import date
+
+import pytest
+from peewee import SqliteDatabase
+from db.models import (
+    db, create_all_tables, Booking, Car, Payment, PricingRule, SchemaVersion, BOOKING_PENDING, BOOKING_CONFIRMED
+)
+from db.migrations import (
+    ALL_MODELS, LATEST_VERSION, SchemaDriftError, upgrade, current_version, ensure_schema, schema_fingerprint,
+    stored_fingerprint
+)
+
+# Tables as they were shipped before the migration runner existed
+LEGACY_DDL = [
+    'CREATE TABLE "car" ("id" INTEGER NOT NULL PRIMARY KEY, "make" VARCHAR(50) NOT NULL, '
+    '"model" VARCHAR(50) NOT NULL, "year" INTEGER NOT NULL, "kilometre" INTEGER NOT NULL, '
+    '"daily_rate" REAL NOT NULL, "status" VARCHAR(20) NOT NULL)',
+    'CREATE TABLE "pricingrule" ("id" INTEGER NOT NULL PRIMARY KEY, "name" VARCHAR(80) NOT NULL, '
+    '"rule_type" VARCHAR(20) NOT NULL, "amount_type" VARCHAR(20) NOT NULL, "amount_value" REAL NOT NULL, '
+    '"scope" VARCHAR(20) NOT NULL, "min_days" INTEGER NOT NULL, "start_date" DATE, "end_date" DATE, '
+    '"is_active" INTEGER NOT NULL, "created_at" DATETIME NOT NULL)',
+    "INSERT INTO car (make, model, year, kilometre, daily_rate, status) VALUES ('T', 'M', 2020, 5, 40, 'available')",
+]
+
+
+def _query_plan(query) -> str:
+    sql, params = query.sql()
+    rows = query.model._meta.database.execute_sql("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return " | ".join(r[-1] for r in rows)
+
+
+def test_upgrade_legacy_database_in_place():
+    legacy = SqliteDatabase(os.path.join(tempfile.mkdtemp(), "legacy.db"))
+    for stmt in LEGACY_DDL:
+        legacy.execute_sql(stmt)
+
+    with legacy.bind_ctx(ALL_MODELS + [SchemaVersion]):
+        assert current_version(legacy) == 0
+        assert upgrade(legacy) == list(range(1, LATEST_VERSION + 1))
+        assert upgrade(legacy) == []
+        assert current_version(legacy) == LATEST_VERSION
+
+        assert {"min_days", "max_days"} <= {c.name for c in legacy.get_columns("car")}
+        assert "car_id" in {c.name for c in legacy.get_columns("pricingrule")}
+        assert legacy.execute_sql("SELECT min_days, max_days FROM car").fetchone() == (1, 30)
+        index_names = {i.name for i in legacy.get_indexes("booking")} | {i.name for i in legacy.get_indexes("pricingrule")}
+        assert "booking_car_id_status_start_date_end_date" in index_names
+        assert "pricingrule_is_active_min_days" in index_names
+    legacy.close()
+
+
+def test_booking_and_payment_ids_become_autoincrement():
+    legacy = SqliteDatabase(os.path.join(tempfile.mkdtemp(), "legacy.db"))
+    for stmt in LEGACY_DDL:
+        legacy.execute_sql(stmt)
+    with legacy.bind_ctx(ALL_MODELS + [SchemaVersion]):
+        for model in (Booking, Payment):  # as created before migration 9
+            legacy.execute_sql(model._schema._create_table(safe=False).query()[0].replace(" AUTOINCREMENT", ""))
+        for i in (1, 2):
+            legacy.execute_sql(
+                "INSERT INTO booking (id, car_id, user_id, start_date, end_date, status, days, base_daily_rate, "
+                "base_cost, adj_total, grand_total, snap_first_name, snap_last_name, snap_phone, snap_id_document, "
+                "created_at) VALUES (?, 1, 1, '2030-01-0' || ?, '2030-01-0' || ?, ?, 1, 40, 40, 0, 40, "
+                "'A', 'B', '1', 'X', '2030-01-01')", (i, i, i, BOOKING_PENDING))
+        legacy.execute_sql("INSERT INTO payment (booking_id, method, amount, currency, ok, created_at) "
+                           "VALUES (2, 'card', 40, 'NZD', 1, '2030-01-01')")
+
+        assert upgrade(legacy)[-1] == LATEST_VERSION
+        assert all("AUTOINCREMENT" in legacy.execute_sql("SELECT sql FROM sqlite_master WHERE name = ?",
+                                                         (t,)).fetchone()[0] for t in ("booking", "payment"))
+        assert [(p.booking_id, p.amount) for p in Payment.select()] == [(2, 40.0)]
+        assert Car.get_by_id(1).active_bookings == 2  # the rebuild's copy did not fire the counter again
+        Booking.delete().where(Booking.id == 2).execute()  # the newest booking goes (e.g. archived)
+        assert Car.get_by_id(1).active_bookings == 1  # triggers are back
+        new = Booking.create(car=1, user=1, start_date=date(2030, 2, 1), end_date=date(2030, 2, 1),
+                             snap_first_name="A", snap_last_name="B", snap_phone="1", snap_id_document="X")
+        assert new.id > 2  # the deleted id is not handed out again (nor any archived one)
+    legacy.close()
+
+
+def test_hot_queries_use_indexes():
+    day = date(2030, 1, 1)
+    overlap = Booking.select().where(
+        (Booking.car == 1) &
+        (Booking.status.in_([BOOKING_PENDING, BOOKING_CONFIRMED])) &
+        (Booking.start_date <= day) &
+        (Booking.end_date >= day))
+    my_bookings = (Booking.select()
+                   .where((Booking.user == 1) & (Booking.status.in_([BOOKING_PENDING, BOOKING_CONFIRMED])))
+                   .order_by(Booking.id.desc()))
+    pending = Booking.select().where(Booking.status == BOOKING_PENDING).order_by(Booking.id.desc())
+    rules = PricingRule.select().where((PricingRule.is_active == True) & (PricingRule.min_days <= 3))
+
+    assert "INDEX booking_car_id_status_start_date_end_date" in _query_plan(overlap)
+    assert "INDEX booking_user_id_status" in _query_plan(my_bookings)
+    assert "INDEX booking_status" in _query_plan(pending)
+    assert "INDEX pricingrule_is_active_min_days" in _query_plan(rules)
+
+
+def test_bootstrap_records_fingerprint_and_skips_ddl(caplog):
+    assert stored_fingerprint(db) == schema_fingerprint()
+    assert ensure_schema(db) is False
+
+    from auth_service import PeeweeAuthService
+    from admin_service.car_service import PeeweeCarService
+    from admin_service.booking_service import BookingService
+    from admin_service.booking_review_service import BookingReviewService
+    from customer_service.profile_service import ProfileService
+    from customer_service.rent_service import RentService
+
+    caplog.set_level(logging.DEBUG, logger="peewee")
+    create_all_tables()
+    PeeweeAuthService(); PeeweeCarService(); BookingService(); BookingReviewService(); ProfileService(); RentService()
+    assert not [r for r in caplog.records if "CREATE" in r.getMessage()]
+
+
+def test_fingerprint_mismatch_reruns_pending_migrations():
+    SchemaVersion.delete().where(SchemaVersion.version == LATEST_VERSION).execute()
+    SchemaVersion.update(fingerprint="stale").execute()
+    assert ensure_schema(db) is True
+    assert current_version(db) == LATEST_VERSION and stored_fingerprint(db) == schema_fingerprint()
+
+
+def test_fingerprint_mismatch_without_a_migration_fails():
+    SchemaVersion.update(fingerprint="stale").execute()  # e.g. a model changed, no Migration added
+    with pytest.raises(SchemaDriftError, match="no migration is pending"):
+        ensure_schema(db)
+    assert stored_fingerprint(db) == "stale"
+
+
+def test_unstamped_database_is_stamped():
+    SchemaVersion.update(fingerprint=None).execute()  # as left by `python -m db.migrations`
+    assert ensure_schema(db) is True
+    assert stored_fingerprint(db) == schema_fingerprint()
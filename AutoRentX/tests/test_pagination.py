@@ -0,0 +1,63 @@
+import pytest
+
+from db.models import AuditLog, Car
+from admin_service.audit_service import AuditService
+from admin_service.car_service import PeeweeCarService
+from common.pagination import keyset_page
+from controllers.pager import browse
+
+
+def _cars(n):
+    Car.insert_many([dict(make="Make", model=f"M{i}", year=2022, kilometre=10, daily_rate=50.0)
+                     for i in range(n)]).execute()
+    return [c.id for c in Car.select(Car.id).order_by(Car.id.desc())]
+
+
+def test_walk_forward_and_back_covers_every_row_once():
+    ids = _cars(23)
+    svc = PeeweeCarService()
+    pages, page = [], svc.page_cars(limit=5)
+    assert not page.has_prev
+    while True:
+        pages.append([c.id for c in page])
+        if not page.has_next:
+            break
+        page = svc.page_cars(after=page.next_cursor, limit=5)
+    assert [i for p in pages for i in p] == ids
+    assert [len(p) for p in pages] == [5, 5, 5, 5, 3]
+
+    back = []
+    while page.has_prev:
+        page = svc.page_cars(before=page.prev_cursor, limit=5)
+        back.append([c.id for c in page])
+    assert back == pages[-2::-1]
+
+
+def test_each_page_is_one_bounded_query(count_queries):
+    _cars(300)
+    first = keyset_page(Car.select(), Car.id, limit=10)
+    deep = keyset_page(Car.select(), Car.id, after=first.next_cursor - 250, limit=10)
+    with count_queries() as log:
+        keyset_page(Car.select(), Car.id, after=deep.next_cursor, limit=10)
+    assert len(log.statements) == 1
+    assert "OFFSET" not in log.statements[0].upper() and "LIMIT" in log.statements[0].upper()
+
+
+def test_empty_and_invalid_cursors():
+    assert not PeeweeCarService().page_cars()
+    with pytest.raises(ValueError):
+        keyset_page(Car.select(), Car.id, after=5, before=1)
+
+
+def test_audit_pages_and_cli_navigation(monkeypatch, capsys):
+    audit = AuditService()
+    for i in range(7):
+        audit.write(actor_user_id=1, action="bench", target_type="car", target_id=i)
+    assert [l.target_id for l in audit.page_logs(limit=3)] == [6, 5, 4]
+
+    answers = iter(["n", "n", "p", "0"])
+    monkeypatch.setattr("builtins.input", lambda _="": next(answers))
+    browse(lambda **kw: audit.page_logs(limit=3, **kw), lambda l: print(f"row {l.target_id}"))
+    rows = [line for line in capsys.readouterr().out.splitlines() if line.startswith("row")]
+    assert rows == [f"row {i}" for i in (6, 5, 4, 3, 2, 1, 0, 3, 2, 1)]
+    assert AuditLog.select().count() == 7
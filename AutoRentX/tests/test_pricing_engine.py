@@ -0,0 +1,94 @@
+import random
+from datetime import date, timedelta
+
+from db.models import Car, PRULE_DISCOUNT, PRULE_SURCHARGE, AMOUNT_PERCENT, AMOUNT_FIXED
+from admin_service.pricing_service import PricingService, DATE_FMT
+
+DAY0 = date(2030, 1, 1)
+
+
+def _random_rules(svc, rnd, cars, n):
+    for i in range(n):
+        scope = rnd.choice(["global", "car"])
+        dated = rnd.random() < 0.5
+        start = DAY0 + timedelta(days=rnd.randrange(60))
+        svc.create_rule(actor_user_id=1, name=f"r{i}",
+                        rule_type=rnd.choice([PRULE_DISCOUNT, PRULE_SURCHARGE]),
+                        amount_type=rnd.choice([AMOUNT_PERCENT, AMOUNT_FIXED]),
+                        amount_value=rnd.choice([5, 10, 12.5, 20, 30]),  # repeated values exercise tie-breaking
+                        scope=scope, car_id=rnd.choice(cars).id if scope == "car" else None,
+                        min_days=rnd.randint(1, 8),
+                        start_date_str=start.strftime(DATE_FMT) if dated else None,
+                        end_date_str=(start + timedelta(days=rnd.randrange(90))).strftime(DATE_FMT) if dated else None)
+
+
+def test_cached_engine_matches_query_path():
+    rnd = random.Random(7)
+    cars = [Car.create(make="T", model=f"M{i}", year=2022, kilometre=10, daily_rate=rnd.choice([35.0, 49.9, 80.0]))
+            for i in range(6)]
+    cached = PricingService()
+    uncached = PricingService(cached=False)
+    _random_rules(cached, rnd, cars, 40)
+
+    for round_no in range(300):
+        if round_no % 50 == 49:
+            # flip a rule or add one; the engine must pick up the change
+            if rnd.random() < 0.5:
+                cached.set_active(actor_user_id=1, rule_id=rnd.randint(1, 40), active=rnd.random() < 0.5)
+            else:
+                _random_rules(cached, rnd, cars, 1)
+        car = rnd.choice(cars)
+        start = DAY0 + timedelta(days=rnd.randrange(-10, 120))
+        end = start + timedelta(days=rnd.randrange(0, 12))
+        assert cached.quote(car=car, start_date=start, end_date=end) == \
+            uncached.quote(car=car, start_date=start, end_date=end)
+
+
+def test_car_scoped_rule_only_applies_to_its_car():
+    car_a = Car.create(make="T", model="A", year=2022, kilometre=10, daily_rate=100.0)
+    car_b = Car.create(make="T", model="B", year=2022, kilometre=10, daily_rate=100.0)
+    svc = PricingService()
+    rule = svc.create_rule(actor_user_id=1, name="A only", rule_type=PRULE_DISCOUNT, amount_type=AMOUNT_PERCENT,
+                           amount_value=10, scope="car", car_id=car_a.id)
+    assert svc.quote(car=car_a, start_date=DAY0, end_date=DAY0)[1] == [(rule.id, -10.0)]
+    assert svc.quote(car=car_b, start_date=DAY0, end_date=DAY0)[1] == []
+
+
+def test_cached_quotes_run_no_sql(caplog):
+    import logging
+    car = Car.create(make="T", model="A", year=2022, kilometre=10, daily_rate=60.0)
+    svc = PricingService()
+    svc.create_rule(actor_user_id=1, name="g", rule_type=PRULE_SURCHARGE, amount_type=AMOUNT_FIXED, amount_value=5)
+    svc.quote(car=car, start_date=DAY0, end_date=DAY0)  # loads the rules once
+    caplog.set_level(logging.DEBUG, logger="peewee")
+    for i in range(20):
+        svc.quote(car=car, start_date=DAY0, end_date=DAY0 + timedelta(days=i))
+    assert not caplog.records
+
+
+def test_quote_many_matches_quote():
+    rnd = random.Random(11)
+    cars = [Car.create(make="T", model=f"M{i}", year=2022, kilometre=10, daily_rate=rnd.choice([35.0, 49.9, 80.0, 120.0]))
+            for i in range(40)]
+    svc = PricingService()
+    _random_rules(svc, rnd, cars, 60)
+    for _ in range(60):
+        start = DAY0 + timedelta(days=rnd.randrange(-10, 120))
+        end = start + timedelta(days=rnd.randrange(0, 12))
+        batch = svc.quote_many(cars, start, end)
+        assert batch == [svc.quote(car=c, start_date=start, end_date=end) for c in cars]
+    assert svc.quote_many([], DAY0, DAY0) == []
+
+
+def test_engine_sees_rules_changed_by_other_process(other_process):
+    car = Car.create(make="T", model="A", year=2022, kilometre=10, daily_rate=100.0)
+    svc = PricingService()
+    assert svc.quote(car=car, start_date=DAY0, end_date=DAY0)[1] == []  # loads the (empty) rules
+
+    rid = other_process.execute(
+        "INSERT INTO pricingrule (name, rule_type, amount_type, amount_value, scope, min_days, is_active, created_at)"
+        " VALUES ('elsewhere', ?, ?, 10, 'global', 1, 1, '2030-01-01 00:00:00')",
+        (PRULE_DISCOUNT, AMOUNT_PERCENT)).lastrowid
+    assert svc.quote(car=car, start_date=DAY0, end_date=DAY0)[1] == [(rid, -10.0)]
+    other_process.execute("UPDATE pricingrule SET is_active = 0 WHERE id = ?", (rid,))
+    assert svc.quote(car=car, start_date=DAY0, end_date=DAY0)[1] == []
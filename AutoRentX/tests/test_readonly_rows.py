@@ -0,0 +1,53 @@
+from datetime import date
+
+import pytest
+
+from db.models import Car, PricingRule
+from admin_service.audit_service import AuditService
+from admin_service.car_service import PeeweeCarService
+from admin_service.pricing_service import PricingService
+from customer_service.rent_service import RentService
+from common.rows import AuditRow, CarOfferRow, CarRow, RuleRow
+from tests.test_pagination import _cars
+
+
+def _as_rows(models, row):
+    return [row._make(getattr(m, name) for name in row._fields) for m in models]
+
+
+def test_readonly_listings_match_models():
+    _cars(7)
+    car = Car.get()
+    PricingRule.create(name="g", rule_type="discount", amount_type="percent", amount_value=5,
+                       start_date=date(2030, 1, 1))
+    PricingRule.create(name="c", rule_type="surcharge", amount_type="fixed", amount_value=9, scope="car", car=car)
+    audit = AuditService()
+    for i in range(4):
+        audit.write(actor_user_id=1, action="a", target_type="t", target_id=i, detail=None if i % 2 else "d")
+    cars, rules = PeeweeCarService(), PricingService()
+
+    assert cars.list_cars(readonly=True) == _as_rows(cars.list_cars(), CarRow)
+    assert rules.list_rules(readonly=True) == _as_rows(rules.list_rules(), RuleRow)
+    assert audit.list_logs(readonly=True) == _as_rows(audit.list_logs(), AuditRow)
+    offers = RentService().available_cars("01-01-2030", "02-01-2030", readonly=True)
+    assert offers == _as_rows(RentService().available_cars("01-01-2030", "02-01-2030"), CarOfferRow)
+
+    page = cars.page_cars(limit=3, readonly=True)
+    assert all(type(c) is CarRow for c in page) and page.has_next
+    assert list(cars.page_cars(after=page.next_cursor, limit=3, readonly=True)) == \
+        _as_rows(cars.page_cars(after=page.next_cursor, limit=3), CarRow)
+    assert [r.target_id for r in audit.page_logs(limit=2, readonly=True)] == [3, 2]
+    assert rules.page_rules(readonly=True).items[0].car_id == car.id
+
+    row = page.items[0]
+    with pytest.raises(AttributeError):
+        row.status = "maintenance"  # read-only
+    assert not hasattr(row, "__dict__")
+
+
+def test_readonly_selects_only_display_columns(count_queries):
+    _cars(3)
+    with count_queries() as log:
+        PeeweeCarService().page_cars(readonly=True)
+    sql = log.statements[0]
+    assert "min_days" not in sql and "active_bookings" not in sql and '"daily_rate"' in sql
@@ -0,0 +1,132 @@
+import time
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+from peewee import IntegrityError
+
+from db.models import AuditLog, Booking, Payment, ReservationHold, BOOKING_CONFIRMED, BOOKING_PENDING
+from common.payment_app import PaymentGateway, PaymentResult
+from common.exceptions import ConflictError, DatabaseError
+from customer_service.hold_service import ReservationHoldService
+from customer_service.rent_service import RentService
+from admin_service.pricing_service import DATE_FMT
+
+DAY = date(2030, 7, 1)
+S = E = DAY.strftime(DATE_FMT)
+
+
+class _Gateway(PaymentGateway):
+    """Deterministic gateway; `during` runs while the payment is 'in flight'"""
+
+    def __init__(self, ok=True, during=None, refund_ok=True):
+        self.ok, self.during, self.refund_ok = ok, during, refund_ok
+        self.refunds = []
+
+    def process(self, method, req, **kwargs):
+        if self.during:
+            self.during()
+        return PaymentResult(ok=self.ok, message="test", txn_id="T-1" if self.ok else None)
+
+    def refund(self, method, txn_id, req):
+        self.refunds.append((txn_id, req.amount))
+        return PaymentResult(ok=self.refund_ok, message="refund", txn_id="R-1" if self.refund_ok else None)
+
+
+def _pay(rent, user, car):
+    return rent.place_order_and_pay(actor_user_id=user.id, user_id=user.id, car_id=car.id,
+                                    start_str=S, end_str=E, pay_method="paypal", pay_kwargs={})
+
+
+def test_live_hold_blocks_holds_and_bookings_until_it_expires(make_user, make_car, make_booking):
+    user, car = make_user(), make_car()
+    holds = ReservationHoldService(ttl_seconds=60)
+    hold = holds.acquire(car_id=car.id, user_id=user.id, start=DAY, end=DAY + timedelta(days=2))
+    with pytest.raises(ConflictError):
+        holds.acquire(car_id=car.id, user_id=user.id, start=DAY + timedelta(days=2), end=DAY + timedelta(days=4))
+    with pytest.raises(IntegrityError):
+        make_booking(car, user, DAY + timedelta(days=1), 1, BOOKING_PENDING)
+    holds.acquire(car_id=car.id, user_id=user.id, start=DAY + timedelta(days=3), end=DAY + timedelta(days=4))
+
+    ReservationHold.update(expires_at=time.time() - 1).where(ReservationHold.id == hold.id).execute()
+    make_booking(car, user, DAY + timedelta(days=1), 1, BOOKING_PENDING)  # expired holds are ignored
+    assert holds.sweep_expired() == 1
+    assert ReservationHold.select().count() == 1
+
+
+def test_hold_refused_over_pending_booking(make_user, make_car, make_booking):
+    user, car = make_user(), make_car()
+    make_booking(car, user, DAY, 1, BOOKING_PENDING)
+    with pytest.raises(ConflictError):
+        ReservationHoldService().acquire(car_id=car.id, user_id=user.id, start=DAY, end=DAY)
+
+
+def test_paid_order_converts_its_hold(make_user, make_car):
+    user, car = make_user(), make_car()
+    seen = []
+    rent = RentService(gateway=_Gateway(during=lambda: seen.append(ReservationHold.select().count())))
+    b = _pay(rent, user, car)
+    assert seen == [1]                      # the slot was held while paying
+    assert ReservationHold.select().count() == 0
+    assert Booking.get_by_id(b.id).status == BOOKING_PENDING and Payment.select().count() == 1
+
+
+def test_slot_is_protected_during_slow_payment(make_user, make_car):
+    user, other, car = make_user(), make_user(), make_car()
+    rivals = []
+
+    def rival_books():
+        with pytest.raises(ConflictError):
+            RentService().create_pending_booking(actor_user_id=other.id, user_id=other.id,
+                                                 car_id=car.id, start_str=S, end_str=E)
+        rivals.append("refused")
+
+    _pay(RentService(gateway=_Gateway(during=rival_books)), user, car)
+    assert rivals == ["refused"] and Booking.select().count() == 1
+
+
+def test_failed_payment_releases_the_hold(make_user, make_car):
+    user, car = make_user(), make_car()
+    with pytest.raises(ConflictError):
+        _pay(RentService(gateway=_Gateway(ok=False)), user, car)
+    assert ReservationHold.select().count() == 0 and Booking.select().count() == 0
+
+
+def _expire_holds():
+    ReservationHold.update(expires_at=time.time() - 1).execute()
+
+
+def test_hold_expiring_during_payment_still_books_a_free_slot(make_user, make_car):
+    user, car = make_user(), make_car()
+    gateway = _Gateway(during=_expire_holds)
+    b = _pay(RentService(gateway=gateway), user, car)
+    assert Booking.get_by_id(b.id).status == BOOKING_PENDING
+    assert [p.txn_id for p in Payment.select()] == ["T-1"] and gateway.refunds == []
+    assert ReservationHold.select().count() == 0
+
+
+def test_slot_sold_after_the_hold_expired_refunds_the_payment(make_user, make_car, make_booking):
+    user, other, car = make_user(), make_user(), make_car()
+
+    def expire_and_lose_the_slot():
+        _expire_holds()
+        make_booking(car, other, DAY, 1, BOOKING_CONFIRMED)
+
+    gateway = _Gateway(during=expire_and_lose_the_slot)
+    with pytest.raises(ConflictError, match="refunded"):
+        _pay(RentService(gateway=gateway), user, car)
+    assert gateway.refunds == [("T-1", 50.0)]
+    assert Booking.select().count() == 1 and Payment.select().count() == 0
+    log = AuditLog.get(AuditLog.action == "refund_payment")
+    assert "txn=T-1 refund_txn=R-1" in log.detail and log.actor_user_id == user.id
+
+
+def test_database_error_after_payment_refunds_or_leaves_a_trace(make_user, make_car):
+    user, car = make_user(), make_car()
+    gateway = _Gateway(refund_ok=False)
+    with patch.object(Payment, "create", side_effect=RuntimeError("disk full")), \
+            pytest.raises(DatabaseError, match="refund failed"):
+        _pay(RentService(gateway=gateway), user, car)
+    assert gateway.refunds == [("T-1", 50.0)]
+    assert Booking.select().count() == 0 and ReservationHold.select().count() == 0
+    assert "txn=T-1" in AuditLog.get(AuditLog.action == "refund_failed").detail
@@ -0,0 +1,112 @@
+from datetime import date
+
+from db.hot_queries import HotQueries, HOT_ORM
+from db.models import Car, PricingRule, BOOKING_PENDING
+from api.response_cache import ResponseCache
+
+SEARCH = {"start": "01-09-2030", "end": "02-09-2030"}
+
+
+def _search(client, auth, etag=None, **params):
+    headers = dict(auth, **({"If-None-Match": etag} if etag else {}))
+    return client.get("/api/cars", headers=headers, query_string={**SEARCH, **params})
+
+
+def test_data_version_moves_on_every_car_booking_and_rule_write(make_car, make_booking, make_account):
+    user, hot = make_account("c@x.io"), HotQueries()
+    seen = [hot.data_version()]
+
+    def moved():
+        seen.append(hot.data_version())
+        return seen[-1] > seen[-2]
+
+    car = make_car()
+    assert moved()
+    Car.update(daily_rate=60).where(Car.id == car.id).execute()
+    assert moved()
+    b = make_booking(car, user, date(2030, 1, 1), 1, BOOKING_PENDING)
+    assert moved()
+    PricingRule.create(name="g", rule_type="discount", amount_type="percent", amount_value=5)
+    assert moved()
+    b.delete_instance()
+    assert moved()
+    assert not moved()  # reads don't
+    assert HotQueries(HOT_ORM).data_version() == seen[-1]
+
+
+def test_search_is_cached_and_revalidated_by_etag(client, count_queries, make_car, make_account, api_login, api_order):
+    me = api_login(client, make_account("c@x.io").email)
+    car, _ = make_car(), make_car()
+
+    first = _search(client, me)
+    assert first.headers["X-Cache"] == "MISS" and len(first.json["cars"]) == 2
+    etag = first.headers["ETag"]
+    with count_queries() as log:
+        again = _search(client, me)
+        unchanged = _search(client, me, etag=etag)
+    assert again.headers["X-Cache"] == "HIT" and again.data == first.data
+    assert unchanged.status_code == 304 and unchanged.data == b""
+    assert not [sql for sql in log.statements if "FROM \"car\"" in sql]  # the version read is a prepared query
+
+    assert _search(client, me, make="t").headers["X-Cache"] == "MISS"  # filters are part of the key
+    assert len(_search(client, me, max_rate=10).json["cars"]) == 0
+
+    Car.update(kilometre=99).where(Car.id == car.id).execute()  # moves the version, same search result
+    same = _search(client, me, etag=etag)
+    assert same.status_code == 304 and same.headers["X-Cache"] == "MISS"
+
+    assert api_order(client, me, car.id, "01-09-2030", "02-09-2030").status_code == 201  # car leaves "available"
+    changed = _search(client, me, etag=etag)
+    assert changed.status_code == 200 and [c["id"] for c in changed.json["cars"]] != [c["id"] for c in first.json["cars"]]
+    assert changed.headers["ETag"] != etag
+
+    admin = api_login(client, make_account("a@x.io", role="admin").email)
+    stats = client.get("/api/admin/cache", headers=admin).json
+    assert stats["hits"] == 2 and stats["not_modified"] == 2 and stats["stale"] == 2 and stats["entries"] == 3
+    assert stats["bytes"] > 0 and 0 < stats["hit_ratio"] < 1
+
+
+def test_car_listing_is_cached(client, make_car, make_account, api_login):
+    admin = api_login(client, make_account("a@x.io", role="admin").email)
+    for _ in range(3):
+        make_car()
+    page = client.get("/api/admin/cars", headers=admin, query_string={"limit": 2})
+    assert [c["id"] for c in page.json["cars"]] == [3, 2] and page.json["next_cursor"] == 2
+    assert client.get("/api/admin/cars", headers=admin, query_string={"limit": 2}).headers["X-Cache"] == "HIT"
+    make_car()
+    fresh = client.get("/api/admin/cars", headers=admin, query_string={"limit": 2})
+    assert fresh.headers["X-Cache"] == "MISS" and fresh.json["cars"][0]["id"] == 4
+
+
+def test_cache_is_bounded():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", 1, b"12345")
+    cache.put("b", 1, b"12345")
+    assert cache.get("a", 1) is not None  # a is now the most recent
+    cache.put("c", 1, b"1234")
+    assert cache.get("b", 1) is None and cache.get("c", 1) is not None
+    assert cache.put("big", 1, b"x" * 11).etag and cache.get("big", 1) is None
+    cache.put("c", 2, b"1")
+    cache.put("c", 1, b"22")  # an older build never replaces a newer one
+    assert cache.get("c", 2).body == b"1"
+    stats = cache.stats()
+    assert stats["bytes"] <= 10 and stats["evictions"] == 1
+
+
+def test_rebuilt_bodies_see_other_process_writes(client, make_car, make_account, api_login, other_process,
+                                                 book_elsewhere):
+    account = make_account("c@x.io")
+    me = api_login(client, account.email)
+    car, other = make_car(), make_car()
+    first = _search(client, me).json["cars"]
+    assert sorted(c["id"] for c in first) == [car.id, other.id]
+
+    other_process.execute(
+        "INSERT INTO pricingrule (name, rule_type, amount_type, amount_value, scope, min_days, is_active, created_at)"
+        " VALUES ('elsewhere', 'discount', 'percent', 10, 'global', 1, 1, '2030-01-01 00:00:00')")
+    discounted = _search(client, me)
+    assert discounted.headers["X-Cache"] == "MISS"
+    assert [c["total"] for c in discounted.json["cars"]] == [round(c["total"] * 0.9, 2) for c in first]
+
+    book_elsewhere(car.id, account.id, date(2030, 9, 1), 2)
+    assert [c["id"] for c in _search(client, me).json["cars"]] == [other.id]
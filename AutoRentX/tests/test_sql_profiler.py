@@ -0,0 +1,108 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from db.db_manager import DatabaseManager
+from db.hot_queries import HotQueries, HOT_PREPARED, PREPARED
+from db.models import db, Car
+from db.profiler import compare_reports, format_report, normalize_sql
+from customer_service.rent_service import RentService
+
+START = date(2030, 6, 1).strftime("%d-%m-%Y")
+RENT_SITE = "customer_service.rent_service:RentService"
+
+
+@pytest.fixture
+def profiler():
+    p = DatabaseManager().enable_profiling(slow_ms=10_000)
+    p.reset()
+    yield p
+    DatabaseManager().disable_profiling()
+
+
+def _order(user, car):
+    with patch("common.payment_app.random.random", return_value=0.5):
+        return RentService().place_order_and_pay(actor_user_id=user.id, user_id=user.id, car_id=car.id,
+                                                 start_str=START, end_str=START, pay_method="paypal",
+                                                 pay_kwargs={"email": "a@b.io"})
+
+
+def test_statements_are_aggregated_per_call_site(profiler, make_user, make_car):
+    user, cars = make_user(), [make_car() for _ in range(3)]
+    profiler.reset()
+    for car in cars:
+        _order(user, car)
+    HotQueries(HOT_PREPARED).car(cars[0].id)
+    list(Car.select().where(Car.id.in_([c.id for c in cars])))
+    list(Car.select().where(Car.id.in_([cars[0].id])))
+
+    report = profiler.report()
+    sites = {s["call_site"] for s in report["call_sites"]}
+    assert any(s.startswith(RENT_SITE) for s in sites)
+    assert not any(s.startswith(("db.", "peewee")) for s in sites)
+    assert f"{__name__}:test_statements_are_aggregated_per_call_site" in sites
+
+    inserts = [s for s in report["statements"] if s["sql"].startswith('INSERT INTO "booking"')]
+    assert len(inserts) == 1 and inserts[0]["calls"] == 3 and inserts[0]["rows"] == 3
+    assert inserts[0]["call_site"].startswith(RENT_SITE)
+    hot = [s for s in report["statements"] if s["call_site"] == f"{__name__}:test_statements_are_aggregated_per_call_site"]
+    by_id = [s for s in hot if s["sql"].startswith('SELECT "t1"."id"') and "IN (?, ...)" in s["sql"]]
+    assert len(by_id) == 1 and by_id[0]["calls"] == 2 and by_id[0]["rows"] == 4
+    assert by_id[0]["shapes"] == ["(int)", "(int, int, int)"]
+    prepared = [s for s in hot if s["sql"] == normalize_sql(PREPARED["car_by_id"].sql)]
+    assert len(prepared) == 1 and prepared[0]["rows"] == 1
+    assert sum(s["slow"] for s in report["statements"]) == 0
+
+
+def test_slow_statements_get_one_query_plan(profiler, make_car):
+    car = make_car()
+    profiler.slow_ms = 0
+    for _ in range(3):
+        Car.get_by_id(car.id)
+    stmt = next(s for s in profiler.statements() if s.sql.startswith('SELECT') and 'FROM "car"' in s.sql)
+    assert stmt.slow == 3 and stmt.calls == 3
+    assert len(stmt.plan) == 1 and "PRIMARY KEY" in stmt.plan[0]
+    assert "Slow statements:" in format_report(profiler.report())
+
+
+def test_dump_and_compare(profiler, tmp_path, make_user, make_car):
+    user, car, other = make_user(), make_car(), make_car()
+    _order(user, make_car())  # steady state: both runs replay the previous order's changelog entries
+    profiler.reset()
+    _order(user, car)
+    base = profiler.dump(str(tmp_path / "base.json"))
+    assert json.loads((tmp_path / "base.json").read_text())["statements"] == base["statements"]
+    assert compare_reports(base, base) == []
+
+    profiler.reset()
+    _order(user, other)
+    Car.get_by_id(car.id)
+    profiler.dump(str(tmp_path / "new.json"))
+    problems = compare_reports(base, profiler.report())
+    assert len(problems) == 1 and problems[0].startswith(f"new statement at {__name__}:")
+
+    cli = subprocess.run([sys.executable, "-m", "db.profiler", str(tmp_path / "base.json"), str(tmp_path / "new.json")],
+                         capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+    assert cli.returncode == 1 and "new statement" in cli.stdout
+
+
+def test_disabled_by_default():
+    manager = DatabaseManager()
+    assert manager.profiler is None and db.profiler is None
+    p = manager.enable_profiling()
+    assert manager.enable_profiling(slow_ms=5) is p and p.slow_ms == 5
+    assert manager.disable_profiling() is p and manager.profiler is None
+    Car.select().count()
+    assert p.statements() == []
+
+
+def test_normalize_sql():
+    assert normalize_sql('SELECT 1\n  FROM "car" WHERE id IN (?, ?,?)') == 'SELECT 1 FROM "car" WHERE id IN (?, ...)'
+    assert normalize_sql('SELECT 1 FROM "car" WHERE id IN (?)') == 'SELECT 1 FROM "car" WHERE id IN (?, ...)'
+    assert normalize_sql('RELEASE SAVEPOINT "s1f3a9";') == 'RELEASE SAVEPOINT "s...";'
+    assert normalize_sql("SELECT ? + ?") == "SELECT ? + ?"
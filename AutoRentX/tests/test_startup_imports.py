@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded only after an admin/customer logs in (or never, for stray imports)
+DEFERRED = {
+    "controllers.admin_menu", "controllers.customer_menu", "controllers.admin_pricing_cli",
+    "controllers.customer_rent_cli", "admin_service.pricing_service", "admin_service.booking_review_service",
+    "customer_service.rent_service", "common.payment_app", "turtle", "tkinter", "attr",
+}
+# Cumulative import time budget for `main` (microseconds); generous to avoid flaky CI
+MAIN_IMPORT_BUDGET_US = 1_000_000
+
+SCRIPT = """
+import main
+from controllers import MenuFactory
+from auth_service import PeeweeAuthService
+from admin_service.car_service import PeeweeCarService
+MenuFactory.create(None, PeeweeAuthService(), PeeweeCarService())
+"""
+
+
+def _importtime(db_path):
+    env = dict(os.environ, AUTORENTX_DB=db_path)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", SCRIPT],
+                          cwd=APP_DIR, env=env, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            modules[name.strip()] = int(cumulative)
+    return proc.stdout, modules
+
+
+def test_public_menu_startup_is_lazy():
+    db_path = os.path.join(tempfile.mkdtemp(), "startup.db")
+    stdout, modules = _importtime(db_path)
+
+    assert "main" in modules and "controllers.public_menu" in modules
+    assert not DEFERRED & modules.keys()
+    assert modules["main"] < MAIN_IMPORT_BUDGET_US
+    # no connection (and no output) until the first query
+    assert not os.path.exists(db_path)
+    assert "Database connected" not in stdout
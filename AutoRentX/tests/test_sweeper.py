@@ -0,0 +1,99 @@
+import time
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from db.changelog import changes_since, latest_seq
+from db.hot_queries import HotQueries, HOT_ORM
+from db.models import (db, Booking, Car, ChangeLog, Payment, ReservationHold, AuditLog, BOOKING_PENDING, BOOKING_CONFIRMED,
+                       BOOKING_CANCELLED, BOOKING_COMPLETED, STATUS_AVAILABLE, STATUS_RESERVED, STATUS_MAINTENANCE)
+from db.consistency import active_booking_drift
+from admin_service.sweeper_service import SweeperService, BULK_SUSPENDED_TRIGGERS
+from common.availability_index import AvailabilityIndex
+from common.exceptions import DatabaseError
+
+TODAY = date(2030, 6, 15)
+
+
+def _triggers():
+    return {r[0] for r in db.execute_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+
+
+def _status(model, row):
+    return model.get_by_id(row.id).status
+
+
+def test_sweep_completes_expires_and_frees_in_one_pass(count_queries, make_user, make_car, make_booking):
+    user = make_user()
+    done_car, busy_car, idle_car, broken = make_car(STATUS_RESERVED), make_car(STATUS_RESERVED), make_car(STATUS_RESERVED), make_car(STATUS_MAINTENANCE)
+    finished = make_booking(done_car, user, TODAY - timedelta(days=5), 3, BOOKING_CONFIRMED)
+    running = make_booking(busy_car, user, TODAY - timedelta(days=1), 3, BOOKING_CONFIRMED)   # ends after today
+    stale = make_booking(idle_car, user, TODAY - timedelta(days=2), 5, BOOKING_PENDING)
+    future = make_booking(idle_car, user, TODAY + timedelta(days=10), 2, BOOKING_PENDING)
+    make_booking(broken, user, TODAY - timedelta(days=9), 2, BOOKING_CONFIRMED)
+    ReservationHold.create(car=done_car, user=user, start_date=TODAY + timedelta(days=30),
+                           end_date=TODAY + timedelta(days=30), expires_at=time.time() - 1)
+
+    version = HotQueries(HOT_ORM).data_version()
+    with count_queries() as log:
+        result = SweeperService().sweep(actor_user_id=user.id, today=TODAY)
+    # 7 set-based statements (2 booking UPDATEs, counter recount, car UPDATE, version bump, hold DELETE,
+    # changelog prune) + trigger DDL, transaction control, one changelog and one audit insert, whatever the row count
+    assert sum(s.startswith(("UPDATE", "DELETE")) for s in log.statements) == 7
+    assert HotQueries(HOT_ORM).data_version() == version + 1
+    assert _triggers() >= set(BULK_SUSPENDED_TRIGGERS)
+
+    assert (result.completed, result.expired, result.cars_freed, result.holds_removed) == (2, 1, 1, 1)
+    assert _status(Booking, finished) == BOOKING_COMPLETED and _status(Booking, running) == BOOKING_CONFIRMED
+    assert _status(Booking, stale) == BOOKING_CANCELLED and _status(Booking, future) == BOOKING_PENDING
+    assert _status(Car, done_car) == STATUS_AVAILABLE
+    assert _status(Car, busy_car) == STATUS_RESERVED
+    assert _status(Car, idle_car) == STATUS_RESERVED        # still has a future pending booking
+    assert _status(Car, broken) == STATUS_MAINTENANCE       # never touched
+    assert active_booking_drift() == []
+    assert AuditLog.get(AuditLog.action == "sweep_bookings").detail.startswith("completed=2 expired=1")
+
+
+def test_sweep_is_idempotent_and_drops_caches(make_user, make_car, make_booking):
+    user, car = make_user(), make_car(STATUS_RESERVED)
+    make_booking(car, user, TODAY - timedelta(days=3), 1, BOOKING_CONFIRMED)
+    assert AvailabilityIndex().has_overlap(car.id, TODAY - timedelta(days=3), TODAY - timedelta(days=3))
+    SweeperService().sweep(today=TODAY)
+    assert not AvailabilityIndex().has_overlap(car.id, TODAY - timedelta(days=3), TODAY - timedelta(days=3))
+    again = SweeperService().sweep(today=TODAY)
+    assert (again.completed, again.expired, again.cars_freed) == (0, 0, 0)
+
+
+def test_failed_sweep_keeps_the_per_row_triggers(make_user, make_car, make_booking):
+    user, car = make_user(), make_car(STATUS_RESERVED)
+    old = make_booking(car, user, TODAY - timedelta(days=3), 1, BOOKING_CONFIRMED)
+    with patch.object(ReservationHold, "delete", side_effect=RuntimeError("disk full")), \
+            pytest.raises(DatabaseError):
+        SweeperService().sweep(today=TODAY)
+    assert _status(Booking, old) == BOOKING_CONFIRMED and _triggers() >= set(BULK_SUSPENDED_TRIGGERS)
+    Booking.update(status=BOOKING_CANCELLED).where(Booking.id == old.id).execute()
+    assert Car.get_by_id(car.id).active_bookings == 0       # counted by the trigger again
+
+
+def test_sweep_keeps_paid_pending_bookings(make_user, make_car, make_booking):
+    user, car = make_user(), make_car(STATUS_RESERVED)
+    paid = make_booking(car, user, TODAY - timedelta(days=2), 3, BOOKING_PENDING)
+    declined = make_booking(car, user, TODAY - timedelta(days=9), 3, BOOKING_PENDING)
+    Payment.create(booking=paid, method="card", amount=paid.grand_total, ok=True, txn_id="T1")
+    Payment.create(booking=declined, method="card", amount=declined.grand_total, ok=False)
+
+    result = SweeperService().sweep(today=TODAY)
+    assert result.expired == 1 and _status(Booking, declined) == BOOKING_CANCELLED
+    assert _status(Booking, paid) == BOOKING_PENDING        # left for the reviewer: the customer was charged
+    assert _status(Car, car) == STATUS_RESERVED and active_booking_drift() == []
+
+
+def test_sweep_logs_one_bulk_change_for_other_processes(make_user, make_car, make_booking):
+    user, car = make_user(), make_car()
+    for i in range(5):
+        make_booking(car, user, TODAY - timedelta(days=20 - 2 * i), 1, BOOKING_CONFIRMED)
+    seq = latest_seq()
+    assert SweeperService().sweep(today=TODAY).completed == 5
+    assert [e.row_id for e in ChangeLog.select().where(ChangeLog.seq > seq)] == [None]
+    assert changes_since(seq) is None                       # another process's views reload
@@ -0,0 +1,61 @@
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from db.hot_queries import HotQueries, HOT_ORM, HOT_PREPARED
+from db.models import db
+from db.unit_of_work import unit_of_work, current_identity_map
+from customer_service.profile_service import ProfileService
+from customer_service.rent_service import RentService
+
+START = date(2030, 6, 1).strftime("%d-%m-%Y")
+
+
+def _selects(sqls, table):
+    return [s for s in sqls if s.startswith("SELECT") and f'FROM "{table}"' in s]
+
+
+@pytest.mark.parametrize("mode", [HOT_ORM, HOT_PREPARED])
+def test_identity_map_is_scoped_and_shared(mode, make_user, make_car):
+    user, car = make_user(), make_car()
+    hot = HotQueries(mode)
+    assert hot.car(car.id) is not hot.car(car.id)  # no unit of work: nothing is kept
+    assert current_identity_map() is None
+
+    with unit_of_work() as imap:
+        first = hot.car(car.id)
+        with unit_of_work() as inner:
+            assert inner is imap and hot.car(car.id) is first
+        assert hot.car(999) is None and hot.car(999) is None
+        assert hot.profile(user.id) is hot.profile(user.id)
+        assert (imap.loads, imap.hits) == (3, 3)
+    assert current_identity_map() is None
+
+
+def test_order_flow_loads_car_and_profile_once(make_user, make_car):
+    user, car = make_user(), make_car()
+    rent, profiles = RentService(), ProfileService()
+    sqls = []
+    db.connection().set_trace_callback(sqls.append)  # sees the prepared hot queries too; peewee's log does not
+    try:
+        with patch("common.payment_app.random.random", return_value=0.5), unit_of_work():
+            profiles.get_my_profile(user.id)
+            rent.quote(car.id, START, START)
+            b = rent.place_order_and_pay(actor_user_id=user.id, user_id=user.id, car_id=car.id, start_str=START,
+                                         end_str=START, pay_method="paypal", pay_kwargs={"email": "a@b.io"})
+    finally:
+        db.connection().set_trace_callback(None)
+    assert b.status == "pending" and b.payments.count() == 1
+    assert len(_selects(sqls, "car")) == 1
+    assert len(_selects(sqls, "customerprofile")) == 1
+
+
+def test_saved_profile_is_what_the_unit_of_work_sees(make_user):
+    user = make_user()
+    profiles, hot = ProfileService(), HotQueries()
+    with unit_of_work():
+        assert hot.profile(user.id).phone == "1"
+        profiles.create_or_update(actor_user_id=user.id, user_id=user.id, first_name="Ann", last_name="Bee",
+                                  phone="0412345678", id_document="X1234567")
+        assert hot.profile(user.id).phone == "0412345678"